@@ -1,22 +1,35 @@
+import sys
+
+# python -m meam scan <경로...> - Streamlit 없이 일괄 검사, serve - HTTP 분석 서비스, bench - 성능 측정 (meam_cli)
+if __name__ == '__main__' and sys.argv[1:2] in (['scan'], ['serve'], ['bench']):
+    import meam_cli
+    sys.exit(meam_cli.main(sys.argv[1:]))
+
 import streamlit as st
-import gspread
-from google.oauth2 import service_account
 import re
 import difflib
-import json
 from datetime import datetime
 import os
 import pandas as pd
 import html
-import requests
 import time
-import gc
-import zipfile
-import io
+import threading
+import uuid
+import base64
 from concurrent.futures import ThreadPoolExecutor
-from PIL import Image
-from io import BytesIO
-import time
+from meam_scan import (AdaptiveBatchSizer, OccurrenceCounter, ScanPool, TextOccurrences, pack_scan_results,
+                       score_texts, score_texts_in_worker)
+from meam_aggregate import ResultAggregator
+from meam_lsh import near_duplicate_groups
+from meam_spell import RuleRefresher, check_spelling, rules_version
+from meam_cache import ResultCache, cache_context
+from meam_manifest import IncrementalScan, ScanManifest
+from meam_patterns import LocalPatternSource, PatternStore, SheetPatternSource
+from meam_thumbnails import ThumbnailPrefetcher
+from meam_sheets import SheetsGateway, open_backend, service_account_info
+from meam_ingest import iter_row_batches
+from meam_index import (LivePatternIndex, PatternIndex, FUZZY_SIMILARITY_THRESHOLD, MATCH_STAT_KEYS,
+                        add_stat, keyword_spans, merge_spans, merge_stats)
 
 
 # 페이지 설정
@@ -183,56 +196,43 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-import re
-from collections import defaultdict
+# 맞춤법 규칙 워크시트
+CHECKER_WORKSHEET = 'checker'
+
+@st.cache_resource
+def get_sheets_gateway():
+    """시트 게이트웨이 - 인증은 한 번만 하고 세션을 재사용 (MEAM_SHEETS_BACKEND=memory 또는 sqlite:<경로>로 가짜 백엔드 사용)"""
+    backend = open_backend(os.environ.get('MEAM_SHEETS_BACKEND', 'google'),
+                           lambda: service_account_info(st.secrets["gcp_service_account"]))
+    return SheetsGateway(backend)
 
 def get_or_create_checker_worksheet():
-    """checker 워크시트를 가져오거나 생성"""
+    """checker 워크시트가 없으면 생성한 뒤 시트 게이트웨이 반환"""
     try:
-        credentials = {
-            "type": "service_account",
-            "project_id": st.secrets["gcp_service_account"]["project_id"],
-            "private_key_id": st.secrets["gcp_service_account"]["private_key_id"],
-            "private_key": st.secrets["gcp_service_account"]["private_key"],
-            "client_email": st.secrets["gcp_service_account"]["client_email"],
-            "client_id": st.secrets["gcp_service_account"]["client_id"],
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-            "client_x509_cert_url": st.secrets["gcp_service_account"]["client_x509_cert_url"]
-        }
-        
-        SCOPES = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        creds = service_account.Credentials.from_service_account_info(credentials, scopes=SCOPES)
-        client = gspread.authorize(creds)
-        
-        sheet = client.open_by_url('https://docs.google.com/spreadsheets/d/1wPchxwAssBf706VuvxhGp4ESt3vj-N9RLcMaUF075ug/edit?gid=137455637#gid=137455637')
-        
-        try:
-            # checker 워크시트 가져오기 시도
-            checker_sheet = sheet.worksheet('checker')
-        except gspread.exceptions.WorksheetNotFound:
-            # checker 워크시트가 없으면 생성
-            checker_sheet = sheet.add_worksheet('checker', 1000, 2)
-            checker_sheet.update('A1:B1', [['오류', '수정']])
+        gateway = get_sheets_gateway()
+        if gateway.ensure_worksheet(CHECKER_WORKSHEET, ['오류', '수정']):
             st.success("'checker' 워크시트가 생성되었습니다.")
-            
-        return checker_sheet
+        return gateway
         
     except Exception as e:
         st.error(f"워크시트 처리 중 오류 발생: {str(e)}")
         return None
 
+def read_checker_rules(gateway):
+    """checker 워크시트에서 규칙 딕셔너리 읽기 (헤더 제외, 앞뒤 공백 제거)"""
+    data = gateway.read_values(CHECKER_WORKSHEET)
+    rules = {}
+    for row in data[1:]:
+        if len(row) >= 2 and row[0] and row[1]:
+            rules[row[0].strip()] = row[1].strip()
+    return rules
+
 class SheetBasedSpellChecker:
-    """구글 시트 기반 맞춤법 검사기 - 캐싱 최적화 버전"""
+    """구글 시트 기반 맞춤법 검사기 - 검사는 마지막으로 읽은 규칙으로, 갱신은 백그라운드에서"""
     
     _instance = None
-    _rules = None
-    _last_update = None
+    _refresher = None
+    _lock = threading.Lock()
     _update_interval = 300  # 5분마다 규칙 업데이트
     
     def __new__(cls):
@@ -241,144 +241,55 @@ class SheetBasedSpellChecker:
         return cls._instance
     
     def __init__(self):
-        # 초기화는 한 번만 수행
-        if self._rules is None:
-            self._rules = {}
-            self.load_rules()
+        # 시트 연결은 스크립트 스레드에서 한 번만 (백그라운드 갱신은 이 게이트웨이만 사용)
+        if SheetBasedSpellChecker._refresher is None:
+            with SheetBasedSpellChecker._lock:
+                if SheetBasedSpellChecker._refresher is None:
+                    self.load_rules()
     
     def load_rules(self):
-        """구글 시트에서 규칙 로드 - 캐싱 적용"""
-        current_time = time.time()
+        """규칙 갱신 - 처음에는 읽을 때까지 기다리고, 이후에는 백그라운드 갱신만 요청"""
+        refresher = SheetBasedSpellChecker._refresher
+        if refresher is not None:
+            refresher.refresh_in_background()
+            return
         
-        # 마지막 업데이트 후 지정된 시간이 지나지 않았다면 기존 규칙 사용
-        if (self._last_update and 
-            current_time - self._last_update < self._update_interval and 
-            self._rules):
+        gateway = get_or_create_checker_worksheet()
+        if not gateway:
             return
         
-        try:
-            checker_sheet = get_or_create_checker_worksheet()
-            if not checker_sheet:
-                return
-            
-            # 데이터 한 번에 가져오기
-            data = checker_sheet.get_all_values()
-            
-            # 규칙 딕셔너리 생성
-            new_rules = {}
-            if len(data) > 1:  # 헤더 제외
-                for row in data[1:]:  # 첫 행(헤더) 제외
-                    if len(row) >= 2 and row[0] and row[1]:
-                        new_rules[row[0].strip()] = row[1].strip()
-            
-            # 새 규칙으로 업데이트
-            self._rules = new_rules
-            self._last_update = current_time
-            
-        except Exception as e:
-            st.error(f"규칙 로딩 중 오류 발생: {str(e)}")
+        refresher = RuleRefresher(lambda: read_checker_rules(gateway), self._update_interval)
+        refresher.get()
+        if refresher.last_error:
+            st.error(f"규칙 로딩 중 오류 발생: {refresher.last_error}")
+        SheetBasedSpellChecker._refresher = refresher
+
+    @property
+    def last_error(self):
+        """마지막 규칙 갱신 실패 메시지 (성공했으면 None)"""
+        refresher = SheetBasedSpellChecker._refresher
+        return refresher.last_error if refresher is not None else None
+
+    def add_rule(self, wrong, right):
+        """규칙 하나 추가 - 새 딕셔너리로 교체해 검사 중인 다른 세션에 영향 없음 (규칙 버전은 내용 기반이라 함께 바뀜)"""
+        refresher = SheetBasedSpellChecker._refresher
+        if refresher is not None:
+            refresher.add(wrong.strip(), right.strip())
 
     def check(self, text):
         """텍스트 맞춤법 검사 - 캐시 활용"""
-        if not text or text.isspace():
-            return {
-                'original': text,
-                'corrected': text,
-                'corrections': [],
-                'error': None
-            }
-            
-        try:
-            corrections = []
-            corrected_text = text
-            
-            # 단어 단위로 분리
-            words = re.findall(r'\b\w+\b', text)
-            processed_corrections = set()  # 중복 교정 방지
-            
-            for wrong, right in self._rules.items():
-                try:
-                    # 정규식 패턴인지 확인
-                    if wrong.startswith('^') and wrong.endswith('$'):
-                        pattern = re.compile(wrong)
-                        matches = pattern.finditer(text)
-                        
-                        for match in matches:
-                            matched_text = match.group(0)
-                            corrected_word = re.sub(wrong, right, matched_text)
-                            
-                            if matched_text != corrected_word:
-                                correction_key = (matched_text, corrected_word)
-                                if correction_key not in processed_corrections:
-                                    processed_corrections.add(correction_key)
-                                    corrected_text = corrected_text.replace(matched_text, corrected_word)
-                                    corrections.append({
-                                        'original': matched_text,
-                                        'corrected': corrected_word,
-                                        'type': '맞춤법/표현 오류 (정규식)',
-                                        'pattern': wrong,
-                                        'replacement': right
-                                    })
-                    else:
-                        # 일반 문자열 매칭
-                        for word in words:
-                            if wrong in word:
-                                corrected_word = word.replace(wrong, right)
-                                correction_key = (word, corrected_word)
-                                
-                                if word != corrected_word and correction_key not in processed_corrections:
-                                    processed_corrections.add(correction_key)
-                                    corrected_text = corrected_text.replace(word, corrected_word)
-                                    corrections.append({
-                                        'original': word,
-                                        'corrected': corrected_word,
-                                        'type': '맞춤법/표현 오류',
-                                        'pattern': wrong,
-                                        'replacement': right
-                                    })
-                                    
-                except re.error:
-                    # 잘못된 정규식은 일반 문자열로 처리
-                    if wrong in text:
-                        correction_key = (wrong, right)
-                        if correction_key not in processed_corrections:
-                            processed_corrections.add(correction_key)
-                            corrected_text = corrected_text.replace(wrong, right)
-                            corrections.append({
-                                'original': wrong,
-                                'corrected': right,
-                                'type': '맞춤법/표현 오류',
-                                'pattern': wrong,
-                                'replacement': right
-                            })
-            
-            # 교정 결과 정렬
-            corrections.sort(key=lambda x: len(x['original']), reverse=True)
-            
-            return {
-                'original': text,
-                'corrected': corrected_text,
-                'corrections': corrections,
-                'error': None
-            }
-            
-        except Exception as e:
-            return {
-                'original': text,
-                'corrected': text,
-                'corrections': [],
-                'error': str(e)
-            }
+        return check_spelling(text, self.get_rules())
 
     def get_rules(self):
-        """현재 등록된 모든 규칙 반환"""
-        return self._rules.copy()
+        """현재 규칙 스냅샷 - 교체만 되고 수정되지 않는 딕셔너리이므로 호출하는 쪽에서 수정하지 않는다"""
+        refresher = SheetBasedSpellChecker._refresher
+        return refresher.get() if refresher is not None else {}
 
     @classmethod
     def clear_cache(cls):
-        """캐시 초기화"""
-        cls._rules = None
-        cls._last_update = None
+        """캐시 초기화 - 다음 조회 때 백그라운드에서 다시 읽음"""
+        if cls._refresher is not None:
+            cls._refresher.invalidate()
 
 
 def display_spelling_analysis(spelling_result):
@@ -430,21 +341,36 @@ def display_spelling_analysis(spelling_result):
                 </div>
             """, unsafe_allow_html=True)
 
-def analyze_text_with_spelling(input_text, data, threshold=0.7):
+def analyze_text_with_spelling(input_text, index, threshold=0.7):
     """텍스트 분석과 맞춤법 검사 통합"""
     
-    # 맞춤법 검사
     checker = SheetBasedSpellChecker()
+
+    # 같은 텍스트/패턴 DB/규칙 버전의 결과가 캐시에 있으면 재사용
+    index_version = getattr(index, 'version', None)
+    result_cache = get_result_cache() if index_version else None
+    cache_key = cache_context('text', index_version, rules_version(checker.get_rules()), threshold)
+    if result_cache is not None:
+        cached = result_cache.get(cache_key, input_text)
+        if cached is not None:
+            # 저장된 검사 시각 대신 이번 조회 시각으로 표시
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for entry in cached['patterns'] + [cached['spelling']]:
+                if 'timestamp' in entry:
+                    entry['timestamp'] = timestamp
+            return cached
+
+    # 맞춤법 검사
     spelling_result = checker.check(input_text)
     
     # 패턴 매칭
-    found_patterns = find_matching_patterns(input_text, data, threshold)
+    found_patterns = find_matching_patterns(input_text, index, threshold)
     
     # 맞춤법 교정 후 추가 패턴 검사
     if spelling_result['corrections']:
         corrected_patterns = find_matching_patterns(
             spelling_result['corrected'], 
-            data, 
+            index, 
             threshold
         )
         
@@ -455,10 +381,13 @@ def analyze_text_with_spelling(input_text, data, threshold=0.7):
                 pattern['found_in_corrected'] = True
                 found_patterns.append(pattern)
     
-    return {
+    result = {
         'patterns': found_patterns,
         'spelling': spelling_result
     }
+    if result_cache is not None and not spelling_result.get('error'):
+        result_cache.put(cache_key, input_text, result)
+    return result
 
 # 1. 데이터 전처리 최적화
 @st.cache_data(ttl=3600)
@@ -610,71 +539,35 @@ def check_pattern(input_data, pattern_data, threshold=0.7):
 
 
 
-@st.cache_data(ttl=300)
+@st.cache_resource
+def get_pattern_store():
+    """로컬 스냅샷 기반 패턴 DB (MEAM_PATTERN_SOURCE에 CSV 경로를 주면 구글 시트 대신 로컬 파일 사용)"""
+    local_path = os.environ.get('MEAM_PATTERN_SOURCE')
+    if local_path:
+        return PatternStore(lambda: LocalPatternSource(local_path))
+    gateway = get_sheets_gateway()
+    return PatternStore(lambda: SheetPatternSource(gateway))
+
+def get_pattern_writer():
+    """패턴 등록 대상 (로컬 원본 또는 구글 시트 워크시트)"""
+    local_path = os.environ.get('MEAM_PATTERN_SOURCE')
+    if local_path:
+        return LocalPatternSource(local_path)
+    return SheetPatternSource(get_sheets_gateway())
+
 def load_sheet_data():
-    """Google Sheets 데이터 로드"""
-    try:
-        credentials = {
-            "type": "service_account",
-            "project_id": st.secrets["gcp_service_account"]["project_id"],
-            "private_key_id": st.secrets["gcp_service_account"]["private_key_id"],
-            "private_key": st.secrets["gcp_service_account"]["private_key"],
-            "client_email": st.secrets["gcp_service_account"]["client_email"],
-            "client_id": st.secrets["gcp_service_account"]["client_id"],
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-            "client_x509_cert_url": st.secrets["gcp_service_account"]["client_x509_cert_url"],
-            "universe_domain": "googleapis.com"
-        }
-        
-        SCOPES = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        creds = service_account.Credentials.from_service_account_info(
-            credentials, scopes=SCOPES)
-        client = gspread.authorize(creds)
-        
-        sheet = client.open_by_url('https://docs.google.com/spreadsheets/d/1wPchxwAssBf706VuvxhGp4ESt3vj-N9RLcMaUF075ug/edit?gid=137455637#gid=137455637')
-        worksheet = sheet.get_worksheet(0)
-        return worksheet.get_all_records()
-    except Exception as e:
-        st.error(f"데이터 로드 중 오류 발생: {str(e)}")
-        return None
+    """패턴 데이터 로드 - 로컬 스냅샷에서 바로 읽고 구글 시트와는 5분 간격으로 변경분만 동기화
 
-@st.cache_resource
-def get_sheet_instance():
-    """시트 인스턴스 가져오기"""
+    세션 간에 같은 레코드 목록을 공유하며, 등록/동기화로 행이 추가되면 기존 레코드 뒤에 붙은 새 목록이 된다.
+    """
     try:
-        credentials = {
-            "type": "service_account",
-            "project_id": st.secrets["gcp_service_account"]["project_id"],
-            "private_key_id": st.secrets["gcp_service_account"]["private_key_id"],
-            "private_key": st.secrets["gcp_service_account"]["private_key"],
-            "client_email": st.secrets["gcp_service_account"]["client_email"],
-            "client_id": st.secrets["gcp_service_account"]["client_id"],
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-            "client_x509_cert_url": st.secrets["gcp_service_account"]["client_x509_cert_url"],
-            "universe_domain": "googleapis.com"
-        }
-        
-        SCOPES = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        creds = service_account.Credentials.from_service_account_info(
-            credentials, scopes=SCOPES)
-        client = gspread.authorize(creds)
-        
-        sheet = client.open_by_url('https://docs.google.com/spreadsheets/d/1wPchxwAssBf706VuvxhGp4ESt3vj-N9RLcMaUF075ug/edit?gid=137455637#gid=137455637')
-        return sheet.get_worksheet(0)
+        store = get_pattern_store()
+        records = store.get_records()
+        if store.last_error:
+            st.warning(f"구글 시트와 동기화하지 못해 저장된 패턴 데이터를 사용합니다: {store.last_error}")
+        return records
     except Exception as e:
-        st.error(f"시트 연결 중 오류 발생: {str(e)}")
+        st.error(f"데이터 로드 중 오류 발생: {str(e)}")
         return None
 
 
@@ -705,145 +598,54 @@ def get_danger_level_class(score):
     else:
         return "danger-level-high"
 
-def get_youtube_thumbnail(url):
-    """유튜브 URL에서 썸네일 URL 추출"""
-    if not url:
+@st.cache_resource
+def get_thumbnail_prefetcher():
+    """썸네일 미리 받기 - 세션 간 공유 (디스크 캐시 위치는 MEAM_THUMBNAIL_DIR)"""
+    return ThumbnailPrefetcher()
+
+def thumbnail_data_uri(url):
+    """받아 둔 썸네일의 data URI (아직 없으면 None)"""
+    data = get_thumbnail_prefetcher().get(url)
+    if data is None:
         return None
-    video_id = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", url)
-    if video_id and 'youtube.com' in url:
-        return f"https://img.youtube.com/vi/{video_id.group(1)}/hqdefault.jpg"
-    return None
+    return 'data:image/jpeg;base64,' + base64.b64encode(data).decode('ascii')
+
+# 보관하는 페이지 HTML에는 썸네일 대신 이 자리 표시만 넣고, 표시할 때 그 시점에 받아 둔 썸네일로 채움
+THUMBNAIL_PLACEHOLDER = re.compile(r"<!--thumbnail:(.*?)-->")
+
+def thumbnail_placeholder(url):
+    return f"<!--thumbnail:{html.escape(url)}-->"
+
+def fill_thumbnails(page_html):
+    """페이지 HTML의 썸네일 자리 표시를 받아 둔 썸네일 이미지로 교체 (아직 없으면 비워 둠)"""
+    images = {}
+
+    def image(match):
+        url = html.unescape(match.group(1))
+        if url not in images:
+            thumbnail = thumbnail_data_uri(url)
+            images[url] = f"<div style='margin-top:10px'><img src='{thumbnail}' width='200'></div>" if thumbnail else ''
+        return images[url]
+
+    return THUMBNAIL_PLACEHOLDER.sub(image, page_html)
+
+@st.cache_resource
+def get_live_index():
+    """컴파일된 패턴 인덱스 보관소 - 세션 간 공유, 추가된 패턴만 반영해 갱신"""
+    return LivePatternIndex()
 
 # 3. 병렬 처리 최적화
-def find_matching_patterns(input_text, data, threshold=0.5):  # 임계값을 0.7에서 0.5로 낮춤
-    """텍스트 패턴 매칭 - 향상된 정확도"""
-    if not data or not input_text:
+def find_matching_patterns(input_text, index, threshold=0.5, candidates=None, fuzzy_threshold=None,
+                           stats=None):  # 임계값을 0.7에서 0.5로 낮춤
+    """텍스트 패턴 매칭 - 컴파일된 패턴 인덱스 사용"""
+    if not index or not input_text:
         return []
-        
-    input_text = str(input_text).strip()
-    if not input_text or input_text.isspace():
-        return []
-    
+
     try:
-        # 입력 텍스트 전처리
-        input_text_lower = str(input_text).lower()
-        # 특수문자를 공백으로 변경 (제거 대신)
-        input_text_cleaned = re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', input_text_lower)
-        input_words = set(w for w in input_text_cleaned.split() if w.strip())
-        
-        # N-gram 생성 (2단어 및 3단어 연속 패턴)
-        input_bigrams = set()
-        input_trigrams = set()
-        words = input_text_cleaned.split()
-        for i in range(len(words)-1):
-            input_bigrams.add(' '.join(words[i:i+2]))
-            if i < len(words)-2:
-                input_trigrams.add(' '.join(words[i:i+3]))
-        
-        found_patterns = []
-        
-        for pattern in data:
-            try:
-                if not isinstance(pattern, dict) or 'text' not in pattern:
-                    continue
-                
-                pattern_text = str(pattern['text'])
-                pattern_text_lower = pattern_text.lower()
-                pattern_cleaned = re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', pattern_text_lower)
-                pattern_words = set(w for w in pattern_cleaned.split() if w.strip())
-                
-                if not pattern_words:
-                    continue
-                
-                # 1. 다양한 매칭 검사
-                exact_match = pattern_text_lower in input_text_lower
-                partial_match = any(word in input_text_lower for word in pattern_words if len(word) > 1)
-                
-                # 2. N-gram 매칭
-                pattern_bigrams = set()
-                pattern_trigrams = set()
-                p_words = pattern_cleaned.split()
-                for i in range(len(p_words)-1):
-                    pattern_bigrams.add(' '.join(p_words[i:i+2]))
-                    if i < len(p_words)-2:
-                        pattern_trigrams.add(' '.join(p_words[i:i+3]))
-                
-                bigram_match = bool(input_bigrams & pattern_bigrams)
-                trigram_match = bool(input_trigrams & pattern_trigrams)
-                
-                # 3. 단어 기반 유사도
-                common_words = input_words & pattern_words
-                word_similarity = len(common_words) / len(pattern_words) if pattern_words else 0
-                
-                # 4. 시퀀스 매칭
-                text_similarity = difflib.SequenceMatcher(None, input_text_cleaned, pattern_cleaned).ratio()
-                
-                # 5. 연속 단어 매칭
-                continuous_match = False
-                if len(pattern_words) > 1:
-                    pattern_seq = ' '.join(pattern_cleaned.split())
-                    if pattern_seq in input_text_cleaned:
-                        continuous_match = True
-                
-                # 최종 점수 계산 - 다양한 매칭 기준 통합
-                matching_points = sum([
-                    exact_match * 1.0,
-                    continuous_match * 0.9,
-                    bigram_match * 0.8,
-                    trigram_match * 0.7,
-                    word_similarity * 0.6,
-                    text_similarity * 0.5,
-                    partial_match * 0.4
-                ])
-                
-                final_score = matching_points / 4.9  # 정규화
-                
-                # 매칭 조건 완화
-                if final_score >= threshold or exact_match or continuous_match or (bigram_match and word_similarity > 0.3):
-                    danger_level = int(pattern.get('dangerlevel', 0))
-                        
-                    found_pattern = {
-                        'pattern': pattern_text,
-                        'analysis': pattern.get('output', '분석 정보 없음'),
-                        'danger_level': danger_level,
-                        'url': pattern.get('url', ''),
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'match_score': final_score,
-                        'original_text': input_text,
-                        'matched_keywords': list(common_words),
-                        'text': input_text,
-                        'exact_match': exact_match,
-                        'continuous_match': continuous_match,
-                        'matching_details': {
-                            'exact_match': exact_match,
-                            'continuous_match': continuous_match,
-                            'bigram_match': bigram_match,
-                            'trigram_match': trigram_match,
-                            'word_similarity': word_similarity,
-                            'text_similarity': text_similarity,
-                            'partial_match': partial_match
-                        }
-                    }
-                    
-                    if pattern.get('url') and 'youtube.com' in pattern['url']:
-                        found_pattern['thumbnail'] = get_youtube_thumbnail(pattern['url'])
-                        
-                    found_patterns.append(found_pattern)
-            
-            except Exception as e:
-                st.error(f"패턴 '{pattern.get('text', '알 수 없는 패턴')}' 처리 중 오류 발생: {str(e)}")
-                continue
-        
-        # 매칭 품질 기반 정렬
-        found_patterns.sort(key=lambda x: (
-            x.get('exact_match', False),
-            x.get('continuous_match', False),
-            x['match_score'],
-            x['danger_level']
-        ), reverse=True)
-        
-        return found_patterns
-        
+        if not isinstance(index, PatternIndex):
+            index = PatternIndex(index)
+        return index.match(input_text, threshold, candidates, fuzzy_threshold, stats)
+
     except Exception as e:
         st.error(f"패턴 매칭 중 오류 발생: {str(e)}")
         return []
@@ -862,26 +664,41 @@ def extract_keywords(text):
         return []
 
 
-def highlight_pattern_in_text(text, pattern, matched_keywords=None):
-    """텍스트 내의 패턴을 하이라이트 - 공백 최적화"""
+HIGHLIGHT_STYLE = "background: linear-gradient(104deg, rgba(255,178,15,0.2) 0.9%, rgba(255,178,15,0.4) 2.4%, rgba(255,178,15,0.3) 5.8%, rgba(255,178,15,0.2) 93%, rgba(255,178,15,0.2) 96%); padding: 0.1em 0.2em; border-radius: 4px; color: #FFB20F; font-weight: 500;"
+
+def highlight_spans(text, spans, style=HIGHLIGHT_STYLE):
+    """글자 위치 목록(정렬, 겹치지 않음)을 한 번에 훑으며 하이라이트 - 모든 구간을 HTML 이스케이프"""
+    text = str(text)
+    parts = []
+    position = 0
+    for start, end in spans:
+        if start < position or end > len(text):
+            continue
+        parts.append(html.escape(text[position:start]))
+        parts.append(f'<span style="{style}">{html.escape(text[start:end])}</span>')
+        position = end
+    parts.append(html.escape(text[position:]))
+    return ''.join(parts)
+
+def result_spans(result):
+    """결과의 하이라이트 위치 - 매칭 엔진이 준 위치, 없으면(이전 결과) 매칭 키워드 위치"""
+    spans = result.get('match_spans')
+    if spans is not None:
+        return spans
+    text = str(result.get('text', ''))
+    lower = text.lower()
+    if len(lower) != len(text):
+        return []
+    return merge_spans(keyword_spans(lower, [str(keyword).lower() for keyword in result.get('matched_keywords', [])]))
+
+def highlight_pattern_in_text(text, pattern, matched_keywords=None, spans=None):
+    """텍스트 내의 패턴을 하이라이트 - 매칭 위치(spans)가 있으면 그대로 사용"""
     try:
         if not text or not pattern:
             return html.escape(str(text))
-            
-        result = str(text)
-        highlight_style = "background: linear-gradient(104deg, rgba(255,178,15,0.2) 0.9%, rgba(255,178,15,0.4) 2.4%, rgba(255,178,15,0.3) 5.8%, rgba(255,178,15,0.2) 93%, rgba(255,178,15,0.2) 96%); padding: 0.1em 0.2em; border-radius: 4px; color: #FFB20F; font-weight: 500;"
-        
-        if matched_keywords:
-            for keyword in matched_keywords:
-                if not keyword.strip():
-                    continue
-                pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-                result = pattern.sub(
-                    lambda m: f'<span style="{highlight_style}">{m.group()}</span>',
-                    result
-                )
-        
-        return result
+        if spans is None:
+            spans = result_spans({'text': text, 'matched_keywords': matched_keywords or []})
+        return highlight_spans(text, spans)
         
     except Exception as e:
         st.error(f"하이라이트 처리 중 오류 발생: {str(e)}")
@@ -917,241 +734,232 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-import streamlit as st
-import html
+@st.cache_resource
+def get_result_cache():
+    """디스크 매칭 결과 캐시 - 생성할 수 없는 환경이면 None (캐시 없이 동작)"""
+    try:
+        return ResultCache()
+    except Exception as e:
+        st.warning(f"결과 캐시를 사용할 수 없습니다: {str(e)}")
+        return None
+
+@st.cache_resource
+def get_scan_manifest():
+    """파일 부분별 해시/결과 저장소 - 생성할 수 없는 환경이면 None (매번 전체 검사)"""
+    try:
+        return ScanManifest()
+    except Exception as e:
+        st.warning(f"증분 분석 정보를 저장할 수 없습니다: {str(e)}")
+        return None
+
+@st.cache_resource
+def get_scan_pool():
+    """파일 분석용 프로세스 풀 - 서버당 한 번 생성되어 재실행 간 재사용"""
+    return ScanPool()
 
-def analyze_file_contents(file_content, data):
+def analyze_file_contents(file_content, index, use_processes=True):
     """파일 내용 분석 - 오류 수정 및 최적화 버전"""
     if file_content is not None:
         try:
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            from functools import partial
-            import numpy as np
+            from concurrent.futures import wait, FIRST_COMPLETED
+            from concurrent.futures.process import BrokenProcessPool
             
             filename = getattr(file_content, 'name', '알 수 없는 파일')
             
-            # 패턴 인덱싱 수정 - 딕셔너리 키를 문자열로 변경
-            pattern_lookup = {}
-            for idx, pat in enumerate(data):
-                if not isinstance(pat, dict) or 'text' not in pat:
-                    continue
-                key_words = set(re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', str(pat['text']).lower()).split())
-                for word in key_words:
-                    if len(word) >= 2:
-                        if word not in pattern_lookup:
-                            pattern_lookup[word] = []
-                        pattern_lookup[word].append(idx)  # 패턴 대신 인덱스 저장
-
-            # 배치 분석 함수 수정
-            def analyze_text_batch(texts, source_files, column, sheet_names=None):
-                batch_results = []
-                checker = SheetBasedSpellChecker()
-                
-                for idx, (text, source_file) in enumerate(zip(texts, source_files)):
-                    if not isinstance(text, str) or not text.strip():
-                        continue
-
-                    # 1단계: 빠른 키워드 매칭
-                    text_lower = str(text).lower()
-                    words = set(re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', text_lower).split())
-                    
-                    # 후보 패턴 인덱스 수집
-                    candidate_pattern_indices = set()
-                    matching_words = set()
-                    for word in words:
-                        if len(word) >= 2 and word in pattern_lookup:
-                            candidate_pattern_indices.update(pattern_lookup[word])
-                            matching_words.add(word)
-
-                    # 2단계: 상세 패턴 매칭
-                    for pat_idx in candidate_pattern_indices:
-                        pattern = data[pat_idx]
-                        match = find_matching_patterns(text, [pattern], threshold=0.5)
-                        if match:
-                            for m in match:
-                                m.update({
-                                    'source_file': source_file,
-                                    'column': column,
-                                    'matching_words': list(matching_words)
-                                })
-                                if sheet_names is not None:
-                                    m['sheet_name'] = sheet_names.iloc[idx]
-                                batch_results.append(m)
-
-                    # 맞춤법 검사 (캐시 활용)
-                    spell_result = checker.check(text)
-                    if spell_result['corrections']:
-                        spell_check = {
-                            'text': text,
-                            'source_file': source_file,
-                            'column': column,
-                            'sheet_name': sheet_names.iloc[idx] if sheet_names is not None else None,
-                            'spelling_errors': spell_result['corrections'],
-                            'corrected_text': spell_result['corrected'],
-                            'is_spell_check': True,
-                            'match_score': 1.0,
-                            'danger_level': 0
-                        }
-                        batch_results.append(spell_check)
-                        
-                return batch_results
-
-            # 파일 처리 최적화
-            BATCH_SIZE = 10000
+            # 파일 처리 최적화 (스레드 모드 워커 수 - 배치 크기는 처리 속도에 맞춰 자동 조정)
             MAX_WORKERS = min(32, (os.cpu_count() or 1) * 2)
             
-            dfs = []
-            file_type = filename.split('.')[-1].lower()
-            
-            # 파일 타입별 최적화된 로딩
-            if file_type == 'csv':
-                try:
-                    df = pd.read_csv(file_content, dtype=str, engine='c', encoding='utf-8')
-                except UnicodeDecodeError:
-                    file_content.seek(0)
-                    df = pd.read_csv(file_content, dtype=str, engine='c', encoding='euc-kr')
-                df['source_file'] = filename
-                dfs.append(df)
-            
-            elif file_type in ['xlsx', 'xls']:
-                excel_file = pd.ExcelFile(file_content)
-                for sheet_name in excel_file.sheet_names:
-                    try:
-                        df = pd.read_excel(excel_file, sheet_name=sheet_name, dtype=str, engine='openpyxl')
-                        df['source_file'] = f"{filename} - {sheet_name}"
-                        df['sheet_name'] = sheet_name
-                        dfs.append(df)
-                    except Exception as e:
-                        st.warning(f"시트 '{sheet_name}' 처리 중 오류: {str(e)}")
-                        continue
-            
-            elif file_type == 'zip':
-                with zipfile.ZipFile(file_content) as z:
-                    for zip_filename in z.namelist():
-                        if zip_filename.endswith(('.csv', '.xlsx', '.xls')):
-                            with z.open(zip_filename) as f:
-                                try:
-                                    if zip_filename.endswith('.csv'):
-                                        df = pd.read_csv(io.BytesIO(f.read()), dtype=str, engine='c')
-                                    else:
-                                        df = pd.read_excel(io.BytesIO(f.read()), dtype=str, engine='openpyxl')
-                                    df['source_file'] = f"{filename} - {zip_filename}"
-                                    dfs.append(df)
-                                except Exception as e:
-                                    st.warning(f"ZIP 내부 파일 '{zip_filename}' 처리 중 오류: {str(e)}")
-                                    continue
-
-            if not dfs:
-                return None
-
-            # 데이터프레임 최적화
-            df = pd.concat(dfs, ignore_index=True, copy=False)
-            del dfs
-            gc.collect()
-
-            text_columns = df.select_dtypes(include=['object']).columns
-            text_columns = [col for col in text_columns if col not in ['source_file', 'sheet_name']]
-            
-            if not text_columns:
-                return None
-
-            all_results = []
-            total_rows = len(df)
+            match_stats = {}
             
             # 진행 상황 표시
             progress_bar = st.progress(0)
             status_text = st.empty()
             
             processed_rows = 0
+            read_progress = 0.0
             start_time = time.time()
 
-            # 병렬 처리
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                future_to_batch = {}
-                
-                for col in text_columns:
-                    texts = df[col].dropna()
-                    if texts.empty:
-                        continue
-                        
-                    source_files = df.loc[texts.index, 'source_file']
-                    sheet_names = df.loc[texts.index, 'sheet_name'] if 'sheet_name' in df.columns else None
-                    
-                    # 배치 단위로 분할
-                    for batch_start in range(0, len(texts), BATCH_SIZE):
-                        batch_end = min(batch_start + BATCH_SIZE, len(texts))
-                        batch_texts = texts.iloc[batch_start:batch_end]
-                        batch_sources = source_files.iloc[batch_start:batch_end]
-                        batch_sheets = sheet_names.iloc[batch_start:batch_end] if sheet_names is not None else None
-                        
-                        future = executor.submit(
-                            analyze_text_batch,
-                            batch_texts,
-                            batch_sources,
-                            col,
-                            batch_sheets
-                        )
-                        future_to_batch[future] = (batch_end - batch_start)
+            # 배치 크기는 완료된 배치의 처리 속도를 보고 조정
+            batch_sizer = AdaptiveBatchSizer()
+
+            # 같은 셀 텍스트는 파일 전체에서 한 번만 검사하고 결과를 모든 위치로 전개
+            occurrences = TextOccurrences()
+
+            # 결과는 부분(ZIP 멤버/시트)이 끝날 때마다 위치 단위로 하나씩 집계하고 상위 결과만 보관
+            aggregator = ResultAggregator()
+            occurrence_counter = OccurrenceCounter()
+
+            def collect_completed():
+                for result in occurrences.completed(index):
+                    incremental.add_result(result)
+                    occurrence_counter.add(result)
+                    aggregator.add(result)
+
+            def batch_tasks():
+                # 파일을 행 배치 단위로 읽으면서 바로 분석 작업 생성 (전체를 메모리에 올리지 않음)
+                # 내용 해시가 이전 분석과 같은 ZIP 멤버/시트는 읽지 않고 이전 결과를 재사용
+                row_batches = iter_row_batches(file_content, filename, on_error=report_error,
+                                               unchanged=incremental.unchanged)
+                pending = []
+                progress = 0.0
+                for chunk in row_batches:
+                    frame = chunk['frame']
+                    progress = chunk['progress']
+                    incremental.add_rows(chunk['part'], frame)
+                    for col in frame.columns:
+                        for row, text in frame[col].dropna().items():
+                            # 행 번호는 헤더(1행)를 포함한 시트 기준
+                            if occurrences.add(text, chunk['source_file'], chunk['sheet_name'], col, row + 2,
+                                               chunk['part']):
+                                pending.append(text)
+
+                        # 배치 단위로 분할 (결과 캐시에 있는 텍스트는 바로 반영)
+                        while len(pending) >= batch_sizer.size:
+                            batch, pending = pending[:batch_sizer.size], pending[batch_sizer.size:]
+                            batch = uncached(batch)
+                            if batch:
+                                yield batch, progress
+                occurrences.finish_reading()
+                if pending:
+                    pending = uncached(pending)
+                    if pending:
+                        yield pending, progress
+
+            # 병렬 처리 - 프로세스 풀(멀티코어, 인덱스는 워커당 한 번만 전달) 또는 스레드 풀
+            rules = SheetBasedSpellChecker().get_rules()
+
+            # 결과 캐시 - 패턴 DB/맞춤법 규칙 버전이 키에 포함되므로 등록 후에는 자동으로 새로 검사
+            result_cache = get_result_cache()
+            cache_key = cache_context('scan', index.version, rules_version(rules), 0.5, FUZZY_SIMILARITY_THRESHOLD)
+
+            # 부분(ZIP 멤버/시트)별 내용 해시 목록 - 오류 없이 끝난 분석만 저장
+            incremental = IncrementalScan(get_scan_manifest(), filename, cache_key)
+            scan_errors = []
+
+            def report_error(message):
+                scan_errors.append(message)
+                st.warning(message)
+
+            def apply_results(packed):
+                # 텍스트별 압축 결과만 보관 (결과 딕셔너리는 부분이 끝날 때 만듦)
+                for text, value in packed:
+                    occurrences.set_results(text, value)
+
+            def uncached(batch):
+                # 캐시에 결과가 있는 텍스트는 반영하고 나머지만 반환
+                if result_cache is None:
+                    return batch
+                cached = result_cache.get_many(cache_key, batch)
+                if not cached:
+                    return batch
+                hit_texts = [text for text in batch if text in cached]
+                apply_results([(text, cached[text]) for text in hit_texts])
+                add_stat(match_stats, 'cached_texts', len(hit_texts))
+                return [text for text in batch if text not in cached]
+
+            thread_executor = None
+            executor = None
+            if use_processes:
+                scan_pool = get_scan_pool()
+                executor = scan_pool.acquire(index, rules)
+                max_in_flight = scan_pool.max_workers * 2
+                submit = lambda texts: executor.submit(
+                    score_texts_in_worker, texts, 0.5, FUZZY_SIMILARITY_THRESHOLD)
+            else:
+                thread_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+                max_in_flight = MAX_WORKERS * 2
+                submit = lambda texts: thread_executor.submit(
+                    score_texts, texts, index, rules, 0.5, FUZZY_SIMILARITY_THRESHOLD)
 
-                # 결과 수집
-                for future in as_completed(future_to_batch):
-                    try:
-                        batch_size = future_to_batch[future]
-                        batch_results = future.result()
-                        all_results.extend(batch_results)
-                        
-                        processed_rows += batch_size
-                        progress = min(processed_rows / total_rows, 1.0)
-                        progress_bar.progress(progress)
-                        
-                        elapsed_time = time.time() - start_time
-                        speed = processed_rows / elapsed_time if elapsed_time > 0 else 0
-                        remaining_time = (total_rows - processed_rows) / speed if speed > 0 else 0
-                        
-                        status_text.text(f"""
-                            처리 중... {processed_rows:,}/{total_rows:,} 행
-                            처리 속도: {speed:.0f} 행/초
-                            예상 남은 시간: {remaining_time:.1f}초
-                            발견된 패턴: {len(all_results)}개
-                        """)
-                        
-                    except Exception as e:
-                        st.error(f"배치 처리 중 오류: {str(e)}")
-                        import traceback
-                        st.error(f"상세 오류: {traceback.format_exc()}")
+            tasks = batch_tasks()
+            future_to_batch = {}
+
+            def fill_queue():
+                while len(future_to_batch) < max_in_flight:
+                    task = next(tasks, None)
+                    if task is None:
+                        return
+                    future_to_batch[submit(task[0])] = task
+
+            try:
+                fill_queue()
+                while future_to_batch:
+                    done, _ = wait(future_to_batch, return_when=FIRST_COMPLETED)
+
+                    # 결과 수집
+                    for future in done:
+                        batch_texts, batch_progress = future_to_batch.pop(future)
+                        try:
+                            match_tuples, spelling, batch_stats, elapsed = future.result()
+                            batch_sizer.update(len(batch_texts), elapsed)
+                            packed = pack_scan_results(batch_texts, match_tuples, spelling)
+                            apply_results(packed)
+                            if result_cache is not None:
+                                result_cache.put_many(cache_key, packed)
+                            merge_stats(match_stats, batch_stats)
+                            
+                            processed_rows += len(batch_texts)
+                            read_progress = max(read_progress, batch_progress)
+                            progress_bar.progress(min(read_progress, 1.0))
+                            
+                            elapsed_time = time.time() - start_time
+                            speed = occurrences.cells / elapsed_time if elapsed_time > 0 else 0
+                            
+                            status_text.text(f"""
+                                처리 중... {occurrences.cells:,} 셀 (고유 텍스트 {processed_rows:,}개, 파일 {read_progress * 100:.0f}% 읽음)
+                                처리 속도: {speed:.0f} 셀/초
+                                결과가 있는 텍스트: {occurrences.hits}개
+                            """)
+                            
+                        except Exception as e:
+                            scan_errors.append(str(e))
+                            if isinstance(e, BrokenProcessPool):
+                                # 워커가 비정상 종료되면 다음 분석에서 풀을 새로 시작
+                                get_scan_pool().discard(executor)
+                            st.error(f"배치 처리 중 오류: {str(e)}")
+                            import traceback
+                            st.error(f"상세 오류: {traceback.format_exc()}")
+
+                    # 결과가 모두 모인 부분은 바로 집계하고 위치 정보를 버림
+                    collect_completed()
+                    fill_queue()
+            finally:
+                if thread_executor is not None:
+                    thread_executor.shutdown()
+                if executor is not None:
+                    # 이전 버전 풀을 마지막으로 쓰던 분석이면 여기서 종료됨
+                    get_scan_pool().release(executor)
 
             progress_bar.empty()
             status_text.empty()
 
-            if all_results:
-                # 결과 중복 제거
-                unique_keys = {}
-                
-                for result in all_results:
-                    key = (
-                        result.get('text', ''),
-                        result.get('pattern', '') if not result.get('is_spell_check') else 'spell_check',
-                        result.get('source_file', ''),
-                        result.get('column', '')
-                    )
-                    
-                    # 우선순위 기반 결과 선택
-                    if (key not in unique_keys or
-                        result.get('danger_level', 0) > unique_keys[key].get('danger_level', 0) or
-                        (result.get('danger_level', 0) == unique_keys[key].get('danger_level', 0) and
-                         result.get('match_score', 0) > unique_keys[key].get('match_score', 0))):
-                        unique_keys[key] = result
-
-                # 결과 정렬
-                unique_results = sorted(
-                    unique_keys.values(),
-                    key=lambda x: (-x.get('danger_level', 0), -x.get('match_score', 0))
-                )
-
+            add_stat(match_stats, 'cells', occurrences.cells)
+            add_stat(match_stats, 'duplicate_cells', occurrences.duplicates)
+            occurrences.finish_reading()
+            collect_completed()
+
+            # 변경 없는 부분의 이전 결과 병합
+            changes = incremental.finish()
+            if changes['reused_parts']:
+                for result in incremental.reused_results():
+                    occurrence_counter.add(result)
+                    aggregator.add(result)
+                add_stat(match_stats, 'reused_cells', incremental.reused_cells())
+                st.caption(f"♻️ {filename}: 변경 없는 부분 {len(changes['reused_parts'])}개는 이전 결과 재사용, "
+                           f"다시 검사한 부분 {len(changes['scanned_parts'])}개")
+            if not scan_errors:
+                incremental.save()
+
+            if aggregator.total_results:
+                top_results = aggregator.results()
+                occurrence_counter.apply(top_results)
                 return {
-                    'total_patterns': len([r for r in unique_results if not r.get('is_spell_check', False)]),
-                    'results': unique_results[:1000],
-                    'filename': filename
+                    'total_patterns': aggregator.total_patterns,
+                    'results': top_results,
+                    'aggregator': aggregator,
+                    'filename': filename,
+                    'match_stats': match_stats,
+                    'changes': changes
                 }
                 
             return None
@@ -1164,45 +972,231 @@ def analyze_file_contents(file_content, data):
     return None
 
 def group_similar_patterns(pattern_results, similarity_threshold=0.9):
-    """유사한 패턴들을 그룹화"""
-    grouped_results = []
-    used_indices = set()
+    """유사한 패턴들을 그룹화 - 패턴 또는 문장 유사도가 기준 이상인 결과끼리 (LSH 후보 + union-find)
+
+    원래 결과는 바꾸지 않고, 묶인 그룹은 대표 결과의 사본에 similar_count / similar_patterns를 붙여 반환한다.
+    """
+    def is_similar(a, b):
+        matcher = difflib.SequenceMatcher(None, a, b)
+        return (matcher.real_quick_ratio() >= similarity_threshold and
+                matcher.quick_ratio() >= similarity_threshold and
+                matcher.ratio() >= similarity_threshold)
     
-    for i, result in enumerate(pattern_results):
-        if i in used_indices:
+    grouped_results = []
+    items = [(result['pattern'], result['text']) for result in pattern_results]
+    for members in near_duplicate_groups(items, is_similar):
+        if len(members) == 1:
+            grouped_results.append(pattern_results[members[0]])
             continue
-            
-        # 현재 패턴과 유사한 패턴들을 찾아 그룹화
-        similar_patterns = []
-        base_pattern = result['pattern']
-        base_text = result['text']
         
-        for j, other_result in enumerate(pattern_results):
-            if j <= i:  # 이미 처리된 패턴은 건너뛰기
-                continue
-                
-            # 패턴 유사도 검사
-            pattern_similarity = difflib.SequenceMatcher(None, base_pattern, other_result['pattern']).ratio()
-            text_similarity = difflib.SequenceMatcher(None, base_text, other_result['text']).ratio()
-            
-            if pattern_similarity >= similarity_threshold or text_similarity >= similarity_threshold:
-                similar_patterns.append(other_result)
-                used_indices.add(j)
+        # 그룹 대표 패턴 선택 (위험도가 가장 높은 것)
+        group = [pattern_results[i] for i in members]
+        representative = max(group, key=lambda x: (x['danger_level'], x['match_score']))
+        similar_patterns = [result for result in group if result is not representative]
         
-        if similar_patterns:
-            # 그룹 대표 패턴 선택 (위험도가 가장 높은 것)
-            all_patterns = [result] + similar_patterns
-            representative = max(all_patterns, key=lambda x: (x['danger_level'], x['match_score']))
-            
-            # 그룹 정보 추가
-            representative['similar_count'] = len(similar_patterns)
-            representative['similar_patterns'] = similar_patterns
-            grouped_results.append(representative)
-        else:
-            grouped_results.append(result)
+        # 그룹 정보 추가
+        grouped_results.append(dict(representative, similar_count=len(similar_patterns),
+                                    similar_patterns=similar_patterns))
             
     return grouped_results
 
+def grouped_pattern_results(result_set_id, pattern_results):
+    """파일별로 유사한 결과를 묶은 목록 - 결과 집합 id별로 세션에 보관해 재실행 때 다시 묶지 않음"""
+    cache = st.session_state.get('grouped_results')
+    if cache is None or cache['id'] != result_set_id:
+        by_file = {}
+        for result in pattern_results:
+            by_file.setdefault(result.get('source_file', '알 수 없는 파일'), []).append(result)
+        grouped = [result for results in by_file.values() for result in group_similar_patterns(results)]
+        cache = st.session_state['grouped_results'] = {'id': result_set_id, 'results': grouped}
+    return cache['results']
+
+def format_occurrences(result, max_rows=10):
+    """중복 제거된 결과의 출현 위치(컬럼/행) 표시용 HTML"""
+    rows = result.get('rows')
+    if not rows:
+        return ''
+    shown = ', '.join(str(row) for row in rows[:max_rows])
+    if len(rows) > max_rows:
+        shown += f" 외 {len(rows) - max_rows}개"
+    total = result.get('total_occurrences', len(rows))
+    return (f"<span style='color:#888;margin-left:15px'>컬럼 '{html.escape(str(result.get('column', '')))}' "
+            f"{result.get('occurrences', len(rows))}회 (행 {shown}) · 전체 {total}회</span>")
+
+def display_aggregate_stats(aggregator):
+    """패턴/파일별 집계와 위험도/정확도 분포 표시"""
+    with st.expander("📊 패턴/파일별 집계"):
+        if aggregator.pattern_stats:
+            st.markdown("**패턴별 (출현 횟수 상위)**")
+            st.dataframe(
+                pd.DataFrame(
+                    [(pattern, stat['danger_level'], stat['hits'], stat['occurrences'], round(stat['max_score'] * 100))
+                     for pattern, stat in aggregator.top_patterns()],
+                    columns=['패턴', '위험도', '결과 수', '출현 횟수', '최고 정확도(%)']
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+
+        st.markdown("**파일별**")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, stat['patterns'], stat['high'], stat['medium'], stat['low'], stat['occurrences'], stat['spelling'])
+                 for name, stat in aggregator.file_stats.items()],
+                columns=['파일', '패턴 결과', '고위험', '주의', '안전', '출현 횟수', '맞춤법 오류']
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**위험도 분포**")
+            st.bar_chart(pd.DataFrame(
+                {'결과 수': aggregator.danger_histogram},
+                index=[f"{i * 10}~{i * 10 + 9}" if i < 9 else "90~100" for i in range(len(aggregator.danger_histogram))]
+            ))
+        with col2:
+            st.markdown("**정확도 분포 (%)**")
+            st.bar_chart(pd.DataFrame(
+                {'결과 수': aggregator.score_histogram},
+                index=[f"{i * 10}~{i * 10 + 9}" if i < 9 else "90~100" for i in range(len(aggregator.score_histogram))]
+            ))
+
+# 결과 목록 한 페이지에 표시하는 결과 수 / 세션에 보관하는 렌더링된 페이지 수
+RESULTS_PAGE_SIZE = 50
+RESULTS_PAGE_CACHE_SIZE = 64
+
+# 카드에 펼쳐 보여 주는 유사 결과 최대 수
+SIMILAR_SHOWN = 5
+
+SEVERITY_INFO = [
+    ('high', '🚨 고위험', "#FF5252"),
+    ('medium', '⚠️ 주의', "#FFD700"),
+    ('low', '✅ 안전', "#00E676")
+]
+
+def result_severity(result):
+    """위험도 구간 ('high' / 'medium' / 'low')"""
+    danger_level = result.get('danger_level', 0)
+    if danger_level >= 70:
+        return 'high'
+    if danger_level >= 30:
+        return 'medium'
+    return 'low'
+
+def render_pattern_summary(result, color):
+    """위험 패턴 결과의 요약 줄 HTML (페이지 HTML로 보관, 상세 내용은 render_pattern_detail)"""
+    match_score = int(result.get('match_score', 0) * 100)
+    pattern = str(result.get('pattern', ''))
+    summary = pattern if len(pattern) <= 60 else pattern[:60] + '…'
+    return f"""<div style='background-color:#2D2D2D;padding:10px 15px;border-radius:8px;margin:8px 0 0 0'>
+        <span style='color:{color};font-weight:bold'>위험도: {result.get('danger_level', 0)}</span>
+        <span style='color:#888;margin-left:15px'>정확도: {match_score}%</span>
+        <span style='color:#CCC;margin-left:15px'>{html.escape(summary)}</span>
+        {format_similar_count(result)}
+        {format_occurrences(result)}
+    </div>"""
+
+def render_pattern_detail(result, color):
+    """위험 패턴 결과의 상세 HTML - 항목을 펼쳤을 때만 만듦 (썸네일은 자리 표시만 넣음)"""
+    parts = ["<div style='background-color:#2D2D2D;padding:5px 15px 10px 15px;border-radius:8px;margin-bottom:8px'>"]
+
+    # 검출된 텍스트 표시
+    if 'text' in result:
+        # 매칭 엔진이 찾은 위치로 하이라이트
+        highlighted_text = highlight_spans(
+            result['text'], result_spans(result),
+            "background-color:rgba(255,178,15,0.3);color:#FFB20F;padding:0 3px;border-radius:3px"
+        )
+        parts.append(f"""<div style='color:#CCC;margin:10px 0 5px 0'>검출된 텍스트:</div><div style='background-color:#333;padding:10px;border-radius:5px;white-space:pre-wrap;font-family:monospace'>{highlighted_text}</div>""")
+
+    # 패턴 정보
+    if 'pattern' in result:
+        parts.append(f"""<div style='color:#CCC;margin:10px 0 5px 0'>매칭된 패턴:</div><div style='background-color:#333;padding:10px;border-radius:5px;color:{color}'>{html.escape(str(result['pattern']))}</div>""")
+
+    # 같은 그룹으로 묶인 유사 결과
+    if result.get('similar_patterns'):
+        similar = ''.join(
+            f"<div>{html.escape(str(item.get('text', '')))}{format_occurrences(item)}</div>"
+            for item in result['similar_patterns'][:SIMILAR_SHOWN])
+        parts.append(f"""<div style='color:#CCC;margin:10px 0 5px 0'>유사한 결과:</div><div style='background-color:#333;padding:10px;border-radius:5px'>{similar}</div>""")
+
+    # 분석 정보
+    if result.get('analysis'):
+        parts.append(f"""<div style='color:#CCC;margin:10px 0 5px 0'>분석:</div><div style='background-color:#333;padding:10px;border-radius:5px'>{html.escape(str(result['analysis']))}</div>""")
+
+    # 참고 자료
+    if result.get('url'):
+        parts.append(thumbnail_placeholder(result['url']))
+        parts.append(f"""<div style='margin-top:10px'><a href='{html.escape(result["url"])}' target='_blank' style='color:{color};text-decoration:none'>🔗 참고 자료</a></div>""")
+
+    parts.append("</div>")
+    return ''.join(parts)
+
+def format_similar_count(result):
+    """묶인 유사 결과 수 표시용 HTML (묶이지 않았으면 빈 문자열)"""
+    if not result.get('similar_count'):
+        return ''
+    return f"<span style='color:#FFB20F;margin-left:15px'>유사 {result['similar_count']}건</span>"
+
+def render_spelling_card(result):
+    """맞춤법 결과 카드 HTML"""
+    source_file = result.get('source_file', '알 수 없는 파일')
+    parts = [f"""<div style='background-color:#2D2D2D;padding:15px;border-radius:10px;margin:10px 0'>
+        <h4 style='color:#E0E0E0;margin:0'>📄 {html.escape(source_file)}</h4>{format_occurrences(result)}
+        <div style='display:flex;gap:15px;margin-top:10px'>
+            <div style='flex:1'><div style='color:#CCC;font-weight:bold'>원문:</div>
+                <div style='background-color:#333;padding:10px;border-radius:5px;color:#FFF'>{html.escape(str(result['text']))}</div></div>"""]
+    if result.get('corrected_text'):
+        parts.append(f"""<div style='flex:1'><div style='color:#CCC;font-weight:bold'>수정문:</div>
+                <div style='background-color:#333;padding:10px;border-radius:5px;color:#00E676'>{html.escape(str(result['corrected_text']))}</div></div>""")
+    parts.append("</div>")
+
+    if result.get('spelling_errors'):
+        parts.append("<div style='color:#CCC;font-weight:bold;margin-top:10px'>맞춤법 수정사항:</div>")
+        for correction in result['spelling_errors']:
+            if isinstance(correction, dict):
+                original = correction.get('original', '')
+                corrected = correction.get('corrected', '')
+            elif isinstance(correction, (list, tuple)) and len(correction) == 2:
+                original, corrected = correction
+            else:
+                continue
+            parts.append(f"""<div style='background-color:#333;padding:10px;border-radius:5px;margin:5px 0'>
+                <span style='color:#FF5252'>🔍 {html.escape(str(original))}</span> → 
+                <span style='color:#00E676'>✓ {html.escape(str(corrected))}</span>
+            </div>""")
+
+    parts.append("</div>")
+    return ''.join(parts)
+
+def cached_result_page(result_set_id, page_key, build):
+    """페이지 내용(build 결과) - 결과 집합 id별로 세션에 보관해 재실행(탭 전환, 페이지 이동) 때 다시 만들지 않음"""
+    cache = st.session_state.get('result_pages')
+    if cache is None or cache['id'] != result_set_id:
+        cache = st.session_state['result_pages'] = {'id': result_set_id, 'pages': {}}
+    pages = cache['pages']
+    if page_key not in pages:
+        if len(pages) >= RESULTS_PAGE_CACHE_SIZE:
+            pages.pop(next(iter(pages)))
+        pages[page_key] = build()
+    return pages[page_key]
+
+def render_result_page(result_set_id, page_key, build):
+    """보관된 페이지 HTML - 보관하는 HTML에는 썸네일이 없으므로, 나중에 받은 썸네일도 표시할 때마다 채워진다"""
+    return fill_thumbnails(cached_result_page(result_set_id, page_key, build))
+
+def select_page(items, key):
+    """페이지 선택 위젯과 현재 페이지 (시작 위치, 항목 목록)"""
+    page_count = max(1, -(-len(items) // RESULTS_PAGE_SIZE))
+    page = 1
+    if page_count > 1:
+        page = st.number_input(f"페이지 (전체 {page_count}쪽, {len(items):,}건)", min_value=1,
+                               max_value=page_count, value=1, step=1, key=key)
+    start = (page - 1) * RESULTS_PAGE_SIZE
+    return page, items[start:start + RESULTS_PAGE_SIZE]
+
 def display_file_analysis_results(analysis_results):
     try:
         if not analysis_results or not analysis_results['results']:
@@ -1210,134 +1204,122 @@ def display_file_analysis_results(analysis_results):
             return
 
         results = analysis_results['results']
+        result_set_id = analysis_results.get('id', '')
         pattern_results = [r for r in results if not r.get('is_spell_check', False)]
         spell_check_results = [r for r in results if r.get('is_spell_check', False)]
         
         # 요약 정보
         st.markdown("""<div style='background-color:#2D2D2D;padding:15px;border-radius:10px;margin-bottom:20px'><h3 style='color:#E0E0E0;margin:0'>📊 분석 결과 요약</h3></div>""", unsafe_allow_html=True)
         
+        # 상위 결과만 표시하더라도 요약 수치는 전체 집계 기준
+        aggregator = analysis_results.get('aggregator')
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("검출된 패턴", f"{len(pattern_results)}개")
+            total_patterns = aggregator.total_patterns if aggregator else len(pattern_results)
+            st.metric("검출된 패턴", f"{total_patterns}개")
         with col2:
-            unique_files = len(set(r.get('source_file', '') for r in results))
+            unique_files = len(aggregator.file_stats) if aggregator else len(set(r.get('source_file', '') for r in results))
             st.metric("분석된 파일", f"{unique_files}개")
         with col3:
-            high_risk = sum(1 for r in pattern_results if r.get('danger_level', 0) >= 70)
+            high_risk = aggregator.high_risk if aggregator else sum(1 for r in pattern_results if r.get('danger_level', 0) >= 70)
             st.metric("고위험 패턴", f"{high_risk}개")
         with col4:
-            st.metric("맞춤법 오류", f"{len(spell_check_results)}개")
+            total_spelling = aggregator.total_spelling if aggregator else len(spell_check_results)
+            st.metric("맞춤법 오류", f"{total_spelling}개")
+
+        if aggregator:
+            if aggregator.total_results > len(results):
+                st.caption(f"위험도/정확도 상위 {len(results):,}건만 표시합니다 (전체 {aggregator.total_results:,}건).")
+            display_aggregate_stats(aggregator)
 
         tab1, tab2 = st.tabs(["⚠️ 위험 패턴", "📝 맞춤법 오류"])
         
         with tab1:
             if pattern_results:
-                # 파일별 그룹화
+                group_similar = st.checkbox("유사한 결과 묶기", key=f"result_group_{result_set_id}",
+                                            help="같은 파일에서 패턴 또는 문장이 비슷한 결과를 위험도가 가장 높은 결과 하나로 묶어 표시")
+                if group_similar:
+                    pattern_results = grouped_pattern_results(result_set_id, pattern_results)
+
+                # 파일/위험도별 요약 표를 먼저 표시
                 file_groups = {}
                 for result in pattern_results:
                     source_file = result.get('source_file', '알 수 없는 파일')
                     if source_file not in file_groups:
                         file_groups[source_file] = {'high': [], 'medium': [], 'low': []}
-                    
-                    if result.get('danger_level', 0) >= 70:
-                        file_groups[source_file]['high'].append(result)
-                    elif result.get('danger_level', 0) >= 30:
-                        file_groups[source_file]['medium'].append(result)
-                    else:
-                        file_groups[source_file]['low'].append(result)
-
-                for source_file, severity_groups in file_groups.items():
-                    st.markdown(f"""<div style='color:#E0E0E0;border-bottom:2px solid #555;padding:10px 0;margin:20px 0 10px 0;font-size:1.2em'>📄 {html.escape(source_file)}</div>""", unsafe_allow_html=True)
+                    file_groups[source_file][result_severity(result)].append(result)
 
-                    severity_info = [
-                        ('high', '🚨 고위험', "#FF5252"),
-                        ('medium', '⚠️ 주의', "#FFD700"),
-                        ('low', '✅ 안전', "#00E676")
-                    ]
+                st.dataframe(
+                    pd.DataFrame(
+                        [(source_file, len(groups['high']), len(groups['medium']), len(groups['low']))
+                         for source_file, groups in file_groups.items()],
+                        columns=['파일', '고위험', '주의', '안전']
+                    ),
+                    use_container_width=True,
+                    hide_index=True
+                )
 
-                    for severity, title, color in severity_info:
-                        if severity_groups[severity]:
-                            st.markdown(f"""<div style='color:{color};border-left:4px solid {color};padding:5px 10px;margin:15px 0;font-weight:bold'>{title} ({len(severity_groups[severity])}개)</div>""", unsafe_allow_html=True)
-                            
-                            for result in severity_groups[severity]:
-                                with st.container():
-                                    match_score = int(result.get('match_score', 0) * 100)
-                                    st.markdown(f"""<div style='background-color:#2D2D2D;padding:15px;border-radius:8px;margin:10px 0'>
-                                        <div style='margin-bottom:10px'>
-                                            <span style='color:{color};font-weight:bold'>위험도: {result.get('danger_level', 0)}</span>
-                                            <span style='color:#888;margin-left:15px'>정확도: {match_score}%</span>
-                                        </div>""", unsafe_allow_html=True)
-
-                                    # 검출된 텍스트 표시
-                                    if 'text' in result:
-                                        st.markdown("<div style='color:#CCC;margin:5px 0'>검출된 텍스트:</div>", unsafe_allow_html=True)
-                                        # matched_keywords를 이용한 하이라이트 처리
-                                        text = result['text']
-                                        highlighted_text = text
-                                        if 'matched_keywords' in result:
-                                            for keyword in sorted(result['matched_keywords'], key=len, reverse=True):
-                                                highlighted_text = re.sub(
-                                                    f"({re.escape(keyword)})",
-                                                    r"<span style='background-color:rgba(255,178,15,0.3);color:#FFB20F;padding:0 3px;border-radius:3px'>\1</span>",
-                                                    highlighted_text,
-                                                    flags=re.IGNORECASE
-                                                )
-                                        st.markdown(f"""<div style='background-color:#333;padding:10px;border-radius:5px;white-space:pre-wrap;font-family:monospace'>{highlighted_text}</div>""", unsafe_allow_html=True)
-
-                                    # 패턴 정보
-                                    if 'pattern' in result:
-                                        st.markdown(f"""<div style='color:#CCC;margin:10px 0 5px 0'>매칭된 패턴:</div><div style='background-color:#333;padding:10px;border-radius:5px;color:{color}'>{html.escape(result['pattern'])}</div>""", unsafe_allow_html=True)
-
-                                    # 분석 정보
-                                    if result.get('analysis'):
-                                        st.markdown(f"""<div style='color:#CCC;margin:10px 0 5px 0'>분석:</div><div style='background-color:#333;padding:10px;border-radius:5px'>{html.escape(result['analysis'])}</div>""", unsafe_allow_html=True)
-
-                                    # 참고 자료
-                                    if result.get('url'):
-                                        if 'thumbnail' in result:
-                                            try:
-                                                st.image(result['thumbnail'], width=200)
-                                            except:
-                                                pass
-                                        st.markdown(f"""<div style='margin-top:10px'><a href='{html.escape(result["url"])}' target='_blank' style='color:{color};text-decoration:none'>🔗 참고 자료</a></div>""", unsafe_allow_html=True)
-
-                                    st.markdown("</div>", unsafe_allow_html=True)
+                col1, col2 = st.columns(2)
+                with col1:
+                    file_filter = st.selectbox("파일", ['전체'] + list(file_groups), key=f"result_file_{result_set_id}")
+                with col2:
+                    severity_titles = {title: severity for severity, title, _ in SEVERITY_INFO}
+                    severity_filter = st.selectbox("위험도", ['전체'] + list(severity_titles), key=f"result_severity_{result_set_id}")
+
+                # 파일 → 위험도 순서로 펼친 목록에서 현재 페이지만 렌더링
+                selected = [
+                    (severity, result)
+                    for source_file, groups in file_groups.items() if file_filter in ('전체', source_file)
+                    for severity, _, _ in SEVERITY_INFO if severity_filter == '전체' or severity_titles[severity_filter] == severity
+                    for result in groups[severity]
+                ]
+                if selected:
+                    page_key = f"{group_similar}_{file_filter}_{severity_filter}"
+                    page, page_items = select_page(selected, f"result_page_{result_set_id}_{page_key}")
+                    colors = {severity: color for severity, _, color in SEVERITY_INFO}
+                    titles = {severity: title for severity, title, _ in SEVERITY_INFO}
+
+                    def build():
+                        # 항목별 요약 HTML (파일/위험도 제목은 그 구간의 첫 항목 앞에 붙임)
+                        segments = []
+                        current = None
+                        for severity, result in page_items:
+                            parts = []
+                            source_file = result.get('source_file', '알 수 없는 파일')
+                            if (source_file, severity) != current:
+                                if current is None or current[0] != source_file:
+                                    parts.append(f"""<div style='color:#E0E0E0;border-bottom:2px solid #555;padding:10px 0;margin:20px 0 10px 0;font-size:1.2em'>📄 {html.escape(source_file)}</div>""")
+                                color = colors[severity]
+                                parts.append(f"""<div style='color:{color};border-left:4px solid {color};padding:5px 10px;margin:15px 0;font-weight:bold'>{titles[severity]} ({len(file_groups[source_file][severity])}개)</div>""")
+                                current = (source_file, severity)
+                            parts.append(render_pattern_summary(result, colors[severity]))
+                            segments.append(''.join(parts))
+                        return segments
+
+                    # 상세 내용은 항목별 토글을 켠 것만 만들어 표시 (페이지 비용이 상세 내용 크기와 무관)
+                    segments = cached_result_page(result_set_id, ('patterns', group_similar, file_filter, severity_filter, page), build)
+                    start = (page - 1) * RESULTS_PAGE_SIZE
+                    for offset, (segment, (severity, result)) in enumerate(zip(segments, page_items)):
+                        st.markdown(segment, unsafe_allow_html=True)
+                        if st.checkbox("상세 보기", key=f"result_detail_{result_set_id}_{page_key}_{start + offset}"):
+                            st.markdown(fill_thumbnails(render_pattern_detail(result, colors[severity])),
+                                        unsafe_allow_html=True)
+                else:
+                    st.info("선택한 조건의 결과가 없습니다.")
             else:
                 st.info("위험 패턴이 발견되지 않았습니다.")
 
         with tab2:
             if spell_check_results:
-                for result in spell_check_results:
-                    source_file = result.get('source_file', '알 수 없는 파일')
-                    st.markdown(f"""<div style='background-color:#2D2D2D;padding:15px;border-radius:10px;margin:10px 0'><h4 style='color:#E0E0E0;margin:0'>📄 {html.escape(source_file)}</h4></div>""", unsafe_allow_html=True)
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown("<div style='color:#CCC;font-weight:bold'>원문:</div>", unsafe_allow_html=True)
-                        st.markdown(f"""<div style='background-color:#333;padding:10px;border-radius:5px;color:#FFF'>{html.escape(str(result['text']))}</div>""", unsafe_allow_html=True)
-                    
-                    with col2:
-                        if result.get('corrected_text'):
-                            st.markdown("<div style='color:#CCC;font-weight:bold'>수정문:</div>", unsafe_allow_html=True)
-                            st.markdown(f"""<div style='background-color:#333;padding:10px;border-radius:5px;color:#00E676'>{html.escape(str(result['corrected_text']))}</div>""", unsafe_allow_html=True)
-                    
-                    if result.get('spelling_errors'):
-                        st.markdown("<div style='color:#CCC;font-weight:bold;margin-top:10px'>맞춤법 수정사항:</div>", unsafe_allow_html=True)
-                        for correction in result['spelling_errors']:
-                            if isinstance(correction, dict):
-                                original = correction.get('original', '')
-                                corrected = correction.get('corrected', '')
-                            elif isinstance(correction, (list, tuple)) and len(correction) == 2:
-                                original, corrected = correction
-                            else:
-                                continue
-                                
-                            st.markdown(f"""<div style='background-color:#333;padding:10px;border-radius:5px;margin:5px 0'>
-                                <span style='color:#FF5252'>🔍 {html.escape(str(original))}</span> → 
-                                <span style='color:#00E676'>✓ {html.escape(str(corrected))}</span>
-                            </div>""", unsafe_allow_html=True)
-                    
-                    st.markdown("<hr style='border:none;height:1px;background-color:#555;margin:20px 0'>", unsafe_allow_html=True)
+                page, page_items = select_page(spell_check_results, f"spelling_page_{result_set_id}")
+                st.markdown(
+                    render_result_page(
+                        result_set_id, ('spelling', page),
+                        lambda: "<hr style='border:none;height:1px;background-color:#555;margin:20px 0'>".join(
+                            render_spelling_card(result) for result in page_items)
+                    ),
+                    unsafe_allow_html=True
+                )
             else:
                 st.info("맞춤법 오류가 발견되지 않았습니다.")
 
@@ -1346,27 +1328,6 @@ def display_file_analysis_results(analysis_results):
         import traceback
         st.error(f"상세 오류: {traceback.format_exc()}")
 
-def get_thumbnail_url(url):
-    """URL에서 썸네일 URL 추출"""
-    if not url:
-        return None
-    
-    # 유튜브 URL 처리
-    video_id = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", url)
-    if video_id and 'youtube.com' in url:
-        return f"https://img.youtube.com/vi/{video_id.group(1)}/hqdefault.jpg"
-    
-    # 기타 URL 처리
-    try:
-        response = requests.get(url)
-        if 'image/' in response.headers.get('content-type', ''):
-            return url
-    except:
-        pass
-    
-    return None
-
-
 # 추가 CSS 스타일
 st.markdown("""
 <style>
@@ -1399,6 +1360,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def display_match_stats(match_stats):
+    """매칭 단계별 탈락 통계 표시"""
+    labels = {
+        'cells': '검사한 셀',
+        'duplicate_cells': '중복 텍스트로 검사 생략한 셀',
+        'cached_texts': '결과 캐시에서 가져온 텍스트',
+        'reused_cells': '변경 없는 시트/파일에서 재사용한 셀',
+        'texts': '검사한 텍스트',
+        'candidates': '후보 패턴 (텍스트 x 패턴)',
+        'skipped_by_index': '역색인 단계 제외',
+        'pruned_by_features': '토큰 항목 단계 탈락',
+        'pruned_by_real_quick_ratio': 'real_quick_ratio 단계 탈락',
+        'pruned_by_quick_ratio': 'quick_ratio 단계 탈락',
+        'rejected_after_ratio': 'ratio 계산 후 탈락',
+        'matched': '매칭',
+        'ratio_calls': 'ratio 계산 횟수'
+    }
+    with st.expander("📈 매칭 단계별 통계"):
+        st.dataframe(
+            pd.DataFrame(
+                [(labels[key], match_stats.get(key, 0)) for key in MATCH_STAT_KEYS],
+                columns=['단계', '건수']
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+
 def display_analysis_results(patterns, total_score):
     """분석 결과 표시 - 개선된 버전"""
     try:
@@ -1445,7 +1433,8 @@ def display_analysis_results(patterns, total_score):
                 highlighted_text = highlight_pattern_in_text(
                     pattern['original_text'],
                     pattern['pattern'],
-                    pattern.get('matched_keywords', [])
+                    pattern.get('matched_keywords', []),
+                    pattern.get('match_spans')
                 )
                 st.markdown(f"""
                     <div style='white-space: pre-wrap; font-family: "Noto Sans KR", sans-serif; 
@@ -1469,11 +1458,9 @@ def display_analysis_results(patterns, total_score):
             # 참고 자료
             if pattern.get("url"):
                 with st.container():
-                    if 'thumbnail' in pattern:
-                        try:
-                            st.image(pattern['thumbnail'], width=200)
-                        except:
-                            pass
+                    thumbnail = get_thumbnail_prefetcher().get(pattern["url"])
+                    if thumbnail:
+                        st.image(thumbnail, width=200)
                     st.markdown(f"""
                         <p><strong>🔗 <a href='{html.escape(pattern["url"])}' 
                            target='_blank' style='color:{border_color};'>참고 자료</a></strong></p>
@@ -1508,6 +1495,11 @@ def main():
         if not all(isinstance(item, dict) and all(field in item for field in required_fields) for item in data):
             st.error("패턴 데이터에 필수 필드가 누락되었습니다.")
             return
+
+        # 컴파일된 패턴 인덱스 (추가된 패턴만 반영해 갱신)
+        index = get_live_index().get(data)
+        # 참고 자료 썸네일은 백그라운드에서 받아 두고 화면에는 저장된 파일만 표시
+        get_thumbnail_prefetcher().prefetch_index(index)
             
         # 탭 생성
         tab1, tab2, tab3 = st.tabs(["🔍 문장 분석", "✏️ 패턴 등록", "📝 맞춤법 규칙 관리"])
@@ -1536,7 +1528,7 @@ def main():
                     with st.spinner('🔄 문장을 분석하고 있습니다...'):
                         try:
                             # 맞춤법 검사와 패턴 분석 통합 수행
-                            analysis_result = analyze_text_with_spelling(input_text, data)
+                            analysis_result = analyze_text_with_spelling(input_text, index)
                             
                             # 맞춤법 분석 결과 표시
                             display_spelling_analysis(analysis_result['spelling'])
@@ -1570,10 +1562,17 @@ def main():
                     help="여러 파일을 한 번에 선택하거나, ZIP 파일로 압축하여 업로드하세요."
                 )
                 
+                use_processes = st.checkbox(
+                    "⚡ 멀티코어 분석 (프로세스 풀)",
+                    value=True,
+                    help="CPU 코어 수만큼 워커 프로세스로 나누어 분석합니다. 워커는 서버에서 재사용됩니다."
+                )
+
                 if uploaded_files:
                     if st.button("📂 파일 분석", use_container_width=True):
-                        all_results = []
-                        total_patterns = 0
+                        # 파일별 상위 결과/집계를 합쳐 전체 상위 결과 유지
+                        combined = ResultAggregator()
+                        match_stats = {}
                         
                         progress_text = st.empty()
                         progress_bar = st.progress(0)
@@ -1584,27 +1583,35 @@ def main():
                             progress_text.text(f"파일 분석 중... ({idx + 1}/{len(uploaded_files)}): {file.name}")
                             
                             with st.spinner(f'🔄 {file.name} 분석 중...'):
-                                analysis_result = analyze_file_contents(file, data)
+                                analysis_result = analyze_file_contents(file, index, use_processes)
+                                if analysis_result:
+                                    merge_stats(match_stats, analysis_result.get('match_stats'))
                                 if analysis_result and analysis_result['total_patterns'] > 0:
-                                    all_results.extend(analysis_result['results'])
-                                    total_patterns += analysis_result['total_patterns']
+                                    combined.merge(analysis_result['aggregator'])
                         
                         progress_bar.empty()
                         progress_text.empty()
                         
-                        if total_patterns > 0:
-                            st.success(f"🎯 분석이 완료되었습니다! 총 {total_patterns}개의 패턴이 발견되었습니다.")
-                            
-                            combined_results = {
-                                'total_patterns': total_patterns,
-                                'results': sorted(all_results, 
-                                               key=lambda x: (x['danger_level'], x['match_score']), 
-                                               reverse=True)[:1000]
-                            }
-                            display_file_analysis_results(combined_results)
+                        # 페이지 이동/필터 변경으로 다시 실행될 때도 결과를 표시하도록 세션에 보관
+                        st.session_state['file_analysis'] = {
+                            'total_patterns': combined.total_patterns,
+                            'results': combined.results(),
+                            'aggregator': combined,
+                            'id': uuid.uuid4().hex,
+                            'match_stats': match_stats
+                        }
+
+                    file_analysis = st.session_state.get('file_analysis')
+                    if file_analysis is not None:
+                        if file_analysis['total_patterns'] > 0:
+                            st.success(f"🎯 분석이 완료되었습니다! 총 {file_analysis['total_patterns']}개의 패턴이 발견되었습니다.")
+                            display_file_analysis_results(file_analysis)
                         else:
                             st.info("👀 파일에서 위험 패턴이 발견되지 않았습니다.")
 
+                        if file_analysis['match_stats']:
+                            display_match_stats(file_analysis['match_stats'])
+
         with tab2:
             st.markdown("""
             <div style='background-color: #2D2D2D; padding: 1rem; border-radius: 10px; margin-bottom: 1rem;'>
@@ -1626,18 +1633,20 @@ def main():
             if submit_button:
                 if all([pattern_text, analysis_text]):
                     try:
-                        worksheet = get_sheet_instance()
+                        worksheet = get_pattern_writer()
                         if worksheet:
-                            worksheet.append_row([
+                            row = [
                                 pattern_text,
                                 analysis_text,
                                 url,
                                 danger_level,
                                 datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            ])
+                            ]
+                            worksheet.append_row(row)
+                            # 전체 캐시를 비우지 않고 등록한 행만 패턴 데이터/인덱스에 반영
+                            get_pattern_store().append_local([row])
                             st.success("✅ 패턴이 등록되었습니다!")
                             st.balloons()
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error("시트에 연결할 수 없습니다.")
@@ -1721,14 +1730,13 @@ def main():
             if submit_button:
                 if all([wrong_text, correct_text]):
                     try:
-                        checker_sheet = get_or_create_checker_worksheet()
-                        if checker_sheet:
-                            checker_sheet.append_row([wrong_text, correct_text])
+                        gateway = get_or_create_checker_worksheet()
+                        if gateway:
+                            gateway.append_row(CHECKER_WORKSHEET, [wrong_text, correct_text])
+                            # 규칙을 다시 불러오지 않고 등록한 규칙만 반영
+                            SheetBasedSpellChecker().add_rule(wrong_text, correct_text)
                             st.success("✅ 맞춤법 규칙이 등록되었습니다!")
                             st.balloons()
-                            # 캐시 초기화
-                            SheetBasedSpellChecker.clear_cache()
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error("시트에 연결할 수 없습니다.")
@@ -1747,6 +1755,8 @@ def main():
             try:
                 checker = SheetBasedSpellChecker()
                 rules = checker.get_rules()  # _rules 대신 get_rules() 메서드 사용
+                if checker.last_error:
+                    st.warning(f"⚠️ 규칙을 새로 불러오지 못해 마지막으로 불러온 규칙을 사용합니다: {checker.last_error}")
                 
                 if rules:
                     # 규칙 검색 기능 추가
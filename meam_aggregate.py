@@ -0,0 +1,139 @@
+import heapq
+
+
+# 보고서에 남기는 상위 결과 수
+TOP_K = 1000
+
+# 위험도(0~100)와 매칭 점수(0~1) 히스토그램 구간 수
+HISTOGRAM_BINS = 10
+
+
+def severity(danger_level):
+    """위험도 구간 (결과 화면의 고위험/주의/안전 기준과 동일)"""
+    if danger_level >= 70:
+        return 'high'
+    if danger_level >= 30:
+        return 'medium'
+    return 'low'
+
+
+def histogram_bin(value, upper):
+    """0~upper 값을 HISTOGRAM_BINS 구간 번호로 변환 (upper는 마지막 구간에 포함)"""
+    return min(max(int(value / upper * HISTOGRAM_BINS), 0), HISTOGRAM_BINS - 1)
+
+
+class ResultAggregator:
+    """(위험도, 점수) 상위 K개 결과만 보관하는 힙과 패턴/파일별 집계
+
+    결과 수와 관계없이 메모리는 K개 결과 + 패턴/파일 수에 비례하고, 합계는 모든 결과 기준으로 정확하다.
+    같은 (위험도, 점수)에서는 먼저 추가된 결과가 남는다 (안정 정렬 후 자르는 것과 같은 결과).
+    """
+
+    def __init__(self, limit=TOP_K):
+        self.limit = limit
+        self.heap = []
+        self.sequence = 0
+        self.total_patterns = 0
+        self.total_spelling = 0
+        self.pattern_stats = {}
+        self.file_stats = {}
+        self.danger_histogram = [0] * HISTOGRAM_BINS
+        self.score_histogram = [0] * HISTOGRAM_BINS
+
+    def add(self, result):
+        """결과 하나 집계 후 상위 K개 후보로 추가"""
+        occurrences = result.get('occurrences', 1)
+        source_file = result.get('source_file', '알 수 없는 파일')
+        file_stat = self.file_stats.get(source_file)
+        if file_stat is None:
+            file_stat = self.file_stats[source_file] = {
+                'patterns': 0, 'high': 0, 'medium': 0, 'low': 0, 'occurrences': 0, 'spelling': 0
+            }
+
+        if result.get('is_spell_check'):
+            self.total_spelling += 1
+            file_stat['spelling'] += 1
+        else:
+            danger_level = result.get('danger_level', 0)
+            match_score = result.get('match_score', 0)
+            self.total_patterns += 1
+            file_stat['patterns'] += 1
+            file_stat[severity(danger_level)] += 1
+            file_stat['occurrences'] += occurrences
+
+            pattern = result.get('pattern', '')
+            pattern_stat = self.pattern_stats.get(pattern)
+            if pattern_stat is None:
+                pattern_stat = self.pattern_stats[pattern] = {
+                    'danger_level': danger_level, 'hits': 0, 'occurrences': 0, 'max_score': 0.0
+                }
+            pattern_stat['hits'] += 1
+            pattern_stat['occurrences'] += occurrences
+            pattern_stat['max_score'] = max(pattern_stat['max_score'], match_score)
+
+            self.danger_histogram[histogram_bin(danger_level, 100)] += 1
+            self.score_histogram[histogram_bin(match_score, 1.0)] += 1
+
+        self.push(result)
+
+    def push(self, result):
+        """상위 K개 후보로만 추가 (집계 제외)"""
+        entry = (result.get('danger_level', 0), result.get('match_score', 0), -self.sequence, result)
+        self.sequence += 1
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, entry)
+        elif entry[:3] > self.heap[0][:3]:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other):
+        """다른 집계(다른 파일 등) 합치기 - other의 결과는 현재 결과 뒤에 추가된 것으로 취급"""
+        self.total_patterns += other.total_patterns
+        self.total_spelling += other.total_spelling
+        for name, stat in other.file_stats.items():
+            file_stat = self.file_stats.setdefault(name, dict.fromkeys(stat, 0))
+            for key, value in stat.items():
+                file_stat[key] += value
+        for pattern, stat in other.pattern_stats.items():
+            pattern_stat = self.pattern_stats.get(pattern)
+            if pattern_stat is None:
+                self.pattern_stats[pattern] = dict(stat)
+            else:
+                pattern_stat['hits'] += stat['hits']
+                pattern_stat['occurrences'] += stat['occurrences']
+                pattern_stat['max_score'] = max(pattern_stat['max_score'], stat['max_score'])
+        for i in range(HISTOGRAM_BINS):
+            self.danger_histogram[i] += other.danger_histogram[i]
+            self.score_histogram[i] += other.score_histogram[i]
+        for result in other.results():
+            self.push(result)
+
+    def results(self):
+        """상위 결과 목록 (위험도, 점수 내림차순)"""
+        return [entry[3] for entry in sorted(self.heap, key=lambda entry: entry[:3], reverse=True)]
+
+    @property
+    def total_results(self):
+        """집계한 전체 결과 수 (패턴 + 맞춤법)"""
+        return self.total_patterns + self.total_spelling
+
+    @property
+    def high_risk(self):
+        """고위험(위험도 70 이상) 패턴 결과 수"""
+        return sum(stat['high'] for stat in self.file_stats.values())
+
+    def top_patterns(self, limit=50):
+        """출현 횟수가 많은 패턴 집계 [(패턴, 집계)]"""
+        return sorted(self.pattern_stats.items(),
+                      key=lambda item: (-item[1]['occurrences'], -item[1]['danger_level']))[:limit]
+
+    def summary(self):
+        """JSON으로 내보낼 수 있는 집계 요약"""
+        return {
+            'total_patterns': self.total_patterns,
+            'total_spelling': self.total_spelling,
+            'high_risk': self.high_risk,
+            'files': self.file_stats,
+            'patterns': dict(self.top_patterns(limit=len(self.pattern_stats))),
+            'danger_histogram': self.danger_histogram,
+            'score_histogram': self.score_histogram
+        }
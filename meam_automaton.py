@@ -0,0 +1,104 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """여러 문자열을 한 번의 선형 탐색으로 찾는 Aho-Corasick 오토마톤"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.output_link = [0]
+        self.built = True
+
+    def __len__(self):
+        return len(self.goto)
+
+    def add(self, key, value):
+        """키 문자열과 값을 등록 (검색 전 build 필요)"""
+        if not key:
+            return
+        node = 0
+        for ch in key:
+            next_node = self.goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.output_link.append(0)
+                self.goto[node][ch] = next_node
+            node = next_node
+        self.outputs[node].append((len(key), value))
+        self.built = False
+
+    def copy(self):
+        """독립적으로 키를 추가할 수 있는 사본 (검색 중인 원본은 그대로 둠)"""
+        other = AhoCorasick.__new__(AhoCorasick)
+        other.goto = [dict(edges) for edges in self.goto]
+        other.fail = list(self.fail)
+        other.outputs = [list(output) for output in self.outputs]
+        other.output_link = list(self.output_link)
+        other.built = self.built
+        return other
+
+    def build(self):
+        """실패 링크와 출력 링크 계산"""
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        output_link = self.output_link
+
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            output_link[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target
+                # 출력이 있는 가장 가까운 접미사 노드로 연결
+                suffix = fail[child]
+                output_link[child] = suffix if outputs[suffix] else output_link[suffix]
+                queue.append(child)
+
+        self.built = True
+
+    def iter(self, text):
+        """텍스트에서 (시작 위치, 끝 위치, 값) 형태로 모든 일치 항목 반환"""
+        if not self.built:
+            self.build()
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        output_link = self.output_link
+
+        node = 0
+        for pos, ch in enumerate(text):
+            next_node = goto[node].get(ch)
+            while next_node is None and node:
+                node = fail[node]
+                next_node = goto[node].get(ch)
+            if next_node is None:
+                node = 0
+                continue
+            node = next_node
+            state = node if outputs[node] else output_link[node]
+            while state:
+                end = pos + 1
+                for length, value in outputs[state]:
+                    yield end - length, end, value
+                state = output_link[state]
+
+    def find_all(self, text):
+        """값별 일치 위치 목록 반환 ({값: [(시작, 끝), ...]})"""
+        hits = {}
+        for start, end, value in self.iter(text):
+            hits.setdefault(value, []).append((start, end))
+        return hits
@@ -0,0 +1,325 @@
+import difflib
+import numpy as np
+from datetime import datetime
+from meam_index import (SCORE_NORMALIZER, match_spans, prepare_input, reachable_score, add_stat)
+
+
+# 배치 매칭 결과 배열 형식 (텍스트 번호, 패턴 번호, 점수, 매칭 플래그, 세부 유사도)
+MATCH_DTYPE = np.dtype([
+    ('text', np.int32),
+    ('pattern', np.int32),
+    ('score', np.float64),
+    ('flags', np.uint8),
+    ('word_similarity', np.float64),
+    ('text_similarity', np.float64)
+])
+
+# 매칭 플래그 비트
+EXACT = 1
+CONTINUOUS = 2
+BIGRAM = 4
+TRIGRAM = 8
+PARTIAL = 16
+
+# 한 번에 벡터로 계산하는 최대 후보 쌍 수 (임계값이 낮아 전체 쌍이 후보일 때도 메모리를 이 크기로 제한)
+CANDIDATE_CHUNK_PAIRS = 1 << 18
+
+
+def build_postings_table(postings):
+    """포스팅 리스트 딕셔너리를 CSR 형식(용어 번호, indptr, indices)으로 변환"""
+    term_ids = {}
+    lengths = np.zeros(len(postings), dtype=np.int64)
+    for term_id, (term, posting) in enumerate(postings.items()):
+        term_ids[term] = term_id
+        lengths[term_id] = len(posting)
+    indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter(
+        (pattern_id for posting in postings.values() for pattern_id in posting),
+        dtype=np.int64, count=int(indptr[-1])
+    )
+    return term_ids, indptr, indices
+
+
+def get_batch_tables(index):
+    """인덱스 버전별 배치 매칭용 CSR 테이블 (인덱스에 캐시)"""
+    tables = index.batch_tables
+    if tables is not None and tables['version'] == index.version:
+        return tables
+    tables = {
+        'version': index.version,
+        'words': build_postings_table(index.word_postings),
+        'bigrams': build_postings_table(index.bigram_postings),
+        'trigrams': build_postings_table(index.trigram_postings),
+        'word_counts': np.array([len(p['words']) for p in index.patterns], dtype=np.float64)
+    }
+    index.batch_tables = tables
+    return tables
+
+
+def expand_postings(rows, term_ids, table):
+    """(텍스트 행, 용어 번호) 목록을 (텍스트 행, 패턴 번호) 쌍으로 전개 - 희소 행렬 곱 T·Pᵀ"""
+    if not len(term_ids):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    _, indptr, indices = table
+    starts = indptr[term_ids]
+    lengths = indptr[term_ids + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # 각 포스팅 구간의 시작 위치를 반복시킨 뒤 구간 내 오프셋을 더해 한 번에 수집
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+    return np.repeat(rows, lengths), indices[offsets]
+
+
+def pair_keys(rows, pattern_ids, pattern_count):
+    """(텍스트 행, 패턴 번호) 쌍을 정수 키로 변환"""
+    return rows * pattern_count + pattern_ids
+
+
+def score_batch(texts, index, threshold=0.5, fuzzy_threshold=None, stats=None):
+    """텍스트 배치 전체와 패턴 전체의 매칭을 한 번에 계산
+
+    단어/bigram/trigram 포함 행렬을 포스팅 CSR과 곱해 텍스트×패턴 쌍의 토큰 항목을
+    벡터 연산으로 구하고, 상한 점수로 걸러진 쌍만 SequenceMatcher로 계산한다.
+    반환값은 MATCH_DTYPE 배열 (텍스트 번호, 매칭 순서대로 정렬).
+    """
+    pattern_count = len(index.patterns)
+    if not pattern_count or not len(texts):
+        return np.empty(0, dtype=MATCH_DTYPE)
+
+    tables = get_batch_tables(index)
+    word_terms = tables['words'][0]
+    bigram_terms = tables['bigrams'][0]
+    trigram_terms = tables['trigrams'][0]
+
+    # 1단계: 텍스트별 전처리와 오토마톤 탐색 (텍스트 길이에 비례)
+    prepared_texts = [None] * len(texts)
+    word_rows, word_ids = [], []
+    partial_rows, partial_ids = [], []
+    bigram_rows, bigram_ids = [], []
+    trigram_rows, trigram_ids = [], []
+    exact_keys, continuous_keys, fuzzy_keys = [], [], []
+
+    for row, text in enumerate(texts):
+        if not isinstance(text, str):
+            text = '' if text is None else str(text)
+        text = text.strip()
+        if not text:
+            continue
+        prepared = prepare_input(text)
+        prepared_texts[row] = prepared
+        add_stat(stats, 'texts')
+
+        for word in prepared['words']:
+            term_id = word_terms.get(word)
+            if term_id is not None:
+                word_rows.append(row)
+                word_ids.append(term_id)
+        for bigram in prepared['bigrams']:
+            term_id = bigram_terms.get(bigram)
+            if term_id is not None:
+                bigram_rows.append(row)
+                bigram_ids.append(term_id)
+        for trigram in prepared['trigrams']:
+            term_id = trigram_terms.get(trigram)
+            if term_id is not None:
+                trigram_rows.append(row)
+                trigram_ids.append(term_id)
+
+        hits = index.find_hits(prepared)
+        prepared['hits'] = hits
+        base = row * pattern_count
+        exact_keys.extend(base + pattern_id for pattern_id in hits['exact'])
+        continuous_keys.extend(base + pattern_id for pattern_id in hits['continuous'])
+        for word in hits['partial']:
+            partial_rows.append(row)
+            partial_ids.append(word_terms[word])
+        if fuzzy_threshold is not None:
+            fuzzy_keys.extend(base + pattern_id
+                              for pattern_id in index.fuzzy_candidates(prepared, fuzzy_threshold))
+
+    def expand(rows, term_ids, table):
+        pair_rows, pair_patterns = expand_postings(
+            np.asarray(rows, dtype=np.int64), np.asarray(term_ids, dtype=np.int64), table)
+        return pair_keys(pair_rows, pair_patterns, pattern_count)
+
+    # 2단계: 희소 곱으로 텍스트×패턴 쌍별 공통 단어 수와 n-gram/부분 일치 계산
+    word_pair_keys, word_pair_counts = np.unique(
+        expand(word_rows, word_ids, tables['words']), return_counts=True)
+    bigram_keys = np.unique(expand(bigram_rows, bigram_ids, tables['bigrams']))
+    trigram_keys = np.unique(expand(trigram_rows, trigram_ids, tables['trigrams']))
+    partial_keys = np.unique(expand(partial_rows, partial_ids, tables['words']))
+    exact_keys = np.unique(np.asarray(exact_keys, dtype=np.int64))
+    continuous_keys = np.unique(np.asarray(continuous_keys, dtype=np.int64))
+
+    fuzzy_keys = np.unique(np.asarray(fuzzy_keys, dtype=np.int64))
+    patterns = index.patterns
+    rows_out, patterns_out, scores_out, flags_out, word_out, text_out = [], [], [], [], [], []
+
+    def score_candidates(candidate_keys):
+        """정렬된 후보 쌍 키 묶음의 점수 계산 - 통과한 쌍을 *_out 목록에 추가"""
+        # 3단계: 후보 쌍별 토큰 항목을 벡터로 계산하고 상한 점수로 1차 탈락
+        pattern_ids = candidate_keys % pattern_count
+        is_exact = np.isin(candidate_keys, exact_keys, assume_unique=True)
+        is_continuous = np.isin(candidate_keys, continuous_keys, assume_unique=True)
+        is_bigram = np.isin(candidate_keys, bigram_keys, assume_unique=True)
+        is_trigram = np.isin(candidate_keys, trigram_keys, assume_unique=True)
+        is_partial = np.isin(candidate_keys, partial_keys, assume_unique=True)
+
+        common_counts = np.zeros(len(candidate_keys), dtype=np.float64)
+        if len(word_pair_keys):
+            positions = np.searchsorted(word_pair_keys, candidate_keys)
+            positions[positions >= len(word_pair_keys)] = 0
+            found = word_pair_keys[positions] == candidate_keys
+            common_counts[found] = word_pair_counts[positions[found]]
+        word_similarity = common_counts / tables['word_counts'][pattern_ids]
+
+        forced = is_exact | is_continuous | (is_bigram & (word_similarity > 0.3))
+        base_points = (is_exact * 1.0 + is_continuous * 0.9 + is_bigram * 0.8 +
+                       is_trigram * 0.7 + word_similarity * 0.6 + is_partial * 0.4)
+        if fuzzy_threshold is not None:
+            is_fuzzy = np.isin(candidate_keys, fuzzy_keys, assume_unique=True)
+        else:
+            is_fuzzy = np.ones(len(candidate_keys), dtype=bool)
+        # 텍스트 유사도를 계산하지 않는 쌍은 상한도 0점 기준
+        bound = (base_points + is_fuzzy * 0.5) / SCORE_NORMALIZER + 1e-9
+        survivors = np.flatnonzero(forced | (bound >= threshold))
+        add_stat(stats, 'pruned_by_features', len(candidate_keys) - len(survivors))
+
+        # 4단계: 남은 쌍만 SequenceMatcher 단계별 상한 검사 후 최종 점수 계산
+        flags = (is_exact * EXACT | is_continuous * CONTINUOUS | is_bigram * BIGRAM |
+                 is_trigram * TRIGRAM | is_partial * PARTIAL).astype(np.uint8)
+        for i in survivors.tolist():
+            key = int(candidate_keys[i])
+            row, pattern_id = divmod(key, pattern_count)
+            prepared = prepared_texts[row]
+            pattern = patterns[pattern_id]
+            points = float(base_points[i])
+
+            if is_fuzzy[i]:
+                matcher = difflib.SequenceMatcher(None, prepared['cleaned'], pattern['cleaned'])
+                if not forced[i]:
+                    if reachable_score(points, matcher.real_quick_ratio()) < threshold:
+                        add_stat(stats, 'pruned_by_real_quick_ratio')
+                        continue
+                    if reachable_score(points, matcher.quick_ratio()) < threshold:
+                        add_stat(stats, 'pruned_by_quick_ratio')
+                        continue
+                text_similarity = matcher.ratio()
+                add_stat(stats, 'ratio_calls')
+            else:
+                text_similarity = 0.0
+
+            # 최종 점수는 find_matching_patterns와 같은 합산 순서로 계산
+            ws = float(word_similarity[i])
+            final_score = sum([
+                bool(is_exact[i]) * 1.0,
+                bool(is_continuous[i]) * 0.9,
+                bool(is_bigram[i]) * 0.8,
+                bool(is_trigram[i]) * 0.7,
+                ws * 0.6,
+                text_similarity * 0.5,
+                bool(is_partial[i]) * 0.4
+            ]) / SCORE_NORMALIZER
+            if not (final_score >= threshold or forced[i]):
+                add_stat(stats, 'rejected_after_ratio')
+                continue
+
+            add_stat(stats, 'matched')
+            rows_out.append(row)
+            patterns_out.append(pattern_id)
+            scores_out.append(final_score)
+            flags_out.append(flags[i])
+            word_out.append(ws)
+            text_out.append(text_similarity)
+
+    active_rows = np.array([row for row, p in enumerate(prepared_texts) if p is not None], dtype=np.int64)
+    if threshold <= 0.5 / SCORE_NORMALIZER:
+        # 텍스트 유사도만으로도 임계값을 넘을 수 있으므로 전체 쌍이 후보 - 행 묶음 단위로 만들어 계산
+        rows_per_chunk = max(1, CANDIDATE_CHUNK_PAIRS // pattern_count)
+        candidate_count = len(active_rows) * pattern_count
+        candidate_chunks = (
+            (active_rows[start:start + rows_per_chunk, None] * pattern_count +
+             np.arange(pattern_count, dtype=np.int64)[None, :]).ravel()
+            for start in range(0, len(active_rows), rows_per_chunk)
+        )
+    else:
+        indexed_keys = np.unique(np.concatenate([
+            word_pair_keys, partial_keys, exact_keys, continuous_keys
+        ]))
+        candidate_count = len(indexed_keys)
+        candidate_chunks = (indexed_keys[start:start + CANDIDATE_CHUNK_PAIRS]
+                            for start in range(0, candidate_count, CANDIDATE_CHUNK_PAIRS))
+    add_stat(stats, 'candidates', candidate_count)
+    add_stat(stats, 'skipped_by_index', len(active_rows) * pattern_count - candidate_count)
+    if not candidate_count:
+        return np.empty(0, dtype=MATCH_DTYPE)
+    for chunk in candidate_chunks:
+        score_candidates(chunk)
+
+    matches = np.empty(len(rows_out), dtype=MATCH_DTYPE)
+    matches['text'] = rows_out
+    matches['pattern'] = patterns_out
+    matches['score'] = scores_out
+    matches['flags'] = flags_out
+    matches['word_similarity'] = word_out
+    matches['text_similarity'] = text_out
+
+    # 텍스트별로 find_matching_patterns와 같은 정렬 (패턴 번호 순 안정 정렬)
+    danger_levels = np.array([patterns[p]['danger_level'] for p in patterns_out], dtype=np.float64)
+    order = np.lexsort((
+        matches['pattern'],
+        -danger_levels,
+        -matches['score'],
+        -((matches['flags'] & CONTINUOUS) > 0).astype(np.int8),
+        -((matches['flags'] & EXACT) > 0).astype(np.int8),
+        matches['text']
+    ))
+    return matches[order]
+
+
+def expand_matches(texts, index, matches):
+    """배치 매칭 결과(MATCH_DTYPE 배열 또는 같은 순서의 튜플)를 결과 딕셔너리로 변환"""
+    results = []
+    prepared_cache = {}
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for row, pattern_id, score, flags, word_similarity, text_similarity in matches:
+        row = int(row)
+        flags = int(flags)
+        pattern = index.patterns[int(pattern_id)]
+        prepared = prepared_cache.get(row)
+        if prepared is None:
+            prepared = prepared_cache[row] = prepare_input(str(texts[row]).strip())
+            # 배치 매칭은 위치를 보관하지 않으므로 결과가 있는 행만 오토마톤을 한 번 더 실행
+            prepared['hits'] = index.find_hits(prepared)
+        input_text = prepared['text']
+        matched_keywords = list(prepared['words'] & pattern['words'])
+        found_pattern = {
+            'pattern': pattern['text'],
+            'pattern_id': pattern['id'],
+            'analysis': pattern['analysis'],
+            'danger_level': pattern['danger_level'],
+            'url': pattern['url'],
+            'timestamp': timestamp,
+            'match_score': float(score),
+            'original_text': input_text,
+            'matched_keywords': matched_keywords,
+            'match_spans': match_spans(prepared, pattern['id'], matched_keywords),
+            'text': input_text,
+            'exact_match': bool(flags & EXACT),
+            'continuous_match': bool(flags & CONTINUOUS),
+            'matching_details': {
+                'exact_match': bool(flags & EXACT),
+                'continuous_match': bool(flags & CONTINUOUS),
+                'bigram_match': bool(flags & BIGRAM),
+                'trigram_match': bool(flags & TRIGRAM),
+                'word_similarity': float(word_similarity),
+                'text_similarity': float(text_similarity),
+                'partial_match': bool(flags & PARTIAL)
+            }
+        }
+        if pattern['has_thumbnail']:
+            found_pattern['thumbnail'] = pattern['thumbnail']
+        results.append((row, found_pattern))
+    return results
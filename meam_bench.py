@@ -0,0 +1,421 @@
+import io
+import os
+import csv
+import sys
+import json
+import time
+import random
+import zipfile
+import platform
+import resource
+import tempfile
+from datetime import datetime
+import openpyxl
+from meam_batch import score_batch
+from meam_cli import BatchScanner, log
+from meam_index import PatternIndex
+from meam_patterns import PatternStore, SheetPatternSource, rows_to_records
+from meam_sheets import PATTERN_HEADER, MemorySheetsBackend, SheetsGateway
+from meam_spell import SpellEngine
+
+
+# 기준 결과 파일 형식 버전 (형식이 바뀌면 이전 기준과 비교하지 않음)
+REPORT_FORMAT = 1
+
+# 크기 묶음 - 패턴 행 수, 맞춤법 규칙 수, 표 셀 수
+PRESETS = {
+    'small': {'patterns': 1000, 'rules': 200, 'cells': 10000},
+    'medium': {'patterns': 10000, 'rules': 1000, 'cells': 100000},
+    'large': {'patterns': 50000, 'rules': 5000, 'cells': 1000000}
+}
+
+# 선택할 수 있는 단계 (시트 동기화/인덱스/규칙 컴파일은 항상 측정)
+STAGES = ('match', 'batch', 'spell', 'scan', 'scan_zip')
+
+# 텍스트 단위 단계(match/spell)에서 측정하는 최대 텍스트 수와 batch 단계의 배치 크기
+SAMPLE_TEXTS = 5000
+BATCH_SIZE = 500
+
+# 생성 표의 열 수, ZIP 멤버 수
+TABLE_COLUMNS = 8
+ZIP_MEMBERS = 4
+
+# 셀에 패턴 문장/맞춤법 오류/앞에 나온 셀이 들어갈 확률
+PATTERN_RATE = 0.05
+TYPO_RATE = 0.05
+DUPLICATE_RATE = 0.2
+
+# 패턴 중 영어 문장 비율
+ENGLISH_RATE = 0.3
+
+# 기준 대비 이만큼(비율) 나빠지면 회귀로 표시 - 기준에서 이보다 짧게 끝난 단계는 잡음이 커서 어떤 지표도 비교하지 않음
+REGRESSION_TOLERANCE = 0.2
+MIN_COMPARE_SECONDS = 0.2
+
+# 값이 클수록 좋은 지표 / 작을수록 좋은 지표
+HIGHER_IS_BETTER = ('throughput',)
+LOWER_IS_BETTER = ('p50_ms', 'p99_ms', 'peak_rss_mb')
+
+HANGUL_SYLLABLES = ('가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추쿠투푸후'
+                    '기니디리미비시이지치키티피히개내대래매배새애재채게네데레메베세에제체한국인사람돈계좌'
+                    '송금입금출금대출이자보험투자주식코인지갑문자링크인증번호확인요청전화상담')
+ENGLISH_WORDS = ('account', 'bank', 'bitcoin', 'call', 'card', 'check', 'click', 'code', 'confirm', 'crypto',
+                 'deposit', 'fee', 'free', 'gift', 'guaranteed', 'invest', 'link', 'loan', 'login', 'money',
+                 'number', 'offer', 'password', 'pay', 'prize', 'profit', 'refund', 'reward', 'send', 'transfer',
+                 'urgent', 'verify', 'wallet', 'win', 'the', 'your', 'now', 'today', 'please', 'to')
+
+
+def korean_word(rng):
+    return ''.join(rng.choice(HANGUL_SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+
+def make_vocabulary(seed, size=4000):
+    """시드별 고정 어휘 (한국어 단어, 영어 단어) - 앞쪽 단어일수록 자주 쓰이도록 가중치 포함
+
+    가중치를 1/(순위+50)으로 완만하게 두어, 패턴을 넣지 않은 셀이 흔한 단어만으로 매칭되지 않게 한다.
+    """
+    rng = random.Random(f"{seed}:vocabulary")
+    korean = list(dict.fromkeys(korean_word(rng) for _ in range(size)))
+    english = list(ENGLISH_WORDS) + list(dict.fromkeys(
+        ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9))) for _ in range(size // 4)
+    ))
+    return {
+        'korean': korean, 'korean_weights': [1 / (rank + 50) for rank in range(len(korean))],
+        'english': english, 'english_weights': [1 / (rank + 50) for rank in range(len(english))]
+    }
+
+
+def words(rng, vocabulary, count, english=False):
+    key = 'english' if english else 'korean'
+    return rng.choices(vocabulary[key], vocabulary[key + '_weights'], k=count)
+
+
+def generate_patterns(count, seed):
+    """패턴 시트 데이터 행 목록 (PATTERN_HEADER 순서, 한국어/영어 문장)"""
+    rng = random.Random(f"{seed}:patterns")
+    vocabulary = make_vocabulary(seed)
+    rows = []
+    for number in range(count):
+        english = rng.random() < ENGLISH_RATE
+        text = ' '.join(words(rng, vocabulary, rng.randint(3, 8), english))
+        url = f"https://www.youtube.com/watch?v={number:011d}" if rng.random() < 0.2 else ''
+        rows.append([text, f"설명 {number}", url, str(rng.randint(1, 10)), '2024-01-01 00:00:00'])
+    return rows
+
+
+def generate_rules(count, seed):
+    """맞춤법 규칙 {오류: 수정} - 글자 바꿈/빠짐과 띄어쓰기 오류"""
+    rng = random.Random(f"{seed}:rules")
+    vocabulary = make_vocabulary(seed)
+    rules = {}
+    attempts = 0
+    while len(rules) < count and attempts < count * 20:
+        attempts += 1
+        if rng.random() < 0.2:
+            right = ' '.join(words(rng, vocabulary, 2))
+            wrong = right.replace(' ', '')
+        else:
+            right = rng.choice(vocabulary['korean'])
+            if len(right) < 2:
+                continue
+            position = rng.randrange(len(right))
+            if rng.random() < 0.5:
+                wrong = right[:position] + rng.choice(HANGUL_SYLLABLES) + right[position + 1:]
+            else:
+                wrong = right[:position] + right[position + 1:]
+        if wrong and wrong != right and wrong not in rules:
+            rules[wrong] = right
+    return rules
+
+
+def generate_cells(count, patterns, rules, seed):
+    """표 셀 텍스트 목록 - 일부는 패턴 문장(또는 그 일부)/맞춤법 오류를 포함하고 일부는 앞에 나온 셀과 같음"""
+    rng = random.Random(f"{seed}:cells")
+    vocabulary = make_vocabulary(seed)
+    wrongs = list(rules)
+    cells = []
+    for _ in range(count):
+        if cells and rng.random() < DUPLICATE_RATE:
+            cells.append(rng.choice(cells))
+            continue
+        parts = words(rng, vocabulary, rng.randint(1, 12), rng.random() < ENGLISH_RATE)
+        if patterns and rng.random() < PATTERN_RATE:
+            pattern_words = rng.choice(patterns)[0].split()
+            if rng.random() < 0.5:
+                pattern_words = pattern_words[:max(2, len(pattern_words) - 2)]
+            parts.insert(rng.randint(0, len(parts)), ' '.join(pattern_words))
+        if wrongs and rng.random() < TYPO_RATE:
+            parts.insert(rng.randint(0, len(parts)), rng.choice(wrongs))
+        cells.append(' '.join(parts))
+    return cells
+
+
+def table_rows(cells, columns=TABLE_COLUMNS):
+    """셀 목록을 문자열 표 행으로 (헤더 포함, 검사 셀 수가 생성한 셀 수와 같도록 키 열은 두지 않음)"""
+    yield [f"text_{column}" for column in range(1, columns + 1)]
+    for start in range(0, len(cells), columns):
+        yield cells[start:start + columns]
+
+
+def write_workbook(stream, cells):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('strings')
+    for row in table_rows(cells):
+        sheet.append(row)
+    workbook.save(stream)
+
+
+def write_csv(stream, cells):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    csv.writer(text).writerows(table_rows(cells))
+    text.detach()
+
+
+def write_zip(path, cells, members=ZIP_MEMBERS):
+    """셀을 members개로 나눠 xlsx/csv 멤버로 담은 ZIP"""
+    size = -(-len(cells) // members)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for member in range(members):
+            part = cells[member * size:(member + 1) * size]
+            name = f"strings_{member}.xlsx" if member % 2 == 0 else f"strings_{member}.csv"
+            with archive.open(name, 'w') as stream:
+                if name.endswith('.xlsx'):
+                    buffer = io.BytesIO()
+                    write_workbook(buffer, part)
+                    stream.write(buffer.getvalue())
+                else:
+                    write_csv(stream, part)
+
+
+def generated_file(directory, name, write):
+    """생성 파일 경로 - 같은 이름(크기/시드 포함)이 이미 있으면 다시 만들지 않음"""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        temp_path = path + '.tmp'
+        write(temp_path)
+        os.replace(temp_path, path)
+    return path
+
+
+def reset_peak_rss():
+    """현재 프로세스의 최대 RSS 기록 초기화 (리눅스) - 초기화할 수 없으면 False"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 RSS(MB) - 리눅스는 마지막 초기화 이후, 그 외에는 프로세스 시작 이후"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, 리눅스는 KB 단위
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def latency_summary(samples):
+    """지연 시간(초) 목록의 p50/p99(밀리초)"""
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(samples[int(0.50 * (len(samples) - 1))] * 1000, 3),
+        'p99_ms': round(samples[int(0.99 * (len(samples) - 1))] * 1000, 3)
+    }
+
+
+class CountingWriter:
+    """검사 결과를 기록하지 않고 개수만 셈"""
+
+    def __init__(self):
+        self.count = 0
+
+    def write(self, result):
+        self.count += 1
+
+
+class Benchmark:
+    """합성 데이터로 단계별 처리량/지연 시간/최대 RSS 측정 (네트워크 없이, 시트는 메모리 가짜 백엔드)
+
+    - sync: 가짜 시트 → 로컬 스냅샷 전체 동기화 (PatternStore)
+    - index: 패턴 인덱스 컴파일 (PatternIndex), rules: checker 워크시트 읽기와 맞춤법 규칙 컴파일 (SpellEngine)
+    - match: 텍스트 하나씩 매칭 (PatternIndex.match), batch: 배치 매칭 (score_batch)
+    - spell: 텍스트 하나씩 맞춤법 검사 (SpellEngine.check)
+    - scan / scan_zip: 문자열 표 xlsx / ZIP 파일 전체 검사 (meam_cli의 BatchScanner - 워커 프로세스 풀)
+
+    Streamlit 앱의 함수(find_matching_patterns, analyze_file_contents 등)는 위 구성 요소를 감싼 것으로 직접 실행하지 않는다.
+
+    최대 RSS는 이 프로세스 기준이며 scan 단계의 워커 프로세스는 포함하지 않는다.
+    """
+
+    def __init__(self, patterns, rules, cells, seed=0, data_dir=None, workers=None, stages=STAGES,
+                 sample_texts=SAMPLE_TEXTS):
+        self.config = {'patterns': patterns, 'rules': rules, 'cells': cells, 'seed': seed,
+                       'sample_texts': sample_texts, 'workers': workers}
+        self.data_dir = data_dir
+        self.stages = stages
+        self.results = {}
+
+    def measure(self, name, unit, run):
+        """run()이 (처리 수, 지연 시간 목록) 반환 - 단계 결과 기록"""
+        log(f"⏱️ {name}...")
+        exact_peak = reset_peak_rss()
+        start = time.perf_counter()
+        items, samples = run()
+        seconds = time.perf_counter() - start
+        result = {
+            'items': items,
+            'unit': unit,
+            'seconds': round(seconds, 4),
+            'throughput': round(items / seconds, 2) if seconds > 0 else 0.0,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        result.update(latency_summary(samples))
+        if not exact_peak:
+            result['peak_rss_since_start'] = True
+        self.results[name] = result
+        log(f"   {items:,} {unit}, {seconds:.2f}초 ({result['throughput']:,.0f} {unit}/초)"
+            + (f", p50 {result['p50_ms']}ms p99 {result['p99_ms']}ms" if samples else '')
+            + f", 최대 RSS {result['peak_rss_mb']}MB")
+        return result
+
+    def run(self):
+        config = self.config
+        seed = config['seed']
+        pattern_rows = generate_patterns(config['patterns'], seed)
+        rules = generate_rules(config['rules'], seed)
+        backend = MemorySheetsBackend({
+            0: [PATTERN_HEADER] + pattern_rows,
+            'checker': [['wrong', 'right']] + [[wrong, right] for wrong, right in rules.items()]
+        })
+        gateway = SheetsGateway(backend)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state = {}
+
+            def sync():
+                store = PatternStore(lambda: SheetPatternSource(gateway), path=os.path.join(temp_dir, 'patterns.json.gz'))
+                store.sync()
+                state['records'] = rows_to_records(store.snapshot['header'], store.snapshot['rows'])
+                return len(state['records']), []
+
+            def build_index():
+                state['index'] = PatternIndex(state['records'])
+                return len(state['index'].patterns), []
+
+            def build_rules():
+                loaded = {}
+                for row in gateway.read_values('checker')[1:]:
+                    if len(row) >= 2 and row[0] and row[1]:
+                        loaded[row[0].strip()] = row[1].strip()
+                state['rules'] = loaded
+                state['engine'] = SpellEngine(loaded)
+                return len(loaded), []
+
+            self.measure('sync', 'rows', sync)
+            self.measure('index', 'patterns', build_index)
+            self.measure('rules', 'rules', build_rules)
+            index, engine = state['index'], state['engine']
+
+            cells = generate_cells(config['cells'], pattern_rows, rules, seed)
+            texts = list(dict.fromkeys(cells))[:config['sample_texts']]
+
+            if 'match' in self.stages:
+                self.measure('match', 'texts', lambda: self.per_text(texts, lambda text: index.match(text, 0.5)))
+            if 'batch' in self.stages:
+                self.measure('batch', 'texts', lambda: self.batches(texts, index))
+            if 'spell' in self.stages:
+                self.measure('spell', 'texts', lambda: self.per_text(texts, engine.check))
+
+            data_dir = self.data_dir or temp_dir
+            os.makedirs(data_dir, exist_ok=True)
+            name = f"strings_{config['cells']}_{config['patterns']}_{config['rules']}_{seed}"
+            if 'scan' in self.stages:
+                path = generated_file(data_dir, name + '.xlsx', lambda path: write_workbook(path, cells))
+                self.measure('scan', 'cells', lambda: self.scan(path, index, state['rules']))
+            if 'scan_zip' in self.stages:
+                path = generated_file(data_dir, name + '.zip', lambda path: write_zip(path, cells))
+                self.measure('scan_zip', 'cells', lambda: self.scan(path, index, state['rules']))
+
+        return self.report()
+
+    def per_text(self, texts, check):
+        samples = []
+        for text in texts:
+            start = time.perf_counter()
+            check(text)
+            samples.append(time.perf_counter() - start)
+        return len(texts), samples
+
+    def batches(self, texts, index):
+        samples = []
+        for start in range(0, len(texts), BATCH_SIZE):
+            batch_start = time.perf_counter()
+            score_batch(texts[start:start + BATCH_SIZE], index, 0.5)
+            samples.append(time.perf_counter() - batch_start)
+        return len(texts), samples
+
+    def scan(self, path, index, rules):
+        scanner = BatchScanner(index, rules, CountingWriter(), self.config['workers'])
+        scanner.scan([path])
+        if scanner.errors:
+            raise RuntimeError(f"검사 오류: {scanner.errors[0]}")
+        return scanner.cells, []
+
+    def report(self):
+        return {
+            'format': REPORT_FORMAT,
+            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count()
+            },
+            'config': self.config,
+            'stages': self.results
+        }
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_report(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def compare_reports(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """기준 대비 tolerance 넘게 나빠진 지표 목록 [{'stage', 'metric', 'baseline', 'current', 'change'}]
+
+    설정(크기/시드)이나 형식이 다른 기준과는 비교할 수 없으므로 ValueError.
+    """
+    if baseline.get('format') != report['format']:
+        raise ValueError("기준 파일 형식이 다릅니다.")
+    if baseline.get('config') != report['config']:
+        raise ValueError(f"기준과 설정이 다릅니다: 기준 {baseline.get('config')}, 현재 {report['config']}")
+
+    regressions = []
+    for stage, current in report['stages'].items():
+        previous = baseline['stages'].get(stage)
+        # 너무 짧게 끝난 단계는 처리량뿐 아니라 지연 시간/RSS도 잡음이 커서 비교하지 않음
+        if not previous or previous['seconds'] < MIN_COMPARE_SECONDS:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            if not previous.get(metric) or metric not in current:
+                continue
+            change = current[metric] / previous[metric] - 1
+            if (metric in HIGHER_IS_BETTER and change < -tolerance) or (metric in LOWER_IS_BETTER and change > tolerance):
+                regressions.append({'stage': stage, 'metric': metric, 'baseline': previous[metric],
+                                    'current': current[metric], 'change': round(change, 4)})
+    return regressions
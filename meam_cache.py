@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+# 결과 캐시 기본 위치와 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 삭제)
+CACHE_PATH = os.environ.get(
+    'MEAM_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'meam', 'results.sqlite')
+)
+CACHE_MAX_ENTRIES = int(os.environ.get('MEAM_CACHE_MAX_ENTRIES', 500000))
+
+# 한 번에 조회하는 키 수 (SQLite 변수 개수 제한보다 작게)
+LOOKUP_CHUNK = 500
+
+
+def text_hash(text):
+    """텍스트 해시 - 맞춤법 검사는 공백/대소문자를 그대로 다루므로 원문 기준"""
+    return hashlib.sha1(str(text).encode('utf-8')).hexdigest()
+
+
+def cache_context(kind, index_version, spell_version, threshold, fuzzy_threshold=None):
+    """결과에 영향을 주는 버전/설정을 묶은 키 - 패턴/규칙이 바뀌면 기존 항목은 자동으로 무효"""
+    payload = json.dumps([kind, index_version, spell_version, threshold, fuzzy_threshold])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ResultCache:
+    """SQLite 기반 매칭 결과 캐시 (크기 제한 + LRU 삭제)"""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+        self.conn.commit()
+        self.count = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(context, text):
+        """저장 키 (컨텍스트 + 텍스트 해시)"""
+        return f"{context}:{text_hash(text)}"
+
+    def get_many(self, context, texts):
+        """텍스트 목록 조회 - {텍스트: 저장된 값} (없는 텍스트는 제외)"""
+        keys = {self.make_key(context, text): text for text in texts}
+        found = {}
+        key_list = list(keys)
+        with self.lock:
+            try:
+                for i in range(0, len(key_list), LOOKUP_CHUNK):
+                    chunk = key_list[i:i + LOOKUP_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self.conn.execute(
+                        f"SELECT key, value FROM results WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+
+                if found:
+                    now = time.time()
+                    self.conn.executemany(
+                        "UPDATE results SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    self.conn.commit()
+            except sqlite3.Error:
+                # 다른 프로세스가 잠근 경우 등은 캐시 미스로 처리
+                found = {}
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {keys[key]: value for key, value in found.items()}
+
+    def get(self, context, text):
+        """단일 텍스트 조회 (없으면 None)"""
+        return self.get_many(context, [text]).get(text)
+
+    def put_many(self, context, items):
+        """(텍스트, 값) 목록 저장 - 값은 JSON 직렬화 가능해야 함"""
+        now = time.time()
+        rows = []
+        for text, value in items:
+            try:
+                rows.append((self.make_key(context, text), json.dumps(value, ensure_ascii=False), now))
+            except (TypeError, ValueError):
+                continue
+        if not rows:
+            return
+        with self.lock:
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, last_used) VALUES (?, ?, ?)", rows
+                )
+                self.count += len(rows)
+                # 10% 여유를 두고 한꺼번에 삭제해 매 저장마다 정리하지 않도록 함
+                if self.count > self.max_entries * 1.1:
+                    self.count = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                    excess = self.count - self.max_entries
+                    if excess > 0:
+                        self.conn.execute(
+                            "DELETE FROM results WHERE key IN "
+                            "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (excess,)
+                        )
+                        self.count -= excess
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+
+    def put(self, context, text, value):
+        """단일 텍스트 저장"""
+        self.put_many(context, [(text, value)])
+
+    def clear(self):
+        """전체 삭제"""
+        with self.lock:
+            self.conn.execute("DELETE FROM results")
+            self.conn.commit()
+            self.count = 0
+
+    def close(self):
+        """연결 종료"""
+        with self.lock:
+            self.conn.close()
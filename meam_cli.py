@@ -0,0 +1,345 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, wait
+from meam_aggregate import ResultAggregator
+from meam_index import FUZZY_SIMILARITY_THRESHOLD, PatternIndex, add_stat, merge_stats
+from meam_ingest import SUPPORTED_EXTENSIONS, iter_row_batches
+from meam_patterns import SNAPSHOT_PATH, LocalPatternSource, load_snapshot, rows_to_records
+from meam_scan import (AdaptiveBatchSizer, ScanPool, TextOccurrences, pack_scan_results,
+                       score_texts_in_worker)
+
+
+# 디렉터리에서 찾는 파일 확장자 (ZIP 포함)
+SCAN_EXTENSIONS = SUPPORTED_EXTENSIONS + ('.zip',)
+
+# 진행 상황을 출력하는 간격(초)
+REPORT_INTERVAL = 2.0
+
+# CSV 출력 컬럼
+CSV_FIELDS = ['source_file', 'sheet_name', 'part', 'column', 'rows', 'occurrences', 'type', 'danger_level',
+              'match_score', 'pattern', 'analysis', 'url', 'text', 'corrected_text', 'corrections']
+
+
+def log(message):
+    """진행 상황/경고는 표준 오류로 (결과 파일과 섞이지 않도록)"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def load_patterns(path):
+    """패턴 레코드 목록 - 로컬 스냅샷(.json.gz, 앱이 동기화해 둔 파일) 또는 시트와 같은 헤더의 CSV"""
+    if path.endswith('.csv'):
+        header, rows = LocalPatternSource(path).read_all()
+        return rows_to_records(header, rows)
+    snapshot = load_snapshot(path)
+    if snapshot is None:
+        raise ValueError(f"패턴 스냅샷을 읽을 수 없습니다: {path}")
+    return rows_to_records(snapshot['header'], snapshot['rows'])
+
+
+def load_rules(path):
+    """맞춤법 규칙 딕셔너리 - JSON({오류: 수정}) 또는 checker 워크시트와 같은 2열 CSV(헤더 포함)"""
+    if not path:
+        return {}
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            return {str(wrong).strip(): str(right).strip() for wrong, right in json.load(f).items()}
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    rules = {}
+    for row in rows[1:]:
+        if len(row) >= 2 and row[0] and row[1]:
+            rules[row[0].strip()] = row[1].strip()
+    return rules
+
+
+def iter_scan_files(paths):
+    """경로 목록에서 검사할 파일 (디렉터리는 하위까지, 이름순)"""
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if name.lower().endswith(SCAN_EXTENSIONS):
+                        yield os.path.join(directory, name)
+        elif os.path.exists(path):
+            yield path
+        else:
+            log(f"⚠️ 파일을 찾을 수 없습니다: {path}")
+
+
+class JsonlWriter:
+    """결과 한 건당 JSON 한 줄"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, result):
+        self.stream.write(json.dumps(result, ensure_ascii=False, default=str) + '\n')
+
+
+class CsvWriter:
+    """결과 한 건당 CSV 한 행 (CSV_FIELDS, 목록 값은 JSON 문자열)"""
+
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, result):
+        row = dict(result)
+        row['type'] = 'spelling' if result.get('is_spell_check') else 'pattern'
+        row['rows'] = json.dumps(result.get('rows', []))
+        row['corrections'] = json.dumps(result.get('spelling_errors', []), ensure_ascii=False, default=str)
+        self.writer.writerow(row)
+
+
+class BatchScanner:
+    """파일을 행 배치로 읽어 프로세스 풀에서 패턴 매칭/맞춤법 검사하고 결과를 바로 기록 (Streamlit 없이)"""
+
+    def __init__(self, index, rules, writer, workers=None, threshold=0.5, fuzzy_threshold=FUZZY_SIMILARITY_THRESHOLD):
+        self.index = index
+        self.rules = rules
+        self.writer = writer
+        self.threshold = threshold
+        self.fuzzy_threshold = fuzzy_threshold
+        self.pool = ScanPool(workers)
+        self.aggregator = ResultAggregator()
+        self.stats = {}
+        self.errors = []
+        self.cells = 0
+        self.findings = 0
+        self.start_time = None
+        self.last_report = 0.0
+
+    def report(self, force=False):
+        now = time.time()
+        if not force and now - self.last_report < REPORT_INTERVAL:
+            return
+        self.last_report = now
+        elapsed = now - self.start_time
+        rate = self.cells / elapsed if elapsed > 0 else 0
+        log(f"처리 중... {self.cells:,} 셀, {elapsed:.1f}초 ({rate:,.0f} 셀/초), 결과 {self.findings:,}건")
+
+    def on_error(self, message):
+        self.errors.append(message)
+        log(f"⚠️ {message}")
+
+    def scan_file(self, path):
+        """파일 하나 검사 - 파일 안의 같은 셀 텍스트는 한 번만 검사하고 결과를 모든 위치로 전개해 기록"""
+        occurrences = TextOccurrences()
+        batch_sizer = AdaptiveBatchSizer()
+        executor = self.pool.acquire(self.index, self.rules)
+        max_in_flight = self.pool.max_workers * 2
+        cells_before = self.cells
+
+        try:
+            with open(path, 'rb') as stream:
+                def batch_tasks():
+                    pending = []
+                    for chunk in iter_row_batches(stream, path, on_error=self.on_error):
+                        frame = chunk['frame']
+                        for col in frame.columns:
+                            for row, text in frame[col].dropna().items():
+                                # 행 번호는 헤더(1행)를 포함한 시트 기준
+                                if occurrences.add(text, chunk['source_file'], chunk['sheet_name'], col, row + 2,
+                                                   chunk['part']):
+                                    pending.append(text)
+                            while len(pending) >= batch_sizer.size:
+                                batch, pending = pending[:batch_sizer.size], pending[batch_sizer.size:]
+                                yield batch
+                        self.cells = cells_before + occurrences.cells
+                    occurrences.finish_reading()
+                    if pending:
+                        yield pending
+
+                tasks = batch_tasks()
+                future_to_batch = {}
+
+                def fill_queue():
+                    while len(future_to_batch) < max_in_flight:
+                        batch = next(tasks, None)
+                        if batch is None:
+                            return
+                        future = executor.submit(score_texts_in_worker, batch, self.threshold, self.fuzzy_threshold)
+                        future_to_batch[future] = batch
+
+                fill_queue()
+                while future_to_batch:
+                    done, _ = wait(future_to_batch, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch = future_to_batch.pop(future)
+                        match_tuples, spelling, batch_stats, elapsed = future.result()
+                        batch_sizer.update(len(batch), elapsed)
+                        for text, value in pack_scan_results(batch, match_tuples, spelling):
+                            occurrences.set_results(text, value)
+                        merge_stats(self.stats, batch_stats)
+                    # 결과가 모두 모인 부분은 바로 기록하고 위치 정보를 버림
+                    self.write_completed(occurrences)
+                    fill_queue()
+                    self.report()
+        finally:
+            self.pool.release(executor)
+
+        self.cells = cells_before + occurrences.cells
+        add_stat(self.stats, 'cells', occurrences.cells)
+        add_stat(self.stats, 'duplicate_cells', occurrences.duplicates)
+        occurrences.finish_reading()
+        self.write_completed(occurrences)
+
+    def write_completed(self, occurrences):
+        for result in occurrences.completed(self.index):
+            self.writer.write(result)
+            self.aggregator.add(result)
+            self.findings += 1
+
+    def scan(self, paths):
+        """경로 목록 검사 - 검사한 파일 수 반환"""
+        self.start_time = time.time()
+        files = 0
+        try:
+            for path in iter_scan_files(paths):
+                log(f"📄 {path}")
+                try:
+                    self.scan_file(path)
+                    files += 1
+                except Exception as e:
+                    self.on_error(f"{path}: {e}")
+                    # 워커가 비정상 종료되었을 수 있으므로 다음 파일은 새 풀로 검사
+                    self.pool.shutdown()
+        finally:
+            self.pool.shutdown(wait=True)
+        self.report(force=True)
+        return files
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m meam', description="위험 문장 패턴/맞춤법 일괄 검사 (Streamlit 없이)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan = commands.add_parser('scan', help="파일/디렉터리/ZIP 검사 결과를 JSONL 또는 CSV로 기록")
+    scan.add_argument('paths', nargs='+', help="검사할 파일(csv/xlsx/xls/zip) 또는 디렉터리")
+    scan.add_argument('-o', '--output', default='meam_findings.jsonl', help="결과 파일 (기본: meam_findings.jsonl, '-'는 표준 출력)")
+    scan.add_argument('--format', choices=['jsonl', 'csv'], help="결과 형식 (기본: 결과 파일 확장자로 판단)")
+    scan.add_argument('--patterns', default=SNAPSHOT_PATH, help=f"패턴 스냅샷(.json.gz) 또는 CSV (기본: {SNAPSHOT_PATH})")
+    scan.add_argument('--rules', help="맞춤법 규칙 CSV(오류, 수정) 또는 JSON - 없으면 맞춤법 검사 안 함")
+    scan.add_argument('--workers', type=int, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    scan.add_argument('--threshold', type=float, default=0.5, help="매칭 점수 기준 (기본: 0.5)")
+    serve = commands.add_parser('serve', help="텍스트 위험도/맞춤법 분석 HTTP 서비스 (단건/일괄, 요청 묶음 처리)")
+    serve.add_argument('--host', default='127.0.0.1', help="바인드 주소 (기본: 127.0.0.1)")
+    serve.add_argument('--port', type=int, default=8765, help="포트 (기본: 8765)")
+    serve.add_argument('--patterns', default=SNAPSHOT_PATH, help=f"패턴 스냅샷(.json.gz) 또는 CSV (기본: {SNAPSHOT_PATH}) - 바뀌면 다시 읽음")
+    serve.add_argument('--rules', help="맞춤법 규칙 CSV(오류, 수정) 또는 JSON - 바뀌면 다시 읽음")
+    serve.add_argument('--batch-window-ms', type=float, default=5.0, help="동시 요청을 모으는 시간(밀리초, 기본: 5)")
+    serve.add_argument('--max-batch', type=int, default=256, help="한 번에 매칭하는 최대 텍스트 수 (기본: 256)")
+    serve.add_argument('--reload-interval', type=float, default=5.0, help="패턴/규칙 파일 변경 확인 간격(초, 기본: 5)")
+    serve.add_argument('--max-queue', type=int, default=50000, help="처리 대기 텍스트 최대 수 - 넘으면 503 (기본: 50000)")
+    bench = commands.add_parser('bench', help="합성 데이터로 단계별 처리량/지연 시간/최대 RSS 측정 (오프라인)")
+    bench.add_argument('--preset', choices=['small', 'medium', 'large'], default='small',
+                       help="크기 묶음 (small: 패턴 1천/셀 1만, medium: 1만/10만, large: 5만/100만)")
+    bench.add_argument('--pattern-rows', type=int, help="패턴 행 수 (묶음 값 대신)")
+    bench.add_argument('--rule-count', type=int, help="맞춤법 규칙 수 (묶음 값 대신)")
+    bench.add_argument('--cells', type=int, help="검사할 표 셀 수 (묶음 값 대신)")
+    bench.add_argument('--seed', type=int, default=0, help="데이터 생성 시드 (기본: 0)")
+    bench.add_argument('--stages', help="측정할 단계 (쉼표 구분, 기본: match,batch,spell,scan,scan_zip)")
+    bench.add_argument('--workers', type=int, help="scan 단계 워커 프로세스 수 (기본: CPU 코어 수)")
+    bench.add_argument('--data-dir', help="생성한 xlsx/ZIP을 보관해 다음 실행에 재사용할 디렉터리")
+    bench.add_argument('-o', '--output', help="결과 JSON 파일")
+    bench.add_argument('--baseline', help="비교할 기준 JSON - 나빠진 지표가 있으면 종료 코드 1")
+    bench.add_argument('--save-baseline', help="결과를 기준 JSON으로 저장")
+    bench.add_argument('--tolerance', type=float, default=0.2, help="회귀로 보는 변화 비율 (기본: 0.2)")
+    return parser
+
+
+def run_scan(args):
+    index = PatternIndex(load_patterns(args.patterns))
+    rules = load_rules(args.rules)
+    log(f"패턴 {len(index.patterns):,}개, 맞춤법 규칙 {len(rules):,}개")
+
+    output_format = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    stream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        writer = CsvWriter(stream) if output_format == 'csv' else JsonlWriter(stream)
+        scanner = BatchScanner(index, rules, writer, args.workers, args.threshold)
+        files = scanner.scan(args.paths)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+    elapsed = time.time() - scanner.start_time
+    aggregator = scanner.aggregator
+    log(f"완료: 파일 {files}개, {scanner.cells:,} 셀, {elapsed:.1f}초 ({scanner.cells / max(elapsed, 1e-9):,.0f} 셀/초)")
+    log(f"결과 {scanner.findings:,}건 - 패턴 {aggregator.total_patterns:,} (고위험 {aggregator.high_risk:,}), "
+        f"맞춤법 {aggregator.total_spelling:,}")
+    return 1 if scanner.errors else 0
+
+
+def run_serve(args):
+    # 서비스 모듈이 이 모듈의 로더를 쓰므로 여기서 가져옴
+    from meam_service import ScoringService, serve
+
+    service = ScoringService(args.patterns, args.rules, args.batch_window_ms / 1000, args.max_batch,
+                             args.reload_interval, args.max_queue)
+    health = service.health()
+    log(f"패턴 {health['patterns']:,}개, 맞춤법 규칙 {health['rules']:,}개 (인덱스 {health['index_version'][:12]})")
+    server = serve(service, args.host, args.port)
+    log(f"http://{args.host}:{server.server_address[1]} - POST /score, /score/bulk · GET /health, /stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+def run_bench(args):
+    from meam_bench import PRESETS, STAGES, Benchmark, compare_reports, load_report, save_report
+
+    preset = PRESETS[args.preset]
+    stages = tuple(stage.strip() for stage in args.stages.split(',')) if args.stages else STAGES
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        log(f"⚠️ 알 수 없는 단계: {', '.join(unknown)} (선택: {', '.join(STAGES)})")
+        return 2
+    benchmark = Benchmark(args.pattern_rows or preset['patterns'], args.rule_count or preset['rules'],
+                          args.cells or preset['cells'], args.seed, args.data_dir, args.workers, stages)
+    report = benchmark.run()
+    if args.output:
+        save_report(args.output, report)
+    if args.save_baseline:
+        save_report(args.save_baseline, report)
+        log(f"기준 저장: {args.save_baseline}")
+    if not args.baseline:
+        return 0
+
+    try:
+        regressions = compare_reports(report, load_report(args.baseline), args.tolerance)
+    except ValueError as e:
+        log(f"⚠️ {e}")
+        return 2
+    for regression in regressions:
+        log(f"❌ {regression['stage']} {regression['metric']}: {regression['baseline']} → {regression['current']} "
+            f"({regression['change']:+.1%})")
+    if not regressions:
+        log(f"✅ 기준 대비 회귀 없음 (허용 {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # spawn 방식 워커가 Streamlit 화면 스크립트(meam.py)를 다시 실행하지 않도록 메인 모듈을 이 모듈로 지정
+    sys.modules['__main__'] = sys.modules[__name__]
+    if args.command == 'scan':
+        return run_scan(args)
+    if args.command == 'serve':
+        return run_serve(args)
+    if args.command == 'bench':
+        return run_bench(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
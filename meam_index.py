@@ -0,0 +1,633 @@
+import re
+import json
+import hashlib
+import time
+import difflib
+import threading
+from array import array
+from datetime import datetime
+from meam_automaton import AhoCorasick
+from meam_lsh import MinHasher, LSHIndex, estimate_jaccard
+
+
+# 특수문자를 공백으로 변경할 때 사용하는 정규식 (find_matching_patterns와 동일)
+CLEAN_PATTERN = re.compile(r'[^가-힣a-zA-Z0-9\s]')
+
+# 최종 점수 정규화 값 (가중치 합계)
+SCORE_NORMALIZER = 4.9
+
+# 파일 검사에서 SequenceMatcher 대상을 LSH 후보로 제한할 추정 유사도 기준
+# (None이면 전체 후보에 대해 계산 - fuzzy_recall_report로 검증 후 설정)
+FUZZY_SIMILARITY_THRESHOLD = None
+
+
+# 인덱스 사본의 추가 오토마톤에 둘 최대 패턴 수 (넘으면 전체 재생성, 패턴 수의 5%까지는 허용)
+EXTRA_PATTERN_LIMIT = 500
+
+# 점수 상한 비교 시 부동소수점 오차 여유
+PRUNE_MARGIN = 1e-9
+
+# 파일 스캔/매칭 단계별 통계 항목
+MATCH_STAT_KEYS = (
+    'cells',
+    'duplicate_cells',
+    'cached_texts',
+    'reused_cells',
+    'texts',
+    'candidates',
+    'skipped_by_index',
+    'pruned_by_features',
+    'pruned_by_real_quick_ratio',
+    'pruned_by_quick_ratio',
+    'rejected_after_ratio',
+    'matched',
+    'ratio_calls'
+)
+
+
+def add_stat(stats, key, amount=1):
+    """통계 딕셔너리 항목 증가 (stats가 None이면 무시)"""
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + amount
+
+
+def merge_stats(total, stats):
+    """배치별 통계를 전체 통계에 합산"""
+    for key, value in (stats or {}).items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+def reachable_score(base_points, text_similarity_bound):
+    """텍스트 유사도 상한을 반영한 도달 가능 최대 점수"""
+    return (base_points + text_similarity_bound * 0.5) / SCORE_NORMALIZER + PRUNE_MARGIN
+
+
+def clean_text(text):
+    """소문자 변환 후 특수문자를 공백으로 변경"""
+    return CLEAN_PATTERN.sub(' ', str(text).lower())
+
+
+def make_ngrams(tokens):
+    """토큰 목록에서 bigram/trigram 집합 생성"""
+    bigrams = set()
+    trigrams = set()
+    for i in range(len(tokens) - 1):
+        bigrams.add(' '.join(tokens[i:i + 2]))
+        if i < len(tokens) - 2:
+            trigrams.add(' '.join(tokens[i:i + 3]))
+    return bigrams, trigrams
+
+
+def get_youtube_thumbnail(url):
+    """유튜브 URL에서 썸네일 URL 추출"""
+    if not url:
+        return None
+    video_id = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", url)
+    if video_id and 'youtube.com' in url:
+        return f"https://img.youtube.com/vi/{video_id.group(1)}/hqdefault.jpg"
+    return None
+
+
+def record_digest(previous, record):
+    """이전 버전 해시와 레코드로 다음 버전 해시 계산"""
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1((previous + payload).encode('utf-8')).hexdigest()
+
+
+def prepare_input(input_text):
+    """입력 텍스트 전처리 - 패턴 수와 무관하게 한 번만 수행"""
+    input_text_lower = str(input_text).lower()
+    # 특수문자를 공백으로 변경 (제거 대신)
+    input_text_cleaned = CLEAN_PATTERN.sub(' ', input_text_lower)
+    tokens = input_text_cleaned.split()
+    bigrams, trigrams = make_ngrams(tokens)
+    return {
+        'text': input_text,
+        'lower': input_text_lower,
+        'cleaned': input_text_cleaned,
+        'words': set(w for w in tokens if w.strip()),
+        'bigrams': bigrams,
+        'trigrams': trigrams
+    }
+
+
+def merge_spans(spans):
+    """(시작, 끝) 구간 목록을 정렬하고 겹치거나 맞닿은 구간을 합친 [[시작, 끝], ...]"""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def keyword_spans(lower, keywords):
+    """소문자 텍스트에서 키워드가 나오는 모든 위치 (겹침 허용)"""
+    spans = []
+    for keyword in keywords:
+        if not keyword:
+            continue
+        start = lower.find(keyword)
+        while start >= 0:
+            spans.append((start, start + len(keyword)))
+            start = lower.find(keyword, start + 1)
+    return spans
+
+
+def match_spans(prepared, pattern_id, keywords):
+    """결과 하이라이트용 글자 위치 - 오토마톤이 찾은 정확/연속 매칭 위치와 매칭 키워드 위치를 합친 [[시작, 끝], ...]
+
+    위치는 prepared['text'] 기준이다 (소문자 변환으로 길이가 바뀌는 일부 유니코드 글자가 있으면 원문 위치로 변환).
+    """
+    lower = prepared['lower']
+    hits = prepared['hits']
+    spans = list(hits['exact'].get(pattern_id, ()))
+    # 특수문자를 같은 길이의 공백으로 바꾼 텍스트 기준이므로 위치가 그대로 원문 위치
+    spans.extend(hits['continuous'].get(pattern_id, ()))
+    # 2글자 이상 키워드는 부분 매칭 오토마톤이 찾은 위치를 그대로 사용
+    partial = hits['partial']
+    missing = []
+    for keyword in keywords:
+        found = partial.get(keyword)
+        if found is None:
+            missing.append(keyword)
+        else:
+            spans.extend(found)
+    spans.extend(keyword_spans(lower, missing))
+
+    text = prepared['text']
+    if len(lower) != len(text):
+        origin = [i for i, char in enumerate(text) for _ in char.lower()]
+        spans = [(origin[start], origin[end - 1] + 1) for start, end in spans if end > start]
+    return merge_spans(spans)
+
+
+def compile_pattern(record):
+    """시트 레코드 하나를 매칭용 구조로 컴파일 (매칭 불가 레코드는 None)"""
+    if not isinstance(record, dict) or 'text' not in record:
+        return None
+
+    pattern_text = str(record['text'])
+    pattern_text_lower = pattern_text.lower()
+    pattern_cleaned = CLEAN_PATTERN.sub(' ', pattern_text_lower)
+    tokens = pattern_cleaned.split()
+    pattern_words = frozenset(w for w in tokens if w.strip())
+    if not pattern_words:
+        return None
+
+    # 위험도는 정수로 변환 가능한 경우만 매칭 대상
+    try:
+        danger_level = int(record.get('dangerlevel', 0))
+    except (ValueError, TypeError):
+        return None
+
+    bigrams, trigrams = make_ngrams(tokens)
+    url = record.get('url', '')
+    thumbnail = None
+    has_thumbnail = False
+    if url and isinstance(url, str) and 'youtube.com' in url:
+        has_thumbnail = True
+        thumbnail = get_youtube_thumbnail(url)
+
+    return {
+        'record': record,
+        'text': pattern_text,
+        'lower': pattern_text_lower,
+        'cleaned': pattern_cleaned,
+        'words': pattern_words,
+        'long_words': tuple(w for w in pattern_words if len(w) > 1),
+        'sequence': ' '.join(tokens),
+        'bigrams': frozenset(bigrams),
+        'trigrams': frozenset(trigrams),
+        'danger_level': danger_level,
+        'analysis': record.get('output', '분석 정보 없음'),
+        'url': url,
+        'has_thumbnail': has_thumbnail,
+        'thumbnail': thumbnail
+    }
+
+
+class PatternIndex:
+    """패턴 시트를 한 번만 전처리해 두는 컴파일된 인덱스"""
+
+    def __init__(self, data=None):
+        self.patterns = []
+        self.skipped = 0
+        self.version = ''
+        # 정확/부분 매칭(소문자 원문)과 연속 매칭(정리된 텍스트)용 오토마톤
+        # 소문자 오토마톤 값: 정수는 정확 매칭 패턴 번호, 문자열은 부분 매칭 단어
+        self.text_automaton = AhoCorasick()
+        self.sequence_automaton = AhoCorasick()
+        self.automaton_words = set()
+        # extended로 만든 사본은 위 오토마톤을 원본과 공유하고, 추가된 패턴은 작은 추가 오토마톤에 등록
+        self.extra_text_automaton = None
+        self.extra_sequence_automaton = None
+        self.extra_patterns = 0
+        # 사본은 포스팅 배열/LSH 버킷을 원본과 공유하므로 추가할 때 새 배열로 교체
+        self.shared = False
+        # 단어/bigram/trigram 역색인 (패턴 번호가 정렬된 정수 배열)
+        self.word_postings = {}
+        self.bigram_postings = {}
+        self.trigram_postings = {}
+        # 텍스트 유사도 후보 검색용 MinHash 서명과 LSH 밴드 색인
+        self.minhasher = MinHasher()
+        self.lsh = LSHIndex()
+        self.signatures = []
+        # 배치 매칭용 CSR 테이블 (meam_batch에서 버전별로 생성)
+        self.batch_tables = None
+        self.add_records(data or [])
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def add_records(self, records):
+        """레코드를 컴파일하여 인덱스에 추가하고 버전 갱신"""
+        for record in records:
+            self.version = record_digest(self.version, record)
+            compiled = compile_pattern(record)
+            if compiled is None:
+                self.skipped += 1
+                continue
+            compiled['id'] = len(self.patterns)
+            self.register(compiled['id'], compiled)
+            self.patterns.append(compiled)
+
+        # 키가 추가된 오토마톤만 다시 계산 (사본과 공유하는 기본 오토마톤은 그대로)
+        for automaton in self.automata():
+            if not automaton.built:
+                automaton.build()
+
+    def automata(self):
+        """(소문자 원문 오토마톤, 연속 매칭 오토마톤) 목록 - 추가 오토마톤이 있으면 함께 포함"""
+        if self.extra_text_automaton is None:
+            return (self.text_automaton, self.sequence_automaton)
+        return (self.text_automaton, self.sequence_automaton,
+                self.extra_text_automaton, self.extra_sequence_automaton)
+
+    def copy(self):
+        """컴파일된 패턴/기본 오토마톤/포스팅 배열은 원본과 공유하는 사본 (원본을 쓰는 검색에 영향 없음)
+
+        사본에 추가한 패턴은 추가 오토마톤과 새 포스팅 배열에만 들어간다. 원본에는 더 이상 패턴을 추가하지 않는다.
+        """
+        other = PatternIndex.__new__(PatternIndex)
+        other.patterns = list(self.patterns)
+        other.skipped = self.skipped
+        other.version = self.version
+        other.text_automaton = self.text_automaton
+        other.sequence_automaton = self.sequence_automaton
+        other.automaton_words = set(self.automaton_words)
+        if self.extra_text_automaton is None:
+            other.extra_text_automaton = AhoCorasick()
+            other.extra_sequence_automaton = AhoCorasick()
+        else:
+            other.extra_text_automaton = self.extra_text_automaton.copy()
+            other.extra_sequence_automaton = self.extra_sequence_automaton.copy()
+        other.extra_patterns = self.extra_patterns
+        other.word_postings = dict(self.word_postings)
+        other.bigram_postings = dict(self.bigram_postings)
+        other.trigram_postings = dict(self.trigram_postings)
+        other.shared = True
+        other.minhasher = self.minhasher
+        other.lsh = self.lsh.copy()
+        other.signatures = list(self.signatures)
+        other.batch_tables = None
+        return other
+
+    def extended(self, records):
+        """레코드를 추가한 새 인덱스 - 전체를 다시 컴파일하지 않고 버전은 처음부터 만든 것과 같음"""
+        other = self.copy()
+        other.add_records(records)
+        return other
+
+    def register(self, pattern_id, pattern):
+        """컴파일된 패턴을 역색인과 오토마톤에 등록"""
+        # 패턴 번호는 증가 순서로만 추가되므로 포스팅 리스트는 항상 정렬 상태
+        for postings, terms in ((self.word_postings, pattern['words']),
+                                (self.bigram_postings, pattern['bigrams']),
+                                (self.trigram_postings, pattern['trigrams'])):
+            for term in terms:
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = array('i')
+                elif self.shared:
+                    posting = postings[term] = array('i', posting)
+                posting.append(pattern_id)
+
+        signature = self.minhasher.text_signature(pattern['cleaned'])
+        self.signatures.append(signature)
+        self.lsh.add(pattern_id, signature)
+
+        if self.extra_text_automaton is None:
+            text_automaton, sequence_automaton = self.text_automaton, self.sequence_automaton
+        else:
+            text_automaton, sequence_automaton = self.extra_text_automaton, self.extra_sequence_automaton
+            self.extra_patterns += 1
+        text_automaton.add(pattern['lower'], pattern_id)
+        if len(pattern['words']) > 1:
+            sequence_automaton.add(pattern['sequence'], pattern_id)
+        for word in pattern['long_words']:
+            if word not in self.automaton_words:
+                self.automaton_words.add(word)
+                text_automaton.add(word, word)
+
+    def find_hits(self, prepared):
+        """오토마톤으로 정확/연속/부분 매칭 위치를 한 번에 탐색"""
+        exact = {}
+        partial = {}
+        text_automata = (self.text_automaton,) if self.extra_text_automaton is None else (
+            self.text_automaton, self.extra_text_automaton)
+        for text_automaton in text_automata:
+            for start, end, value in text_automaton.iter(prepared['lower']):
+                if isinstance(value, str):
+                    # 2글자 이상 패턴 단어가 입력에 포함된 위치
+                    partial.setdefault(value, []).append((start, end))
+                else:
+                    # 패턴 원문(소문자)이 입력에 그대로 포함된 위치
+                    exact.setdefault(value, []).append((start, end))
+
+        # 특수문자 정리 후 연속 단어열이 포함된 위치
+        continuous = self.sequence_automaton.find_all(prepared['cleaned'])
+        if self.extra_sequence_automaton is not None:
+            continuous.update(self.extra_sequence_automaton.find_all(prepared['cleaned']))
+        return {
+            'exact': exact,
+            'continuous': continuous,
+            'partial': partial
+        }
+
+    def partial_pattern_ids(self, hits):
+        """부분 매칭된 단어를 포함하는 패턴 번호 집합"""
+        pattern_ids = set()
+        for word in hits['partial']:
+            pattern_ids.update(self.word_postings[word])
+        return pattern_ids
+
+    def indexed_words(self, words, min_length=2):
+        """역색인에 존재하는 입력 단어 목록"""
+        return [w for w in words if len(w) >= min_length and w in self.word_postings]
+
+    def token_features(self, prepared):
+        """포스팅 리스트로 패턴별 공통 단어 수와 n-gram 일치 패턴 계산"""
+        word_counts = {}
+        for word in prepared['words']:
+            posting = self.word_postings.get(word)
+            if posting is None:
+                continue
+            for pattern_id in posting:
+                word_counts[pattern_id] = word_counts.get(pattern_id, 0) + 1
+
+        bigram_ids = set()
+        for bigram in prepared['bigrams']:
+            posting = self.bigram_postings.get(bigram)
+            if posting is not None:
+                bigram_ids.update(posting)
+
+        trigram_ids = set()
+        for trigram in prepared['trigrams']:
+            posting = self.trigram_postings.get(trigram)
+            if posting is not None:
+                trigram_ids.update(posting)
+
+        return word_counts, bigram_ids, trigram_ids
+
+    def fuzzy_candidates(self, prepared, fuzzy_threshold):
+        """LSH로 추정 유사도가 기준 이상인 패턴 번호 집합"""
+        signature = self.minhasher.text_signature(prepared['cleaned'])
+        signatures = self.signatures
+        return {
+            pattern_id for pattern_id in self.lsh.query(signature)
+            if estimate_jaccard(signature, signatures[pattern_id]) >= fuzzy_threshold
+        }
+
+    def prepare(self, input_text, fuzzy_threshold=None):
+        """입력 전처리와 오토마톤/역색인 조회를 한 번에 수행"""
+        prepared = prepare_input(input_text)
+        prepared['hits'] = self.find_hits(prepared)
+        prepared['partial_ids'] = self.partial_pattern_ids(prepared['hits'])
+        (prepared['word_counts'],
+         prepared['bigram_ids'],
+         prepared['trigram_ids']) = self.token_features(prepared)
+        prepared['fuzzy_ids'] = (None if fuzzy_threshold is None
+                                 else self.fuzzy_candidates(prepared, fuzzy_threshold))
+        return prepared
+
+    def candidates(self, prepared, threshold):
+        """점수 계산이 필요한 후보 패턴 번호 (정렬된 목록)
+
+        공통 토큰도 없고 오토마톤 일치도 없는 패턴은 텍스트 유사도(최대 0.5점)만
+        얻을 수 있으므로, 임계값이 그보다 높으면 방문하지 않는다.
+        """
+        if threshold <= 0.5 / SCORE_NORMALIZER:
+            return range(len(self.patterns))
+        hits = prepared['hits']
+        candidate_ids = set(prepared['word_counts'])
+        candidate_ids.update(hits['exact'])
+        candidate_ids.update(hits['continuous'])
+        candidate_ids.update(prepared['partial_ids'])
+        return sorted(candidate_ids)
+
+    def score(self, prepared, pattern_id, threshold, stats=None):
+        """입력과 패턴 하나의 매칭 점수 계산 (임계값 미달이면 None)
+
+        계산 비용이 낮은 항목부터 평가하고, 단계마다 도달 가능한 최대 점수가
+        임계값에 못 미치면(완화 조건도 불가능하면) 즉시 탈락시킨다.
+        """
+        pattern = self.patterns[pattern_id]
+        hits = prepared['hits']
+
+        # 1단계: 오토마톤/역색인 조회 결과만으로 계산되는 항목
+        exact_match = pattern_id in hits['exact']
+        continuous_match = pattern_id in hits['continuous']
+        partial_match = pattern_id in prepared['partial_ids']
+        bigram_match = pattern_id in prepared['bigram_ids']
+        trigram_match = pattern_id in prepared['trigram_ids']
+        word_similarity = prepared['word_counts'].get(pattern_id, 0) / len(pattern['words'])
+
+        # 완화 조건 충족 시 점수와 무관하게 결과에 포함 (점수 계산은 필요)
+        forced = exact_match or continuous_match or (bigram_match and word_similarity > 0.3)
+        base_points = (exact_match * 1.0 + continuous_match * 0.9 + bigram_match * 0.8 +
+                       trigram_match * 0.7 + word_similarity * 0.6 + partial_match * 0.4)
+
+        # 2단계: 시퀀스 매칭 (LSH 모드에서는 후보가 아닌 패턴을 0으로 처리)
+        fuzzy_ids = prepared['fuzzy_ids']
+        if fuzzy_ids is None or pattern_id in fuzzy_ids:
+            if not forced and reachable_score(base_points, 1.0) < threshold:
+                add_stat(stats, 'pruned_by_features')
+                return None
+
+            matcher = difflib.SequenceMatcher(None, prepared['cleaned'], pattern['cleaned'])
+            if not forced:
+                if reachable_score(base_points, matcher.real_quick_ratio()) < threshold:
+                    add_stat(stats, 'pruned_by_real_quick_ratio')
+                    return None
+                if reachable_score(base_points, matcher.quick_ratio()) < threshold:
+                    add_stat(stats, 'pruned_by_quick_ratio')
+                    return None
+            text_similarity = matcher.ratio()
+            add_stat(stats, 'ratio_calls')
+        else:
+            text_similarity = 0.0
+
+        found_pattern = self.build_result(prepared, pattern, {
+            'exact_match': exact_match,
+            'continuous_match': continuous_match,
+            'bigram_match': bigram_match,
+            'trigram_match': trigram_match,
+            'word_similarity': word_similarity,
+            'text_similarity': text_similarity,
+            'partial_match': partial_match
+        }, threshold)
+        add_stat(stats, 'rejected_after_ratio' if found_pattern is None else 'matched')
+        return found_pattern
+
+    def build_result(self, prepared, pattern, details, threshold):
+        """매칭 세부 항목으로 최종 점수를 계산하고 결과 딕셔너리 생성"""
+        # 최종 점수 계산 - 다양한 매칭 기준 통합
+        matching_points = sum([
+            details['exact_match'] * 1.0,
+            details['continuous_match'] * 0.9,
+            details['bigram_match'] * 0.8,
+            details['trigram_match'] * 0.7,
+            details['word_similarity'] * 0.6,
+            details['text_similarity'] * 0.5,
+            details['partial_match'] * 0.4
+        ])
+        final_score = matching_points / SCORE_NORMALIZER  # 정규화
+
+        exact_match = details['exact_match']
+        continuous_match = details['continuous_match']
+        # 매칭 조건 완화
+        if not (final_score >= threshold or exact_match or continuous_match or
+                (details['bigram_match'] and details['word_similarity'] > 0.3)):
+            return None
+
+        input_text = prepared['text']
+        matched_keywords = list(prepared['words'] & pattern['words'])
+        found_pattern = {
+            'pattern': pattern['text'],
+            'pattern_id': pattern['id'],
+            'analysis': pattern['analysis'],
+            'danger_level': pattern['danger_level'],
+            'url': pattern['url'],
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'match_score': final_score,
+            'original_text': input_text,
+            'matched_keywords': matched_keywords,
+            'match_spans': match_spans(prepared, pattern['id'], matched_keywords),
+            'text': input_text,
+            'exact_match': exact_match,
+            'continuous_match': continuous_match,
+            'matching_details': details
+        }
+        if pattern['has_thumbnail']:
+            found_pattern['thumbnail'] = pattern['thumbnail']
+        return found_pattern
+
+    def match(self, input_text, threshold=0.5, candidates=None, fuzzy_threshold=None, stats=None):
+        """입력 텍스트와 매칭되는 패턴 목록 반환 (candidates는 패턴 번호 목록)"""
+        if not input_text:
+            return []
+        input_text = str(input_text).strip()
+        if not input_text or input_text.isspace():
+            return []
+
+        prepared = self.prepare(input_text, fuzzy_threshold)
+        targets = self.candidates(prepared, threshold) if candidates is None else candidates
+        if stats is not None:
+            add_stat(stats, 'texts')
+            add_stat(stats, 'candidates', len(targets))
+            add_stat(stats, 'skipped_by_index', len(self.patterns) - len(targets))
+
+        found_patterns = []
+        for pattern_id in targets:
+            found_pattern = self.score(prepared, pattern_id, threshold, stats)
+            if found_pattern is not None:
+                found_patterns.append(found_pattern)
+
+        # 매칭 품질 기반 정렬
+        found_patterns.sort(key=lambda x: (
+            x.get('exact_match', False),
+            x.get('continuous_match', False),
+            x['match_score'],
+            x['danger_level']
+        ), reverse=True)
+        return found_patterns
+
+
+class LivePatternIndex:
+    """레코드 목록이 바뀌면 추가된 레코드만 반영해 인덱스를 교체하는 보관소 (세션 간 공유)
+
+    이전 목록이 새 목록의 앞부분(같은 레코드 객체)이면 뒤에 붙은 레코드만 컴파일한 사본으로 바꾸고,
+    아니면(수정/삭제) 전체를 다시 만든다. 교체 전 인덱스로 진행 중인 검색은 영향을 받지 않는다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = None
+        self.index = None
+
+    def get(self, records):
+        """레코드 목록에 맞는 인덱스"""
+        with self.lock:
+            current = self.records
+            if current is not records:
+                if (current is not None and len(current) <= len(records)
+                        and all(old is new for old, new in zip(current, records))):
+                    if len(records) > len(current):
+                        index = self.index.extended(records[len(current):])
+                        # 추가 오토마톤이 커지면 검색이 느려지므로 한 번 전체를 다시 만듦
+                        if index.extra_patterns > max(EXTRA_PATTERN_LIMIT, len(index) // 20):
+                            index = PatternIndex(records)
+                        self.index = index
+                else:
+                    self.index = PatternIndex(records)
+                self.records = records
+            return self.index
+
+
+def fuzzy_recall_report(index, texts, fuzzy_threshold, threshold=0.5, max_examples=20):
+    """LSH 근사 모드와 전수 비교 모드의 매칭 결과 비교 (임계값 조정용)"""
+    expected = {}
+    found = {}
+    brute_stats = {}
+    fuzzy_stats = {}
+    brute_seconds = 0.0
+    fuzzy_seconds = 0.0
+
+    for text_id, text in enumerate(texts):
+        start = time.perf_counter()
+        for result in index.match(text, threshold, stats=brute_stats):
+            expected[(text_id, result['pattern_id'])] = result['match_score']
+        brute_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for result in index.match(text, threshold, fuzzy_threshold=fuzzy_threshold, stats=fuzzy_stats):
+            found[(text_id, result['pattern_id'])] = result['match_score']
+        fuzzy_seconds += time.perf_counter() - start
+
+    common = expected.keys() & found.keys()
+    missed = sorted(expected.keys() - found.keys())
+    score_diffs = [abs(expected[key] - found[key]) for key in common]
+
+    return {
+        'texts': len(texts),
+        'fuzzy_threshold': fuzzy_threshold,
+        'threshold': threshold,
+        'expected_matches': len(expected),
+        'found_matches': len(found),
+        'recall': len(common) / len(expected) if expected else 1.0,
+        'precision': len(common) / len(found) if found else 1.0,
+        'max_score_diff': max(score_diffs, default=0.0),
+        'mean_score_diff': sum(score_diffs) / len(score_diffs) if score_diffs else 0.0,
+        'ratio_calls_brute': brute_stats.get('ratio_calls', 0),
+        'ratio_calls_fuzzy': fuzzy_stats.get('ratio_calls', 0),
+        'brute_seconds': brute_seconds,
+        'fuzzy_seconds': fuzzy_seconds,
+        'missed_examples': [
+            {'text': str(texts[text_id]), 'pattern': index.patterns[pattern_id]['text'],
+             'match_score': expected[(text_id, pattern_id)]}
+            for text_id, pattern_id in missed[:max_examples]
+        ]
+    }
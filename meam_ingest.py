@@ -0,0 +1,359 @@
+import io
+import codecs
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import posixpath
+import xml.etree.ElementTree as ElementTree
+import pandas as pd
+import openpyxl
+
+
+# 한 번에 읽어 들이는 행 수 (메모리 사용량은 이 크기에 비례)
+CHUNK_ROWS = 5000
+
+# ZIP 내부 xlsx를 임시 파일로 옮길 때 메모리에 유지하는 최대 크기
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+# 부분(ZIP 멤버 / 시트) 경로 구분자 - 파일 자체는 빈 문자열
+PART_SEPARATOR = '::'
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def part_name(parent, name):
+    """상위 부분 경로에 하위 이름을 붙인 부분 경로"""
+    return f"{parent}{PART_SEPARATOR}{name}" if parent else name
+
+
+def is_descendant(name, part):
+    """name이 part 자신이거나 그 하위 부분인지 여부"""
+    return part == '' or name == part or name.startswith(part + PART_SEPARATOR)
+
+
+def stream_digest(stream, block_size=1024 * 1024):
+    """스트림 전체 내용의 sha1 (읽은 뒤 처음 위치로 되돌림)"""
+    position = stream.tell()
+    digest = hashlib.sha1()
+    for block in iter(lambda: stream.read(block_size), b''):
+        digest.update(block)
+    stream.seek(position)
+    return digest.hexdigest()
+
+
+def zip_member_digest(info):
+    """ZIP 멤버 내용 해시 - 압축 해제 없이 중앙 디렉터리의 CRC와 크기 사용"""
+    return f"{info.CRC:08x}:{info.file_size}"
+
+
+def string_item_text(element):
+    """공유 문자열(si)/인라인 문자열(is) 요소의 텍스트 - 서식 있는 텍스트는 조각을 잇고 윗주(rPh)는 제외"""
+    texts = []
+    for child in element:
+        if child.tag == f'{SPREADSHEET_NS}t':
+            texts.append(child.text or '')
+        elif child.tag == f'{SPREADSHEET_NS}r':
+            texts.append(child.findtext(f'{SPREADSHEET_NS}t') or '')
+    return ''.join(texts)
+
+
+def shared_strings(package, path):
+    """공유 문자열 목록 (파트가 없으면 빈 목록)"""
+    strings = []
+    if path is None:
+        return strings
+    with package.open(path) as part:
+        for _, element in ElementTree.iterparse(part):
+            if element.tag == f'{SPREADSHEET_NS}si':
+                strings.append(string_item_text(element))
+                element.clear()
+    return strings
+
+
+def sheet_values_digest(package, path, strings):
+    """시트 XML의 셀(위치, 형식, 값 - 공유 문자열은 실제 텍스트로 바꿈) 해시
+
+    공유 문자열 번호가 아니라 텍스트로 해시하므로, 다른 시트의 문자열을 고쳐 sharedStrings.xml이 바뀌거나
+    번호가 다시 매겨져도 이 시트의 값이 같으면 해시도 같다.
+    """
+    digest = hashlib.sha1()
+    with package.open(path) as part:
+        for _, element in ElementTree.iterparse(part):
+            if element.tag == f'{SPREADSHEET_NS}c':
+                kind = element.get('t', 'n')
+                if kind == 's':
+                    index = element.findtext(f'{SPREADSHEET_NS}v') or ''
+                    value = strings[int(index)] if index.isdigit() and int(index) < len(strings) else ''
+                elif kind == 'inlineStr':
+                    inline = element.find(f'{SPREADSHEET_NS}is')
+                    value = string_item_text(inline) if inline is not None else ''
+                else:
+                    value = element.findtext(f'{SPREADSHEET_NS}v') or ''
+                digest.update(f"{element.get('r', '')}\x1f{kind}\x1f{value}\x1e".encode('utf-8'))
+                element.clear()
+            elif element.tag == f'{SPREADSHEET_NS}row':
+                element.clear()
+    return digest.hexdigest()
+
+
+def sheet_digests(stream):
+    """xlsx 시트별 내용 해시 {시트 이름: 해시} (시트 순서 유지, 판별할 수 없으면 빈 딕셔너리)
+
+    시트마다 셀 값(공유 문자열은 텍스트로 풀어서)을 해시하고 스타일 파트의 CRC를 더한다
+    (숫자 서식이 바뀌면 날짜 셀의 읽은 값이 달라지므로). 한 시트의 문자열만 고치면 그 시트의 해시만 바뀐다.
+    """
+    position = stream.tell()
+    try:
+        with zipfile.ZipFile(stream) as package:
+            members = {info.filename: info for info in package.infolist()}
+            relationships = ElementTree.fromstring(package.read('xl/_rels/workbook.xml.rels'))
+            targets = {}
+            strings_path = None
+            styles_paths = []
+            for relation in relationships.iter(f'{PACKAGE_RELATIONSHIP_NS}Relationship'):
+                target = relation.get('Target', '')
+                path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+                targets[relation.get('Id')] = path
+                if relation.get('Type', '').endswith('/sharedStrings') and path in members:
+                    strings_path = path
+                elif relation.get('Type', '').endswith('/styles') and path in members:
+                    styles_paths.append(path)
+
+            styles = ':'.join(zip_member_digest(members[path]) for path in sorted(styles_paths))
+            workbook = ElementTree.fromstring(package.read('xl/workbook.xml'))
+            sheets = []
+            for sheet in workbook.iter(f'{SPREADSHEET_NS}sheet'):
+                path = targets.get(sheet.get(f'{RELATIONSHIP_NS}id'))
+                if path not in members:
+                    return {}
+                sheets.append((sheet.get('name'), path))
+
+            strings = shared_strings(package, strings_path)
+            return {name: f"{styles}|{sheet_values_digest(package, path, strings)}" for name, path in sheets}
+    except (zipfile.BadZipFile, KeyError, ValueError, ElementTree.ParseError):
+        return {}
+    finally:
+        stream.seek(position)
+
+
+class CsvTextReader(io.TextIOBase):
+    """CSV 바이트 스트림을 점진적으로 디코딩하는 텍스트 스트림
+
+    utf-8로 읽다가 utf-8이 아닌 바이트가 나오면 그 지점부터 cp949(euc-kr 확장)로 디코딩한다.
+    앞부분만 보고 인코딩을 정하면 뒤쪽의 euc-kr 바이트에서 읽기가 중간에 실패하므로 파일 끝까지 같은 방식으로 읽는다.
+    """
+
+    def __init__(self, stream, block_size=65536):
+        self.stream = stream
+        self.block_size = block_size
+        self.encoding_name = 'utf-8'
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def decode(self, data, final):
+        if isinstance(data, str):
+            return data
+        try:
+            return self.decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            if self.encoding_name != 'utf-8':
+                raise
+            # e.object는 디코더에 남아 있던 바이트를 포함한 입력 - 오류 위치 앞까지는 올바른 utf-8
+            text = e.object[:e.start].decode('utf-8')
+            self.encoding_name = 'cp949'
+            self.decoder = codecs.getincrementaldecoder('cp949')()
+            return text + self.decoder.decode(e.object[e.start:], final)
+
+    def read(self, size=-1):
+        size = -1 if size is None else size
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            block = self.stream.read(self.block_size)
+            self.eof = not block
+            self.buffer += self.decode(block, self.eof)
+        if size < 0:
+            text, self.buffer = self.buffer, ''
+        else:
+            text, self.buffer = self.buffer[:size], self.buffer[size:]
+        return text
+
+
+def header_names(row):
+    """엑셀 첫 행을 pandas와 같은 규칙의 컬럼 이름으로 변환"""
+    names = []
+    seen = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None or str(value) == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def cell_text(value):
+    """셀 값을 문자열로 변환 (빈 셀은 None)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value if value != '' else None
+    return str(value)
+
+
+def make_batch(frame, source_file, sheet_name, progress, part=''):
+    """행 배치 딕셔너리 생성"""
+    return {
+        'frame': frame,
+        'source_file': source_file,
+        'sheet_name': sheet_name,
+        'progress': progress,
+        'part': part
+    }
+
+
+def iter_csv(stream, source_file, progress_range=(0.0, 1.0), total_bytes=None, chunk_rows=CHUNK_ROWS, part=''):
+    """CSV를 chunksize 단위로 읽어 행 배치 생성 (utf-8, 중간부터 euc-kr이면 cp949로 전환)"""
+    start, end = progress_range
+    reader = pd.read_csv(CsvTextReader(stream), dtype=str, engine='c', chunksize=chunk_rows)
+    for frame in reader:
+        progress = start
+        if total_bytes and stream.seekable():
+            try:
+                progress = start + (end - start) * min(stream.tell() / total_bytes, 1.0)
+            except (OSError, ValueError):
+                pass
+        yield make_batch(frame, source_file, None, progress, part)
+
+
+def iter_workbook(stream, source_file, progress_range=(0.0, 1.0), chunk_rows=CHUNK_ROWS,
+                  include_sheet_in_source=True, part='', unchanged=None):
+    """openpyxl read_only 모드로 시트별 행을 순차적으로 읽어 행 배치 생성
+
+    unchanged(부분 경로, 해시)가 True를 반환한 시트는 읽지 않는다.
+    """
+    start, end = progress_range
+    digests = sheet_digests(stream) if unchanged is not None else {}
+    skipped = {sheet_name for sheet_name, digest in digests.items()
+               if unchanged(part_name(part, sheet_name), digest)}
+    if digests and len(skipped) == len(digests):
+        return
+
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet_names = workbook.sheetnames
+        for sheet_index, sheet_name in enumerate(sheet_names):
+            if sheet_name in skipped:
+                continue
+            worksheet = workbook[sheet_name]
+            sheet_source = f"{source_file} - {sheet_name}" if include_sheet_in_source else source_file
+            sheet_part = part_name(part, sheet_name)
+            progress = start + (end - start) * (sheet_index + 1) / len(sheet_names)
+
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = header_names(header)
+
+            # 인덱스는 csv 청크와 같이 시트 첫 데이터 행부터 이어지는 번호
+            chunk = []
+            row_offset = 0
+            for row in rows:
+                values = [cell_text(value) for value in row[:len(columns)]]
+                if len(values) < len(columns):
+                    values.extend([None] * (len(columns) - len(values)))
+                chunk.append(values)
+                if len(chunk) >= chunk_rows:
+                    frame = pd.DataFrame(chunk, columns=columns, dtype=object,
+                                         index=range(row_offset, row_offset + len(chunk)))
+                    yield make_batch(frame, sheet_source, sheet_name, progress, sheet_part)
+                    row_offset += len(chunk)
+                    chunk = []
+            if chunk:
+                frame = pd.DataFrame(chunk, columns=columns, dtype=object,
+                                     index=range(row_offset, row_offset + len(chunk)))
+                yield make_batch(frame, sheet_source, sheet_name, progress, sheet_part)
+    finally:
+        workbook.close()
+
+
+def iter_zip(stream, filename, chunk_rows=CHUNK_ROWS, on_error=None, unchanged=None):
+    """ZIP 내부 파일을 하나씩 압축 해제하며 행 배치 생성 (전체를 메모리에 올리지 않음)"""
+    with zipfile.ZipFile(stream) as archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and info.filename.endswith(SUPPORTED_EXTENSIONS)]
+        for member_index, info in enumerate(members):
+            if unchanged is not None and unchanged(info.filename, zip_member_digest(info)):
+                continue
+            member_range = (member_index / len(members), (member_index + 1) / len(members))
+            source_file = f"{filename} - {info.filename}"
+            try:
+                if info.filename.endswith('.csv'):
+                    with archive.open(info) as member:
+                        yield from iter_csv(member, source_file, member_range, info.file_size, chunk_rows,
+                                            part=info.filename)
+                else:
+                    # openpyxl은 임의 접근이 필요하므로 크기 제한 임시 파일로 옮긴 뒤 읽음
+                    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+                        with archive.open(info) as member:
+                            shutil.copyfileobj(member, spool)
+                        spool.seek(0)
+                        yield from iter_workbook(spool, source_file, member_range, chunk_rows,
+                                                 include_sheet_in_source=False, part=info.filename,
+                                                 unchanged=unchanged)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(f"ZIP 내부 파일 '{info.filename}' 처리 중 오류: {str(e)}")
+
+
+def iter_row_batches(file_content, filename=None, chunk_rows=CHUNK_ROWS, on_error=None, unchanged=None):
+    """업로드 파일(csv/xlsx/xls/zip)을 행 배치 단위로 순차 생성
+
+    각 배치는 {'frame', 'source_file', 'sheet_name', 'progress', 'part'} 딕셔너리이며,
+    progress는 파일 전체 기준 대략적인 진행률(0~1)이다.
+    frame 인덱스는 헤더를 제외한 0부터의 행 번호로, 청크가 바뀌어도 이어진다.
+
+    unchanged(부분 경로, 해시)가 주어지면 파일('') → ZIP 멤버 → 시트 순으로 내용 해시를 넘기고,
+    True를 반환한 부분(및 그 하위 부분)은 읽지 않는다. part는 결과가 속한 가장 하위 부분 경로이다.
+    """
+    filename = filename or getattr(file_content, 'name', '알 수 없는 파일')
+    file_type = filename.split('.')[-1].lower()
+
+    if unchanged is not None and file_content.seekable():
+        if unchanged('', stream_digest(file_content)):
+            return
+
+    if file_type == 'csv':
+        total_bytes = getattr(file_content, 'size', None)
+        if total_bytes is None and file_content.seekable():
+            position = file_content.tell()
+            total_bytes = file_content.seek(0, 2)
+            file_content.seek(position)
+        try:
+            yield from iter_csv(file_content, filename, (0.0, 1.0), total_bytes, chunk_rows)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(f"CSV 파일 '{filename}' 처리 중 오류: {str(e)}")
+
+    elif file_type in ['xlsx', 'xls']:
+        try:
+            yield from iter_workbook(file_content, filename, (0.0, 1.0), chunk_rows, unchanged=unchanged)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(f"엑셀 파일 '{filename}' 처리 중 오류: {str(e)}")
+
+    elif file_type == 'zip':
+        yield from iter_zip(file_content, filename, chunk_rows, on_error, unchanged)
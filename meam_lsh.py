@@ -0,0 +1,153 @@
+import zlib
+import numpy as np
+
+
+# MinHash 기본 설정 (밴드 32개 x 행 2개 = 순열 64개, 낮은 유사도까지 후보로 회수)
+NUM_PERM = 64
+LSH_BANDS = 32
+SHINGLE_SIZE = 2
+
+# 결과 묶기(유사도 0.9 이상)용 설정 (밴드 21개 x 행 3개 - 겹치는 글자가 적은 쌍은 후보에서 대부분 제외)
+GROUP_NUM_PERM = 63
+GROUP_BANDS = 21
+
+# 2^32보다 큰 소수 - uint64 연산 범위 안에서 해시 계산
+MERSENNE_PRIME = np.uint64(4294967311)
+MAX_HASH = np.uint64(4294967295)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """공백을 제거한 문자열의 글자(음절) n-gram 집합"""
+    compact = ''.join(str(text).split())
+    if len(compact) <= size:
+        return {compact} if compact else set()
+    return {compact[i:i + size] for i in range(len(compact) - size + 1)}
+
+
+class MinHasher:
+    """문자 shingle 집합의 MinHash 서명 생성기"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = generator.randint(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        """shingle 집합의 MinHash 서명 (빈 집합은 최대값 서명)"""
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set)
+        )
+        values = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME
+        return values.min(axis=1)
+
+    def text_signature(self, text):
+        """텍스트의 MinHash 서명"""
+        return self.signature(shingles(text))
+
+
+def estimate_jaccard(signature, other):
+    """두 MinHash 서명으로 추정한 Jaccard 유사도"""
+    return float(np.count_nonzero(signature == other)) / len(signature)
+
+
+class LSHIndex:
+    """MinHash 서명을 밴드 단위 버킷으로 묶는 LSH 색인"""
+
+    def __init__(self, num_perm=NUM_PERM, bands=LSH_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands의 배수여야 합니다.")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        # 사본은 버킷 목록을 원본과 공유하므로 추가할 때 새 목록으로 교체
+        self.shared = False
+
+    def band_keys(self, signature):
+        """서명을 밴드별 버킷 키로 분할"""
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key, signature):
+        """서명 등록"""
+        for band, band_key in zip(self.buckets, self.band_keys(signature)):
+            if self.shared:
+                band[band_key] = band.get(band_key, []) + [key]
+            else:
+                band.setdefault(band_key, []).append(key)
+
+    def copy(self):
+        """독립적으로 서명을 추가할 수 있는 사본 (버킷 목록은 원본과 공유)"""
+        other = LSHIndex.__new__(LSHIndex)
+        other.bands = self.bands
+        other.rows = self.rows
+        other.buckets = [dict(band) for band in self.buckets]
+        other.shared = True
+        return other
+
+    def query(self, signature):
+        """한 밴드 이상 버킷이 겹치는 키 집합"""
+        found = set()
+        for band, band_key in zip(self.buckets, self.band_keys(signature)):
+            keys = band.get(band_key)
+            if keys:
+                found.update(keys)
+        return found
+
+
+class UnionFind:
+    """항목 번호 집합의 연결 요소 (경로 절반 압축 + 크기 기준 합치기)"""
+
+    def __init__(self, count):
+        self.parent = list(range(count))
+        self.size = [1] * count
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item, other):
+        root, other_root = self.find(item), self.find(other)
+        if root == other_root:
+            return
+        if self.size[root] < self.size[other_root]:
+            root, other_root = other_root, root
+        self.parent[other_root] = root
+        self.size[root] += self.size[other_root]
+
+
+def near_duplicate_groups(items, is_similar, num_perm=GROUP_NUM_PERM, bands=GROUP_BANDS):
+    """어느 한 필드라도 is_similar(앞 항목 값, 뒤 항목 값)인 항목끼리 이어 붙인 그룹 목록
+
+    items[i]는 항목별 비교 문자열 튜플이다. 필드마다 같은 값은 바로 묶고, 서로 다른 값은 LSH 버킷이 겹치고
+    아직 같은 그룹이 아닌 쌍만 is_similar로 확인한다. 그룹은 항목 번호 오름차순, 첫 항목 순서로 반환한다.
+    """
+    groups = UnionFind(len(items))
+    hasher = MinHasher(num_perm)
+    for field in range(len(items[0]) if items else 0):
+        first = {}
+        for i, item in enumerate(items):
+            value = item[field]
+            if value in first:
+                groups.union(first[value], i)
+            else:
+                first[value] = i
+
+        lsh = LSHIndex(num_perm, bands)
+        for value, i in first.items():
+            signature = hasher.text_signature(value)
+            for j in lsh.query(signature):
+                if groups.find(i) != groups.find(j) and is_similar(items[j][field], value):
+                    groups.union(j, i)
+            lsh.add(i, signature)
+
+    members = {}
+    for i in range(len(items)):
+        members.setdefault(groups.find(i), []).append(i)
+    return list(members.values())
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from meam_cache import CACHE_PATH
+from meam_ingest import is_descendant
+
+
+# 파일/ZIP 멤버/시트별 내용 해시와 검사 결과를 보관하는 위치와 최대 파일 수
+MANIFEST_PATH = os.environ.get(
+    'MEAM_MANIFEST_PATH',
+    os.path.join(os.path.dirname(CACHE_PATH), 'manifests.sqlite')
+)
+MANIFEST_MAX_FILES = int(os.environ.get('MEAM_MANIFEST_MAX_FILES', 200))
+
+# 결과를 JSON으로 변환해 두는 단위
+SERIALIZE_BLOCK = 1000
+
+
+class ScanManifest:
+    """업로드 파일별 부분(ZIP 멤버/시트) 해시 목록과 부분별 검사 결과 저장소 (SQLite)"""
+
+    def __init__(self, path=MANIFEST_PATH, max_files=MANIFEST_MAX_FILES):
+        self.path = path
+        self.max_files = max_files
+        self.lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # 컬럼 해시를 보관하던 이전 형식의 표는 다시 만듦 (재사용 결과만 잃음)
+        if 'columns' in {row[1] for row in self.conn.execute("PRAGMA table_info(parts)")}:
+            self.conn.execute("DROP TABLE parts")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS parts (
+                file_key TEXT NOT NULL,
+                part TEXT NOT NULL,
+                context TEXT NOT NULL,
+                digest TEXT,
+                cells INTEGER NOT NULL,
+                results TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (file_key, part)
+            )
+        """)
+        self.conn.commit()
+
+    def load(self, file_key, context):
+        """파일의 이전 부분 목록 {부분: 항목} (현재 패턴/규칙 버전으로 만든 항목만)"""
+        with self.lock:
+            try:
+                rows = self.conn.execute(
+                    "SELECT part, digest, cells, results FROM parts "
+                    "WHERE file_key = ? AND context = ?", (file_key, context)
+                ).fetchall()
+            except sqlite3.Error:
+                return {}
+        # 결과는 재사용할 때만 풀도록 JSON 문자열 그대로 보관
+        return {
+            part: {
+                'digest': digest,
+                'cells': cells,
+                'results': results
+            }
+            for part, digest, cells, results in rows
+        }
+
+    def save(self, file_key, context, parts):
+        """파일의 부분 목록 전체 교체 - 오래된 파일부터 최대 파일 수를 넘는 만큼 삭제
+
+        parts 항목의 results는 결과 JSON 배열 문자열 또는 결과 JSON 조각(쉼표로 이을 수 있는 결과 목록) 목록이다.
+        """
+        now = time.time()
+        rows = [
+            (file_key, part, context, entry['digest'], entry['cells'],
+             entry['results'] if isinstance(entry['results'], str) else '[' + ','.join(entry['results']) + ']',
+             now)
+            for part, entry in parts.items()
+        ]
+        with self.lock:
+            try:
+                self.conn.execute("DELETE FROM parts WHERE file_key = ?", (file_key,))
+                self.conn.executemany(
+                    "INSERT INTO parts (file_key, part, context, digest, cells, results, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self.conn.execute("""
+                    DELETE FROM parts WHERE file_key IN (
+                        SELECT file_key FROM parts GROUP BY file_key
+                        ORDER BY MAX(updated) DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_files,))
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+
+
+class IncrementalScan:
+    """한 번의 파일 분석에서 부분별 해시/셀 수/결과를 모으고 변경 없는 부분은 이전 결과 재사용
+
+    바뀐 부분 안에서 그대로인 셀은 결과 캐시(텍스트별)가 다시 매칭하지 않게 해 주므로 컬럼 단위로는 따로 비교하지 않는다.
+    """
+
+    def __init__(self, manifest, file_key, context):
+        self.manifest = manifest
+        self.file_key = file_key
+        self.context = context
+        self.previous = manifest.load(file_key, context) if manifest is not None else {}
+        self.parts = {}
+        self.reused = []
+        self.pending_results = {}
+        self.complete = True
+
+    def entry(self, part):
+        """현재 분석의 부분 항목 (없으면 생성)"""
+        if part not in self.parts:
+            self.parts[part] = {'digest': None, 'cells': 0, 'results': []}
+        return self.parts[part]
+
+    def unchanged(self, part, digest):
+        """부분 해시가 이전과 같으면 그 부분과 하위 부분의 이전 항목을 가져오고 True 반환"""
+        previous = self.previous.get(part)
+        if previous is None or previous['digest'] != digest:
+            self.entry(part)['digest'] = digest
+            return False
+
+        for name, entry in self.previous.items():
+            if is_descendant(name, part) and name not in self.parts:
+                self.parts[name] = entry
+                self.reused.append(name)
+        return True
+
+    def add_rows(self, part, frame):
+        """읽은 행 배치의 셀 수 누적"""
+        self.entry(part)['cells'] += int(frame.notna().sum().sum())
+
+    def add_result(self, result):
+        """새로 검사한 결과를 부분 경로별로 보관 (일정 개수마다 저장용 JSON 조각으로 변환해 메모리 사용을 줄임)"""
+        entry = self.entry(result.get('part', ''))
+        pending = self.pending_results.setdefault(result.get('part', ''), [])
+        pending.append(result)
+        if len(pending) >= SERIALIZE_BLOCK:
+            self.flush_results(entry, pending)
+
+    def flush_results(self, entry, pending):
+        """보관 중인 결과를 JSON 조각으로 변환"""
+        try:
+            entry['results'].append(json.dumps(pending, ensure_ascii=False)[1:-1])
+        except (TypeError, ValueError):
+            # 저장할 수 없는 결과가 있으면 다음 분석에서 잘못 재사용하지 않도록 저장하지 않음
+            self.complete = False
+        pending.clear()
+
+    def reused_results(self):
+        """재사용한 부분의 이전 결과 (제너레이터 - 부분 단위로 풀어서 생성)"""
+        for part in self.reused:
+            yield from json.loads(self.parts[part]['results'])
+
+    def reused_cells(self):
+        """재사용한 부분의 셀 수"""
+        return sum(self.parts[part]['cells'] for part in self.reused)
+
+    def finish(self):
+        """결과 확정 후 이전 분석 대비 변경 내역 반환"""
+        for part, pending in self.pending_results.items():
+            if pending:
+                self.flush_results(self.entry(part), pending)
+
+        scanned = [part for part, entry in self.parts.items() if part not in self.reused and entry['cells']]
+        return {
+            'reused_parts': list(self.reused),
+            'scanned_parts': scanned
+        }
+
+    def save(self):
+        """현재 부분 목록을 다음 분석을 위해 저장"""
+        if self.manifest is not None and self.complete:
+            self.manifest.save(self.file_key, self.context, self.parts)
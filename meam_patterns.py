@@ -0,0 +1,283 @@
+import os
+import csv
+import gzip
+import json
+import time
+import tempfile
+import threading
+from gspread.utils import numericise_all
+from meam_cache import CACHE_PATH
+
+
+# 패턴 DB 로컬 스냅샷 위치
+SNAPSHOT_PATH = os.environ.get(
+    'MEAM_PATTERN_SNAPSHOT',
+    os.path.join(os.path.dirname(CACHE_PATH), 'patterns.json.gz')
+)
+
+# 원본 수정 시각을 확인하는 최소 간격 (이 시간 안의 재호출은 보관 중인 레코드를 그대로 반환)
+SYNC_INTERVAL = 300
+
+# 추가된 행만 받는 동기화 사이사이에 전체를 다시 받는 주기 (중간 행 수정/삭제 반영)
+FULL_SYNC_INTERVAL = 3600
+
+SNAPSHOT_FORMAT = 1
+
+
+def trim_row(row):
+    """행 끝의 빈 셀 제거 (스냅샷 크기 축소, 패딩이 다른 응답끼리 비교용)"""
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+def trim_rows(rows):
+    """각 행 끝의 빈 셀과 목록 끝의 빈 행 제거 (중간의 빈 행은 행 번호 유지를 위해 남김)"""
+    rows = [trim_row(row) for row in rows]
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def rows_to_records(header, rows):
+    """헤더와 행 목록을 get_all_records와 같은 규칙(숫자 변환, 빈 셀은 '')의 레코드 목록으로 변환"""
+    width = len(header)
+    records = []
+    for row in rows:
+        row = list(row[:width]) + [''] * (width - len(row))
+        records.append(dict(zip(header, numericise_all(row, False, ''))))
+    return records
+
+
+class SheetPatternSource:
+    """구글 시트 워크시트 패턴 원본 (시트 게이트웨이를 통해 접근)"""
+
+    def __init__(self, gateway, worksheet=0):
+        if gateway is None:
+            raise ValueError("시트에 연결할 수 없습니다.")
+        self.gateway = gateway
+        self.worksheet = worksheet
+
+    def revision(self):
+        """스프레드시트 수정 시각 (Drive 메타데이터)"""
+        return self.gateway.revision()
+
+    def read_all(self):
+        """(헤더, 데이터 행 목록)"""
+        values = self.gateway.read_values(self.worksheet)
+        if not values:
+            return [], []
+        return values[0], values[1:]
+
+    def read_from(self, row_number):
+        """row_number(시트 기준 1부터)행부터 끝까지의 행 목록"""
+        return self.gateway.read_values(self.worksheet, row_number)
+
+    def append_row(self, row):
+        """행 추가 (게이트웨이가 다른 등록과 모아서 보냄)"""
+        self.gateway.append_row(self.worksheet, row)
+
+
+class LocalPatternSource:
+    """로컬 CSV 파일 패턴 원본 - 구글 시트 없이 동기화/등록을 시험할 때 사용"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def revision(self):
+        """파일 수정 시각과 크기"""
+        stat = os.stat(self.path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def read_values(self):
+        """CSV 전체 행 목록"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def read_all(self):
+        """(헤더, 데이터 행 목록)"""
+        values = self.read_values()
+        if not values:
+            return [], []
+        return values[0], values[1:]
+
+    def read_from(self, row_number):
+        """row_number(헤더가 1행)행부터 끝까지의 행 목록"""
+        return self.read_values()[row_number - 1:]
+
+    def append_row(self, row):
+        """행 추가 (시트의 append_row와 같은 역할)"""
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(['' if value is None else value for value in row])
+
+
+def tail_overlap(rows, added):
+    """rows 끝부분과 겹치는 added 앞부분의 길이 (가장 긴 것)"""
+    for count in range(min(len(rows), len(added)), 0, -1):
+        if rows[-count:] == added[:count]:
+            return count
+    return 0
+
+
+def load_snapshot(path):
+    """스냅샷 파일 읽기 (없거나 손상되었으면 None)"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+
+def save_snapshot(path, snapshot):
+    """스냅샷 파일 저장 (임시 파일에 쓴 뒤 교체해 읽는 쪽이 깨진 파일을 보지 않도록 함)"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class PatternStore:
+    """로컬 스냅샷 기반 패턴 DB
+
+    - 시작 시 스냅샷이 있으면 바로 사용하고 동기화는 백그라운드에서 진행
+    - 동기화 시 수정 시각(revision)이 같으면 행을 받지 않음
+    - 바뀌었으면 스냅샷 마지막 행부터 받아, 마지막 행이 그대로면 추가된 행만 반영하고
+      아니면(수정/삭제) 전체를 다시 받음. FULL_SYNC_INTERVAL마다 한 번은 전체를 받음
+    - 원본에 연결할 수 없으면 마지막 스냅샷으로 계속 동작
+    - 행이 추가되기만 했으면 레코드 목록도 기존 레코드 객체 뒤에 새 레코드를 붙인 새 목록이 되어,
+      LivePatternIndex가 추가된 레코드만 인덱스에 반영할 수 있다
+    """
+
+    def __init__(self, source_factory, path=SNAPSHOT_PATH, full_sync_interval=FULL_SYNC_INTERVAL,
+                 sync_interval=SYNC_INTERVAL):
+        self.source_factory = source_factory
+        self.path = path
+        self.full_sync_interval = full_sync_interval
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.thread_lock = threading.Lock()
+        self.snapshot = load_snapshot(path)
+        self.records_cache = None
+        self.sync_thread = None
+        self.last_error = None
+        self.last_sync = None
+        self.last_attempt = None
+
+    def sync(self):
+        """원본과 동기화 - 'unchanged' / 'appended' / 'full' 반환"""
+        with self.lock:
+            source = self.source_factory()
+            revision = source.revision()
+            snapshot = self.snapshot
+            now = time.time()
+            full_due = snapshot is None or now - snapshot['full_synced_at'] >= self.full_sync_interval
+
+            if not full_due and snapshot['revision'] == revision:
+                mode = 'unchanged'
+            elif not full_due and snapshot['rows']:
+                # 마지막으로 알고 있는 행부터 받아 그대로인지 확인 (헤더가 1행)
+                tail = trim_rows(source.read_from(len(snapshot['rows']) + 1))
+                if tail and tail[0] == snapshot['rows'][-1]:
+                    mode = 'appended'
+                    snapshot = dict(snapshot, rows=snapshot['rows'] + tail[1:], revision=revision)
+                else:
+                    mode = 'full'
+            else:
+                mode = 'full'
+
+            if mode == 'full':
+                header, rows = source.read_all()
+                snapshot = {
+                    'format': SNAPSHOT_FORMAT,
+                    'revision': revision,
+                    'header': list(header),
+                    'rows': trim_rows(rows),
+                    'full_synced_at': now
+                }
+
+            if mode != 'unchanged':
+                self.replace_snapshot(snapshot, appended=tail[1:] if mode == 'appended' else None)
+            self.last_error = None
+            self.last_sync = {'mode': mode, 'time': now, 'rows': len(snapshot['rows'])}
+            return mode
+
+    def replace_snapshot(self, snapshot, appended=None):
+        """스냅샷 저장 후 교체 - appended(추가된 행만 있는 경우)면 기존 레코드 목록 뒤에 붙임"""
+        save_snapshot(self.path, snapshot)
+        previous = self.snapshot
+        records_cache = self.records_cache
+        if records_cache is None or records_cache[0] is not previous:
+            self.records_cache = None
+        elif appended is not None:
+            records = records_cache[1] + rows_to_records(snapshot['header'], appended) if appended else records_cache[1]
+            self.records_cache = (snapshot, records)
+        elif snapshot['header'] == previous['header'] and snapshot['rows'] == previous['rows']:
+            # 주기적인 전체 동기화에서 내용이 같으면 레코드(와 인덱스)를 그대로 사용
+            self.records_cache = (snapshot, records_cache[1])
+        else:
+            self.records_cache = None
+        self.snapshot = snapshot
+
+    def append_local(self, rows):
+        """원본에 등록을 마친 행을 다시 받지 않고 스냅샷/레코드에 바로 반영
+
+        수정 시각은 그대로 두므로 다음 동기화에서 원본의 마지막 행과 비교해 다른 등록이 끼어들었으면 전체를 다시 받는다.
+        등록과 반영 사이에 백그라운드 동기화가 이미 받아 간 행(스냅샷 끝과 겹치는 앞부분)은 다시 붙이지 않는다.
+        """
+        rows = trim_rows([['' if value is None else str(value) for value in row] for row in rows])
+        with self.lock:
+            snapshot = self.snapshot
+            if snapshot is None or not rows:
+                return
+            rows = rows[tail_overlap(snapshot['rows'], rows):]
+            if rows:
+                self.replace_snapshot(dict(snapshot, rows=snapshot['rows'] + rows), appended=rows)
+
+    def sync_in_background(self):
+        """백그라운드 동기화 시작 (이미 진행 중이면 무시)"""
+        def run():
+            try:
+                self.sync()
+            except Exception as e:
+                self.last_error = str(e)
+
+        with self.thread_lock:
+            if self.sync_thread is not None and self.sync_thread.is_alive():
+                return
+            self.sync_thread = threading.Thread(target=run, name='pattern-sync', daemon=True)
+            self.sync_thread.start()
+
+    def get_records(self):
+        """패턴 레코드 목록 - 스냅샷이 있으면 항상 즉시 반환하고 sync_interval마다 백그라운드에서 동기화
+
+        스냅샷이 전혀 없을 때(처음 실행)만 동기화가 끝날 때까지 기다린다 (동시에 부른 호출은 한 번만 동기화).
+        반환한 목록은 세션 간에 공유되므로 호출하는 쪽에서 수정하지 않는다.
+        """
+        if self.snapshot is None:
+            with self.thread_lock:
+                if self.snapshot is None:
+                    self.last_attempt = time.time()
+                    self.sync()
+        elif self.last_attempt is None or time.time() - self.last_attempt >= self.sync_interval:
+            self.last_attempt = time.time()
+            self.sync_in_background()
+
+        # 백그라운드 동기화가 스냅샷을 바꿀 수 있으므로 지역 변수로 한 번만 읽음
+        snapshot = self.snapshot
+        records_cache = self.records_cache
+        if records_cache is None or records_cache[0] is not snapshot:
+            records_cache = self.records_cache = (snapshot, rows_to_records(snapshot['header'], snapshot['rows']))
+        return records_cache[1]
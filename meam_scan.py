@@ -0,0 +1,376 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from meam_batch import score_batch, expand_matches
+from meam_index import clean_text
+from meam_spell import check_spelling, rules_version
+
+
+# 워커 프로세스 시작 방식 - 여러 스레드가 도는 Streamlit 서버에서 fork하면 다른 스레드가 잡고 있던 잠금 때문에
+# 워커가 멈출 수 있으므로 forkserver(없으면 spawn)로 시작하고 인덱스/규칙은 initializer 인자로 전달
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# 워커 프로세스가 보관하는 패턴 인덱스와 맞춤법 규칙 (프로세스당 한 번만 전달)
+_worker_state = {}
+
+
+def init_worker(index, rules):
+    """워커 프로세스 초기화 - 인덱스와 규칙을 전역 상태로 보관"""
+    _worker_state['index'] = index
+    _worker_state['rules'] = rules
+
+
+def score_texts(texts, index, rules, threshold=0.5, fuzzy_threshold=None):
+    """텍스트 목록의 패턴 매칭/맞춤법 검사 결과를 압축 튜플로 반환
+
+    반환값: (매칭 튜플 목록, 맞춤법 튜플 목록, 매칭 통계, 처리 시간)
+    - 매칭 튜플: (행, 패턴 번호, 점수, 매칭 플래그, 단어 유사도, 텍스트 유사도)
+    - 맞춤법 튜플: (행, 교정문, 교정 목록)
+    """
+    start = time.perf_counter()
+    stats = {}
+    valid_rows = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    valid_texts = [texts[i] for i in valid_rows]
+
+    matches = score_batch(valid_texts, index, threshold, fuzzy_threshold, stats)
+    match_tuples = [
+        (valid_rows[row], pattern_id, score, flags, word_similarity, text_similarity)
+        for row, pattern_id, score, flags, word_similarity, text_similarity in matches.tolist()
+    ]
+
+    spelling = []
+    if rules:
+        for row in valid_rows:
+            spell_result = check_spelling(texts[row], rules)
+            if spell_result['corrections']:
+                spelling.append((row, spell_result['corrected'], spell_result['corrections']))
+
+    return match_tuples, spelling, stats, time.perf_counter() - start
+
+
+def score_texts_in_worker(texts, threshold=0.5, fuzzy_threshold=None):
+    """워커 프로세스에서 보관 중인 인덱스/규칙으로 score_texts 실행"""
+    return score_texts(texts, _worker_state['index'], _worker_state['rules'], threshold, fuzzy_threshold)
+
+
+def build_scan_results(index, texts, match_tuples, spelling):
+    """압축 튜플 결과를 텍스트별 결과 딕셔너리 목록으로 변환 (위치 정보 제외)
+
+    반환값: {행: [결과 딕셔너리, ...]}
+    """
+    results = {}
+    matching_words_cache = {}
+    for row, found_pattern in expand_matches(texts, index, match_tuples):
+        if row not in matching_words_cache:
+            # 패턴 역색인에 존재하는 입력 단어
+            words = set(clean_text(texts[row].strip()).split())
+            matching_words_cache[row] = index.indexed_words(words)
+        found_pattern['matching_words'] = list(matching_words_cache[row])
+        results.setdefault(row, []).append(found_pattern)
+
+    for row, corrected_text, corrections in spelling:
+        results.setdefault(row, []).append({
+            'text': texts[row],
+            'spelling_errors': corrections,
+            'corrected_text': corrected_text,
+            'is_spell_check': True,
+            'match_score': 1.0,
+            'danger_level': 0
+        })
+    return results
+
+
+def pack_scan_results(texts, match_tuples, spelling):
+    """score_texts 결과를 텍스트별 캐시 값 [(텍스트, [매칭 목록, 맞춤법 또는 None])]으로 변환"""
+    values = [[[], None] for _ in texts]
+    for row, pattern_id, score, flags, word_similarity, text_similarity in match_tuples:
+        values[row][0].append([pattern_id, score, flags, word_similarity, text_similarity])
+    for row, corrected_text, corrections in spelling:
+        values[row][1] = [corrected_text, corrections]
+    return list(zip(texts, values))
+
+
+def unpack_scan_results(values):
+    """캐시 값 목록을 score_texts와 같은 (매칭 튜플, 맞춤법 튜플) 형태로 복원"""
+    match_tuples = []
+    spelling = []
+    for row, (matches, spell) in enumerate(values):
+        for pattern_id, score, flags, word_similarity, text_similarity in matches:
+            match_tuples.append((row, pattern_id, score, flags, word_similarity, text_similarity))
+        if spell is not None:
+            spelling.append((row, spell[0], spell[1]))
+    return match_tuples, spelling
+
+
+def best_per_pattern(results):
+    """같은 패턴 문구의 결과가 여럿이면 위험도, 점수가 높은 것 하나만 남김 (처음 나온 순서 유지)"""
+    best = {}
+    for result in results:
+        current = best.get(result['pattern'])
+        if (current is None or
+                result.get('danger_level', 0) > current.get('danger_level', 0) or
+                (result.get('danger_level', 0) == current.get('danger_level', 0) and
+                 result.get('match_score', 0) > current.get('match_score', 0))):
+            best[result['pattern']] = result
+    return list(best.values())
+
+
+# TextOccurrences - 검사 중인 텍스트 / 읽는 중인 부분이 없음 표시
+PENDING = object()
+NO_PART = object()
+
+
+class TextOccurrences:
+    """파일 전체의 셀 텍스트 중복 제거 - 고유 텍스트만 검사하고 결과를 모든 위치로 전개
+
+    텍스트별로는 압축 결과([매칭 목록, 맞춤법 또는 None], pack_scan_results 형식)만 보관하고, 결과 딕셔너리는
+    부분(ZIP 멤버/시트)을 다 읽고 그 부분의 텍스트 결과가 모두 나왔을 때 completed()에서 만들어 바로 내보낸다.
+    위치 목록도 부분 단위로 보관했다가 전개 후 버리므로, 메모리는 파일 전체가 아닌 부분 하나의 결과 위치에 비례한다.
+    """
+
+    def __init__(self):
+        self.group_ids = {}
+        self.groups = []
+        # 텍스트 -> 압축 결과 (결과 없음은 None, 검사 중은 PENDING)
+        self.values = {}
+        # 부분 -> {텍스트: [(위치 그룹 번호, 행 번호)]} (결과가 없는 텍스트는 제외)
+        self.locations = {}
+        # 부분 -> 결과를 기다리는 텍스트, 텍스트 -> 기다리는 부분
+        self.waiting = {}
+        self.waiting_parts = {}
+        self.reading = NO_PART
+        self.read_parts = []
+        self.hits = 0
+        self.cells = 0
+        self.duplicates = 0
+
+    def add(self, text, source_file, sheet_name, column, row, part=''):
+        """셀 위치 등록 - 처음 보는 텍스트면 True (검사 대상)"""
+        self.cells += 1
+        if part != self.reading:
+            self.finish_reading()
+            self.reading = part
+        group = (source_file, sheet_name, column, part)
+        group_id = self.group_ids.get(group)
+        if group_id is None:
+            group_id = self.group_ids[group] = len(self.groups)
+            self.groups.append(group)
+
+        new = text not in self.values
+        if new:
+            self.values[text] = value = PENDING
+        else:
+            self.duplicates += 1
+            value = self.values[text]
+            if value is None:
+                return False
+
+        self.locations.setdefault(part, {}).setdefault(text, []).append((group_id, row))
+        if value is PENDING:
+            self.waiting.setdefault(part, set()).add(text)
+            self.waiting_parts.setdefault(text, set()).add(part)
+        return new
+
+    def set_results(self, text, value):
+        """고유 텍스트의 압축 검사 결과 저장 (결과가 없으면 위치 목록을 버림)"""
+        has_results = value is not None and bool(value[0] or value[1])
+        self.values[text] = value if has_results else None
+        if has_results:
+            self.hits += 1
+        for part in self.waiting_parts.pop(text, ()):
+            self.waiting[part].discard(text)
+            if not has_results:
+                self.locations[part].pop(text, None)
+
+    def finish_reading(self):
+        """읽는 중인 부분을 다 읽은 것으로 표시 (파일 끝에서도 호출)"""
+        if self.reading is not NO_PART:
+            self.read_parts.append(self.reading)
+            self.reading = NO_PART
+
+    def completed(self, index):
+        """다 읽었고 모든 텍스트의 결과가 나온 부분의 위치 단위 결과 (제너레이터, 부분은 한 번만 전개)"""
+        for part in list(self.read_parts):
+            if self.waiting.get(part):
+                continue
+            self.read_parts.remove(part)
+            self.waiting.pop(part, None)
+            yield from self.expand(index, self.locations.pop(part, {}))
+
+    def locate(self, results, group_id, rows):
+        """텍스트 결과에 위치 정보(파일, 시트, 컬럼, 부분, 출현 횟수, 행 번호)를 붙여 생성"""
+        source_file, sheet_name, column, part = self.groups[group_id]
+        for result in results:
+            located = dict(result)
+            located.update({
+                'source_file': source_file,
+                'column': column,
+                'part': part,
+                'occurrences': len(rows),
+                'rows': rows
+            })
+            if sheet_name is not None or result.get('is_spell_check'):
+                located['sheet_name'] = sheet_name
+            yield located
+
+    def expand(self, index, locations):
+        """부분 하나의 텍스트별 결과를 (파일, 시트, 컬럼, 부분) 위치 단위 결과로 전개 (제너레이터)
+
+        패턴 매칭은 앞뒤 공백을 제외한 텍스트로 하므로, 공백만 다른 셀들의 매칭 결과는
+        위치마다 하나로 합친다. 한 위치의 결과는 연속으로 생성된다.
+        """
+        texts = list(locations)
+        match_tuples, spelling = unpack_scan_results([self.values[text] for text in texts])
+        text_results = build_scan_results(index, texts, match_tuples, spelling)
+
+        variants = {}
+        for row, text in enumerate(texts):
+            variants.setdefault(text.strip(), []).append(row)
+
+        for rows_of_texts in variants.values():
+            match_results = []
+            match_rows = {}
+            for row in rows_of_texts:
+                results = text_results.get(row, [])
+                if not match_results:
+                    match_results = best_per_pattern(result for result in results if not result.get('is_spell_check'))
+                spell_results = [result for result in results if result.get('is_spell_check')]
+
+                rows_by_group = {}
+                for group_id, cell_row in locations[texts[row]]:
+                    rows_by_group.setdefault(group_id, []).append(cell_row)
+                for group_id, rows in rows_by_group.items():
+                    yield from self.locate(spell_results, group_id, rows)
+                    match_rows.setdefault(group_id, []).extend(rows)
+
+            for group_id, rows in match_rows.items():
+                yield from self.locate(match_results, group_id, sorted(rows))
+
+
+class OccurrenceCounter:
+    """결과 텍스트별 파일 전체 출현 횟수(total_occurrences) 집계
+
+    한 위치의 결과는 연속으로 들어오므로 직전 위치와 같으면 다시 더하지 않는다.
+    맞춤법 결과는 원문, 패턴 결과는 공백 제거 텍스트 기준으로 따로 센다.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.last_location = None
+
+    @staticmethod
+    def key(result):
+        """집계 키 (맞춤법 여부, 텍스트)"""
+        return (bool(result.get('is_spell_check')), result['text'])
+
+    def add(self, result):
+        """위치 결과 하나 반영"""
+        if 'occurrences' not in result:
+            return
+        key = self.key(result)
+        location = (key, result.get('source_file'), result.get('sheet_name'), result.get('column'), result.get('part'))
+        if location == self.last_location:
+            return
+        self.last_location = location
+        self.totals[key] = self.totals.get(key, 0) + result['occurrences']
+
+    def apply(self, results):
+        """결과 목록에 전체 출현 횟수 기록"""
+        for result in results:
+            if 'occurrences' in result:
+                result['total_occurrences'] = self.totals.get(self.key(result), result['occurrences'])
+
+
+class AdaptiveBatchSizer:
+    """측정된 처리 속도로 배치 하나가 목표 시간 안에 끝나도록 크기 조정"""
+
+    def __init__(self, initial=500, minimum=100, maximum=20000, target_seconds=0.5):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.rate = None
+
+    def update(self, rows, seconds):
+        """완료된 배치의 행 수와 처리 시간 반영 (지수 이동 평균)"""
+        if rows <= 0 or seconds <= 0:
+            return
+        rate = rows / seconds
+        self.rate = rate if self.rate is None else 0.7 * self.rate + 0.3 * rate
+        self.size = int(min(max(self.rate * self.target_seconds, self.minimum), self.maximum))
+
+
+class ScanPool:
+    """패턴 인덱스/규칙 버전별 프로세스 풀 (재실행 간 재사용, 여러 세션이 공유)
+
+    검사는 acquire()로 현재 버전의 실행기를 빌리고 끝나면 release()로 돌려준다. 버전이 바뀌면 새 풀을 만들고,
+    이전 풀은 빌려 간 검사가 모두 돌려줄 때까지 두었다가 종료하므로 다른 세션의 진행 중인 검사는 취소되지 않는다.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.key = None
+        self.executor = None
+        self.users = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, index, rules):
+        """현재 버전의 실행기 빌리기 (버전이 바뀌면 새 풀을 시작)"""
+        key = (index.version, rules_version(rules))
+        with self.lock:
+            if self.executor is None or self.key != key:
+                self.retire()
+                context = multiprocessing.get_context(START_METHOD)
+                if START_METHOD == 'forkserver':
+                    # 워커마다 모듈을 다시 가져오지 않도록 forkserver에서 미리 가져옴
+                    context.set_forkserver_preload(['meam_scan'])
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=init_worker,
+                    initargs=(index, rules)
+                )
+                self.key = key
+            self.users[self.executor] = self.users.get(self.executor, 0) + 1
+            return self.executor
+
+    def release(self, executor):
+        """빌린 실행기 돌려주기 - 이전 버전 풀을 마지막으로 쓰던 검사였으면 그 풀을 종료"""
+        with self.lock:
+            count = self.users.get(executor, 0) - 1
+            if count > 0:
+                self.users[executor] = count
+                return
+            self.users.pop(executor, None)
+            if executor is not self.executor:
+                executor.shutdown(wait=False)
+
+    def retire(self):
+        """현재 풀을 새 검사에 주지 않음 - 빌려 간 검사가 없으면 바로 종료 (잠금을 잡은 상태에서 호출)"""
+        if self.executor is not None:
+            if not self.users.get(self.executor):
+                self.executor.shutdown(wait=False)
+            self.executor = None
+            self.key = None
+
+    def discard(self, executor):
+        """워커가 비정상 종료된 풀 버리기 - 다음 검사는 새 풀로"""
+        with self.lock:
+            if executor is self.executor:
+                self.executor = None
+                self.key = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait=False):
+        """모든 풀 종료 (프로그램 종료 시에는 wait=True로 워커 종료까지 대기)"""
+        with self.lock:
+            executors = set(self.users)
+            if self.executor is not None:
+                executors.add(self.executor)
+            self.executor = None
+            self.key = None
+            self.users = {}
+        for executor in executors:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from meam_batch import expand_matches, score_batch
+from meam_cli import load_patterns, load_rules
+from meam_index import PatternIndex, merge_stats
+from meam_spell import check_spelling, rules_version
+
+
+# 요청을 모으는 최대 대기 시간(초)과 한 배치의 최대 텍스트 수
+BATCH_WINDOW = 0.005
+MAX_BATCH = 256
+
+# 패턴/규칙 파일 변경 확인 간격(초)
+RELOAD_INTERVAL = 5.0
+
+# 지연 시간 백분위 계산에 쓰는 최근 요청 수
+LATENCY_WINDOW = 10000
+
+# 한 요청 본문 최대 크기와 일괄 요청의 최대 텍스트 수
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_BULK_TEXTS = 10000
+
+# 처리를 기다리는 텍스트 최대 수 - 넘으면 새 요청은 503으로 거절
+MAX_QUEUE = 5 * MAX_BULK_TEXTS
+
+# analyze_text_with_spelling과 같은 기본 매칭 점수 기준
+DEFAULT_THRESHOLD = 0.7
+
+
+def file_signature(path):
+    """파일 변경 확인용 (수정 시각, 크기) - 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class LatencyRecorder:
+    """엔드포인트별 최근 요청 지연 시간(초)과 백분위"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(seconds)
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def summary(self):
+        """{엔드포인트: {'count', 'p50_ms', 'p99_ms', 'max_ms'}}"""
+        with self.lock:
+            snapshot = {name: sorted(samples) for name, samples in self.samples.items()}
+            counts = dict(self.counts)
+        summary = {}
+        for name, samples in snapshot.items():
+            if not samples:
+                continue
+            summary[name] = {
+                'count': counts[name],
+                'p50_ms': round(samples[int(0.50 * (len(samples) - 1))] * 1000, 3),
+                'p99_ms': round(samples[int(0.99 * (len(samples) - 1))] * 1000, 3),
+                'max_ms': round(samples[-1] * 1000, 3)
+            }
+        return summary
+
+
+class ScoringService:
+    """패턴 인덱스와 맞춤법 규칙을 메모리에 두고 텍스트 위험도/맞춤법 분석 (analyze_text_with_spelling과 같은 결과)
+
+    - 동시에 들어온 요청은 BATCH_WINDOW 동안 모아 배치 매칭(score_batch)으로 한 번에 처리
+    - 패턴/규칙 파일이 바뀌면 백그라운드에서 다시 읽고, 인덱스 버전이 바뀐 경우에만 교체
+    """
+
+    def __init__(self, patterns_path, rules_path=None, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH,
+                 reload_interval=RELOAD_INTERVAL, max_queue=MAX_QUEUE):
+        self.patterns_path = patterns_path
+        self.rules_path = rules_path
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.reload_interval = reload_interval
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.latency = LatencyRecorder()
+        self.stats = {'batches': 0, 'batched_texts': 0, 'max_batch': 0, 'reloads': 0, 'reload_errors': 0,
+                      'rejected': 0}
+        self.match_stats = {}
+        self.last_reload_error = None
+        self.lock = threading.Lock()
+        self.signatures = (None, None)
+        self.state = None
+        self.stopped = threading.Event()
+        self.reload()
+        self.threads = [
+            threading.Thread(target=self.run_batches, name='scoring-batches', daemon=True),
+            threading.Thread(target=self.run_reloader, name='scoring-reload', daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def reload(self):
+        """패턴/규칙 파일이 바뀌었으면 다시 읽어 교체 - 교체했으면 True"""
+        signatures = (file_signature(self.patterns_path),
+                      file_signature(self.rules_path) if self.rules_path else None)
+        if signatures == self.signatures:
+            return False
+        state = self.state
+        index = state['index'] if state is not None else None
+        if index is None or signatures[0] != self.signatures[0]:
+            new_index = PatternIndex(load_patterns(self.patterns_path))
+            if index is None or new_index.version != index.version:
+                index = new_index
+        rules = load_rules(self.rules_path) if self.rules_path else {}
+        self.signatures = signatures
+        if state is not None and index is state['index'] and rules == state['rules']:
+            return False
+        # 배치 처리 스레드는 배치마다 state를 한 번만 읽으므로 통째로 교체
+        self.state = {'index': index, 'rules': rules, 'rules_version': rules_version(rules), 'loaded_at': time.time()}
+        if state is not None:
+            self.stats['reloads'] += 1
+        return True
+
+    def run_reloader(self):
+        while not self.stopped.wait(self.reload_interval):
+            try:
+                self.reload()
+                self.last_reload_error = None
+            except Exception as e:
+                # 읽기 실패(쓰는 중인 파일 등)는 기존 인덱스를 유지하고 다음 확인 때 다시 시도
+                self.stats['reload_errors'] += 1
+                self.last_reload_error = str(e)
+
+    def submit(self, text, threshold=DEFAULT_THRESHOLD):
+        """텍스트 분석 예약 - 결과 Future 반환 (대기열이 가득 차면 queue.Full)"""
+        future = Future()
+        try:
+            self.requests.put_nowait((str(text), float(threshold), future))
+        except queue.Full:
+            # 요청 스레드 여러 개가 함께 세므로 lock 안에서
+            with self.lock:
+                self.stats['rejected'] += 1
+            raise
+        return future
+
+    def submit_many(self, texts, threshold=DEFAULT_THRESHOLD):
+        """텍스트 목록 분석 예약 - 중간에 대기열이 가득 차면 이미 넣은 것을 취소하고 queue.Full"""
+        futures = []
+        try:
+            for text in texts:
+                futures.append(self.submit(text, threshold))
+        except queue.Full:
+            # 취소된 Future는 배치 처리 스레드가 건너뜀
+            for future in futures:
+                future.cancel()
+            raise
+        return futures
+
+    def collect(self):
+        """첫 요청을 기다린 뒤 BATCH_WINDOW 동안(최대 max_batch개) 들어온 요청을 모아 반환"""
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run_batches(self):
+        while not self.stopped.is_set():
+            batch = self.collect()
+            by_threshold = {}
+            for item in batch:
+                if item[2].set_running_or_notify_cancel():
+                    by_threshold.setdefault(item[1], []).append(item)
+            state = self.state
+            for threshold, items in by_threshold.items():
+                try:
+                    results = self.analyze([text for text, _, _ in items], state, threshold)
+                except Exception as e:
+                    for _, _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(items, results):
+                    future.set_result(result)
+            # 취소된 요청(대기열이 가득 차 거절된 일괄 요청의 나머지)은 세지 않음
+            accepted = sum(len(items) for items in by_threshold.values())
+            self.stats['batches'] += 1
+            self.stats['batched_texts'] += accepted
+            self.stats['max_batch'] = max(self.stats['max_batch'], accepted)
+
+    def analyze(self, texts, state, threshold):
+        """텍스트 목록의 {'patterns', 'spelling', 'danger_score'} 목록
+
+        맞춤법 교정이 있으면 교정문도 같은 배치에서 매칭해, 원문에 없던 패턴을 found_in_corrected로 추가한다.
+        """
+        index, rules = state['index'], state['rules']
+        spelling = [check_spelling(text, rules) for text in texts]
+        match_texts = [text.strip() for text in texts]
+        corrected_rows = {}
+        for row, result in enumerate(spelling):
+            if result['corrections']:
+                corrected_rows[len(match_texts)] = row
+                match_texts.append(result['corrected'].strip())
+
+        patterns = [[] for _ in match_texts]
+        stats = {}
+        valid_rows = [row for row, text in enumerate(match_texts) if text]
+        matches = score_batch([match_texts[row] for row in valid_rows], index, threshold, None, stats)
+        for row, found_pattern in expand_matches([match_texts[row] for row in valid_rows], index, matches):
+            patterns[valid_rows[row]].append(found_pattern)
+        merge_stats(self.match_stats, stats)
+
+        for corrected_row, row in corrected_rows.items():
+            existing = {pattern['pattern'] for pattern in patterns[row]}
+            for pattern in patterns[corrected_row]:
+                if pattern['pattern'] not in existing:
+                    pattern['found_in_corrected'] = True
+                    patterns[row].append(pattern)
+
+        return [{
+            'patterns': patterns[row],
+            'spelling': spelling[row],
+            'danger_score': sum(pattern.get('danger_level', 0) for pattern in patterns[row])
+        } for row in range(len(texts))]
+
+    def health(self):
+        state = self.state
+        return {
+            'status': 'ok',
+            'index_version': state['index'].version,
+            'patterns': len(state['index'].patterns),
+            'rules': len(state['rules']),
+            'rules_version': state['rules_version'],
+            'loaded_at': state['loaded_at'],
+            'last_reload_error': self.last_reload_error
+        }
+
+    def summary(self):
+        stats = dict(self.stats)
+        stats['mean_batch'] = round(stats['batched_texts'] / stats['batches'], 2) if stats['batches'] else 0
+        return {'latency': self.latency.summary(), 'batching': stats, 'matching': dict(self.match_stats),
+                'queue': self.requests.qsize()}
+
+    def stop(self):
+        self.stopped.set()
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """POST /score {"text", "threshold"} · POST /score/bulk {"texts", "threshold"} · GET /health · GET /stats"""
+
+    service = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status >= 400:
+            # 오류 응답은 요청 본문을 다 읽지 않았을 수 있으므로 연결을 재사용하지 않음
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            raise ValueError("요청 본문 크기가 올바르지 않습니다.")
+        return json.loads(self.rfile.read(length).decode('utf-8'))
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, self.service.health())
+        elif self.path == '/stats':
+            self.send_json(200, self.service.summary())
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        if self.path not in ('/score', '/score/bulk'):
+            self.send_json(404, {'error': 'not found'})
+            return
+        try:
+            payload = self.read_json()
+            threshold = float(payload.get('threshold', DEFAULT_THRESHOLD))
+            if self.path == '/score':
+                if not isinstance(payload.get('text'), str):
+                    raise ValueError("'text' 문자열이 필요합니다.")
+                response = self.service.submit(payload['text'], threshold).result()
+            else:
+                texts = payload.get('texts')
+                if not isinstance(texts, list) or len(texts) > MAX_BULK_TEXTS:
+                    raise ValueError(f"'texts' 목록(최대 {MAX_BULK_TEXTS}개)이 필요합니다.")
+                futures = self.service.submit_many(texts, threshold)
+                response = {'results': [future.result() for future in futures]}
+        except queue.Full:
+            self.send_json(503, {'error': '처리 대기 중인 요청이 많습니다. 잠시 후 다시 시도하세요.'})
+            return
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, response)
+        self.service.latency.add(self.path, time.perf_counter() - start)
+
+
+def serve(service, host='127.0.0.1', port=8765):
+    """서비스를 HTTP로 제공 (요청마다 스레드, 분석은 배치 스레드 하나에서)"""
+    handler = type('BoundScoringRequestHandler', (ScoringRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,475 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+from concurrent.futures import Future
+import requests
+import urllib3
+import gspread
+from google.oauth2 import service_account
+from gspread.utils import rowcol_to_a1
+
+
+# 패턴/맞춤법 규칙 스프레드시트
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/1wPchxwAssBf706VuvxhGp4ESt3vj-N9RLcMaUF075ug/edit?gid=137455637#gid=137455637'
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# 재시도할 API 응답 코드 (요청 한도 초과, 일시적 서버 오류)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# 패턴 워크시트(첫 번째) 헤더 - 가짜 백엔드를 처음 만들 때 사용
+PATTERN_HEADER = ['text', 'output', 'url', 'dangerlevel', 'timestamp']
+
+# 행 추가 요청을 모아 한 번에 보내는 최대 행 수와 대기 시간(초)
+APPEND_BATCH_SIZE = 100
+APPEND_FLUSH_DELAY = 0.5
+
+
+def service_account_info(secrets):
+    """streamlit secrets의 서비스 계정 항목을 google-auth 자격 증명 딕셔너리로 변환"""
+    return {
+        "type": "service_account",
+        "project_id": secrets["project_id"],
+        "private_key_id": secrets["private_key_id"],
+        "private_key": secrets["private_key"],
+        "client_email": secrets["client_email"],
+        "client_id": secrets["client_id"],
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": secrets["client_x509_cert_url"],
+        "universe_domain": "googleapis.com"
+    }
+
+
+class TransientSheetError(Exception):
+    """재시도하면 성공할 수 있는 오류 (가짜 백엔드의 요청 한도 초과 등)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_delay(error, attempt, base=BACKOFF_BASE, max_delay=BACKOFF_MAX):
+    """재시도 전 대기 시간 - 재시도할 오류가 아니면 None
+
+    Retry-After 헤더가 있으면 따르고, 없으면 지수 백오프 상한 안에서 무작위로 고른다(full jitter).
+    여러 세션이 같은 시각에 한도에 걸려도 재시도 시각이 흩어진다.
+    """
+    retry_after = None
+    if isinstance(error, gspread.exceptions.APIError):
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if status not in RETRY_STATUS:
+            return None
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+    elif isinstance(error, TransientSheetError):
+        retry_after = error.retry_after
+    elif not isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return None
+
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), max_delay)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(max_delay, base * (2 ** attempt)))
+
+
+def unsent_error(error):
+    """요청이 처리되지 않은 것이 확실한 오류인지 (요청 한도 초과, 연결 전 실패) - 행 추가를 그대로 다시 보내도 되는 경우"""
+    if isinstance(error, gspread.exceptions.APIError):
+        return getattr(getattr(error, 'response', None), 'status_code', None) == 429
+    if isinstance(error, (TransientSheetError, requests.exceptions.ConnectTimeout)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # 연결 자체를 못 한 경우만 (응답을 읽다 끊긴 경우는 이미 반영되었을 수 있음)
+        reason = getattr(error.args[0], 'reason', error.args[0])
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+    return False
+
+
+def normalize_row(row):
+    """비교용 행 - 문자열로 바꾸고 끝의 빈 셀 제거"""
+    values = ['' if value is None else str(value) for value in row]
+    while values and not values[-1].strip():
+        values.pop()
+    return values
+
+
+class GoogleSheetsBackend:
+    """gspread 기반 백엔드 - 처음 사용할 때 한 번만 인증하고 클라이언트(HTTP 세션)와 워크시트를 재사용"""
+
+    def __init__(self, credentials_info, url=SHEET_URL, scopes=SCOPES):
+        self.credentials_info = credentials_info
+        self.url = url
+        self.scopes = scopes
+        self.lock = threading.Lock()
+        self.spreadsheet = None
+        self.worksheets = {}
+
+    def open(self):
+        """스프레드시트 (인증/열기는 한 번만)"""
+        with self.lock:
+            if self.spreadsheet is None:
+                creds = service_account.Credentials.from_service_account_info(
+                    self.credentials_info, scopes=self.scopes)
+                client = gspread.authorize(creds)
+                self.spreadsheet = client.open_by_url(self.url)
+            return self.spreadsheet
+
+    def worksheet(self, key):
+        """워크시트 - key가 정수면 순서, 문자열이면 이름"""
+        worksheet = self.worksheets.get(key)
+        if worksheet is None:
+            spreadsheet = self.open()
+            worksheet = spreadsheet.get_worksheet(key) if isinstance(key, int) else spreadsheet.worksheet(key)
+            if worksheet is None:
+                raise gspread.exceptions.WorksheetNotFound(key)
+            self.worksheets[key] = worksheet
+        return worksheet
+
+    def revision(self):
+        """스프레드시트 수정 시각 (Drive 메타데이터)"""
+        return self.open().get_lastUpdateTime()
+
+    def read_values(self, key, start_row=1):
+        """start_row(1부터)행부터 끝까지의 행 목록 (행 끝의 빈 셀 포함)"""
+        worksheet = self.worksheet(key)
+        if start_row <= 1:
+            values = worksheet.get(pad_values=True)
+        else:
+            # 열어 둔 워크시트의 행 수는 갱신되지 않으므로 행 끝을 지정하지 않는 범위로 읽음
+            end_column = rowcol_to_a1(1, max(worksheet.col_count, 1)).rstrip('0123456789')
+            values = worksheet.get(f"A{start_row}:{end_column}", pad_values=True)
+        return [] if values == [[]] else [list(row) for row in values]
+
+    def append_rows(self, key, rows):
+        """행 목록 추가"""
+        self.worksheet(key).append_rows(rows)
+
+    def ensure_worksheet(self, key, header, rows=1000):
+        """워크시트가 없으면 헤더와 함께 생성 - 생성했으면 True"""
+        try:
+            self.worksheet(key)
+            return False
+        except gspread.exceptions.WorksheetNotFound:
+            worksheet = self.open().add_worksheet(key, rows, len(header))
+            worksheet.update(values=[list(header)], range_name=f"A1:{rowcol_to_a1(1, len(header))}")
+            self.worksheets[key] = worksheet
+            return True
+
+
+class MemorySheetsBackend:
+    """메모리 가짜 백엔드 - 구글 없이 부하 테스트/개발용
+
+    latency는 요청마다 기다리는 시간(초), error_rate는 요청이 TransientSheetError로 실패할 확률이다.
+    """
+
+    def __init__(self, worksheets=None, latency=0.0, error_rate=0.0):
+        self.lock = threading.Lock()
+        self.worksheets = {key: [list(row) for row in rows] for key, rows in (worksheets or {}).items()}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.version = 0
+        self.requests = 0
+
+    def request(self):
+        """요청 한 번 (지연/오류 흉내)"""
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise TransientSheetError("요청 한도 초과 (가짜 백엔드)")
+
+    def revision(self):
+        self.request()
+        return str(self.version)
+
+    def read_values(self, key, start_row=1):
+        self.request()
+        with self.lock:
+            if key not in self.worksheets:
+                raise gspread.exceptions.WorksheetNotFound(key)
+            return [list(row) for row in self.worksheets[key][max(start_row, 1) - 1:]]
+
+    def append_rows(self, key, rows):
+        self.request()
+        with self.lock:
+            if key not in self.worksheets:
+                raise gspread.exceptions.WorksheetNotFound(key)
+            self.worksheets[key].extend(['' if value is None else str(value) for value in row] for row in rows)
+            self.version += 1
+
+    def ensure_worksheet(self, key, header, rows=1000):
+        self.request()
+        with self.lock:
+            if key in self.worksheets:
+                return False
+            self.worksheets[key] = [list(header)]
+            self.version += 1
+            return True
+
+
+class SQLiteSheetsBackend:
+    """SQLite 가짜 백엔드 - 여러 프로세스가 같은 파일을 공유하는 부하 테스트용"""
+
+    def __init__(self, path, latency=0.0, error_rate=0.0):
+        self.path = path
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cells (
+                worksheet TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                "values" TEXT NOT NULL,
+                PRIMARY KEY (worksheet, row)
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS worksheets (worksheet TEXT PRIMARY KEY)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.commit()
+        self.requests = 0
+
+    @staticmethod
+    def name(key):
+        """워크시트 키 저장 이름 (순서 0과 이름 '0'은 같은 워크시트로 취급)"""
+        return str(key)
+
+    def request(self):
+        """요청 한 번 (지연/오류 흉내)"""
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise TransientSheetError("요청 한도 초과 (가짜 백엔드)")
+
+    def check_worksheet(self, key):
+        if self.conn.execute("SELECT 1 FROM worksheets WHERE worksheet = ?", (self.name(key),)).fetchone() is None:
+            raise gspread.exceptions.WorksheetNotFound(key)
+
+    def touch(self):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('revision', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def revision(self):
+        self.request()
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return row[0] if row else '0'
+
+    def read_values(self, key, start_row=1):
+        self.request()
+        with self.lock:
+            self.check_worksheet(key)
+            rows = self.conn.execute(
+                'SELECT "values" FROM cells WHERE worksheet = ? AND row >= ? ORDER BY row',
+                (self.name(key), max(start_row, 1))
+            ).fetchall()
+        return [json.loads(values) for values, in rows]
+
+    def append_rows(self, key, rows):
+        self.request()
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.check_worksheet(key)
+                last_row = self.conn.execute(
+                    "SELECT COALESCE(MAX(row), 0) FROM cells WHERE worksheet = ?", (self.name(key),)
+                ).fetchone()[0]
+                self.conn.executemany(
+                    'INSERT INTO cells (worksheet, row, "values") VALUES (?, ?, ?)',
+                    [(self.name(key), last_row + i + 1,
+                      json.dumps(['' if value is None else str(value) for value in row], ensure_ascii=False))
+                     for i, row in enumerate(rows)]
+                )
+                self.touch()
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+    def ensure_worksheet(self, key, header, rows=1000):
+        self.request()
+        with self.lock:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                created = self.conn.execute(
+                    "INSERT OR IGNORE INTO worksheets (worksheet) VALUES (?)", (self.name(key),)
+                ).rowcount > 0
+                if created:
+                    self.conn.execute(
+                        'INSERT INTO cells (worksheet, row, "values") VALUES (?, 1, ?)',
+                        (self.name(key), json.dumps(list(header), ensure_ascii=False))
+                    )
+                    self.touch()
+                self.conn.commit()
+                return created
+            except BaseException:
+                self.conn.rollback()
+                raise
+
+
+def open_backend(spec, credentials_factory):
+    """백엔드 선택 - 'google'(기본), 'memory', 'sqlite:<경로>'"""
+    if spec == 'memory':
+        backend = MemorySheetsBackend()
+    elif spec.startswith('sqlite:'):
+        backend = SQLiteSheetsBackend(spec[len('sqlite:'):])
+    else:
+        return GoogleSheetsBackend(credentials_factory())
+    backend.ensure_worksheet(0, PATTERN_HEADER)
+    return backend
+
+
+class SheetsGateway:
+    """스프레드시트 접근 창구 - 모든 요청에 지터 백오프 재시도를 적용하고 행 추가는 모아서 보냄
+
+    append_row로 들어온 행은 APPEND_FLUSH_DELAY 동안(또는 APPEND_BATCH_SIZE개가 될 때까지) 모았다가
+    워크시트별 append_rows 한 번으로 보낸다. 여러 세션이 같은 게이트웨이를 공유하면 요청 수가 줄어든다.
+    """
+
+    def __init__(self, backend, batch_size=APPEND_BATCH_SIZE, flush_delay=APPEND_FLUSH_DELAY,
+                 max_retries=MAX_RETRIES, sleep=time.sleep):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.queue = []
+        self.flusher = None
+        # 여러 세션 스레드와 전송 스레드가 함께 갱신하므로 통계는 stats_lock 안에서만 변경
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'appended_rows': 0, 'append_requests': 0, 'append_checks': 0}
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def call(self, method, *args):
+        """백엔드 요청 (재시도할 수 있는 오류면 대기 후 다시 시도)"""
+        attempt = 0
+        while True:
+            self.count('requests')
+            try:
+                return getattr(self.backend, method)(*args)
+            except Exception as e:
+                delay = retry_delay(e, attempt) if attempt < self.max_retries else None
+                if delay is None:
+                    raise
+                self.count('retries')
+                attempt += 1
+                self.sleep(delay)
+
+    def append_rows(self, key, rows):
+        """행 목록 추가 - 같은 요청을 다시 보내면 행이 두 번 추가될 수 있으므로 재시도를 나눠 처리
+
+        요청 한도 초과나 연결 전 실패는 그대로 다시 보내고, 서버 오류/응답 시간 초과처럼 이미 반영되었을 수 있는
+        오류는 대기 후 워크시트 끝 행을 다시 읽어 보낸 행이 있으면 성공으로 본다.
+        """
+        attempt = 0
+        while True:
+            self.count('requests')
+            try:
+                return self.backend.append_rows(key, rows)
+            except Exception as e:
+                delay = retry_delay(e, attempt) if attempt < self.max_retries else None
+                if delay is None:
+                    raise
+                self.count('retries')
+                attempt += 1
+                self.sleep(delay)
+                if not unsent_error(e) and self.rows_appended(key, rows):
+                    return None
+
+    def rows_appended(self, key, rows):
+        """워크시트 마지막 행들이 rows와 같은지 (추가 요청이 이미 반영되었는지 확인)"""
+        self.count('append_checks')
+        values = self.read_values(key)
+        if len(values) < len(rows):
+            return False
+        tail = values[len(values) - len(rows):]
+        return [normalize_row(row) for row in tail] == [normalize_row(row) for row in rows]
+
+    def revision(self):
+        """스프레드시트 수정 시각/버전"""
+        return self.call('revision')
+
+    def read_values(self, key, start_row=1):
+        """start_row(1부터)행부터 끝까지의 행 목록"""
+        return self.call('read_values', key, start_row)
+
+    def ensure_worksheet(self, key, header):
+        """워크시트가 없으면 헤더와 함께 생성 - 생성했으면 True"""
+        return self.call('ensure_worksheet', key, header)
+
+    def append_row(self, key, row, wait=True, timeout=None):
+        """행 추가 요청 - wait이면 실제로 추가될 때까지 기다리고(오류는 그대로 발생), 아니면 Future 반환"""
+        future = Future()
+        with self.condition:
+            self.queue.append((key, list(row), future))
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = threading.Thread(target=self.run_flusher, name='sheets-append', daemon=True)
+                self.flusher.start()
+            self.condition.notify_all()
+        if wait:
+            future.result(timeout)
+        return future
+
+    def run_flusher(self):
+        """대기열에 행이 들어오면 잠시 더 모은 뒤 보냄 (대기열이 비면 종료)"""
+        while True:
+            with self.condition:
+                if not self.queue:
+                    self.flusher = None
+                    return
+                deadline = time.monotonic() + self.flush_delay
+                while len(self.queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            self.flush()
+
+    def flush(self):
+        """대기 중인 행을 워크시트별로 모아 즉시 전송"""
+        with self.write_lock:
+            with self.condition:
+                pending, self.queue = self.queue, []
+            groups = {}
+            for key, row, future in pending:
+                groups.setdefault(key, []).append((row, future))
+
+            for key, items in groups.items():
+                for start in range(0, len(items), self.batch_size):
+                    chunk = items[start:start + self.batch_size]
+                    try:
+                        self.append_rows(key, [row for row, _ in chunk])
+                    except Exception as e:
+                        for _, future in chunk:
+                            future.set_exception(e)
+                        continue
+                    self.count('append_requests')
+                    self.count('appended_rows', len(chunk))
+                    for _, future in chunk:
+                        future.set_result(None)
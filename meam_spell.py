@@ -0,0 +1,532 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+import time
+import threading
+from meam_automaton import AhoCorasick
+
+
+# 맞춤법 검사 단어 단위 (교정 대상 단어 목록)
+WORD_PATTERN = re.compile(r'\b\w+\b')
+WORD_CHARS = re.compile(r'\w+')
+
+# 패턴 안에서 그룹 번호/이름을 참조하는 정규식 규칙 (합친 정규식에서는 번호가 바뀌므로 따로 검사)
+GROUP_REFERENCE = re.compile(r'\\(?:[1-9]|g<)|\(\?P=|\(\?\(')
+
+# 일반 문자열 규칙이 이보다 적으면 오토마톤 대신 규칙별 포함 검사(C 구현)가 더 빠름
+LITERAL_SCAN_LIMIT = 16
+
+# 유사 표현 교정 (등록된 오류 표현과 편집 거리/띄어쓰기만 다른 표현도 교정) 최대 편집 거리 - 0이면 사용 안 함
+NEAR_MISS_MAX_DISTANCE = int(os.environ.get('MEAM_SPELL_MAX_DISTANCE', 2))
+
+# 오류 표현 길이(공백 제외)별 허용 편집 거리 - 짧은 표현은 띄어쓰기만 다른 경우만 교정
+NEAR_MISS_MIN_LENGTH = 4
+NEAR_MISS_DISTANCE2_LENGTH = 8
+
+# 유사 표현 비교 시 단어 끝에서 떼어 보는 최대 글자 수 (조사/어미) 와 이어 붙여 보는 최대 단어 수 (띄어쓰기 변형)
+NEAR_MISS_SUFFIX = 2
+NEAR_MISS_WINDOW = 3
+
+# 삭제 변형을 만드는 앞부분 길이(자모) - 조회 한 번의 변형 수를 구간 길이와 무관하게 제한
+NEAR_MISS_PREFIX = 7
+
+# 유사 표현 조회 결과를 보관하는 최대 구간 수
+NEAR_MISS_CACHE_SIZE = 100000
+
+# 맞춤법 규칙 갱신 주기(초)
+RULES_REFRESH_INTERVAL = 300
+
+# 규칙 집합별로 보관하는 컴파일된 검사기 수
+ENGINE_CACHE_SIZE = 4
+
+
+def rules_version(rules):
+    """맞춤법 규칙 딕셔너리의 내용(과 유사 표현 교정 설정) 기반 버전 해시"""
+    payload = json.dumps([NEAR_MISS_MAX_DISTANCE, rules or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def is_regex_rule(wrong):
+    """'^...$' 형태면 정규식 규칙"""
+    return wrong.startswith('^') and wrong.endswith('$')
+
+
+def edit_distance(a, b, limit):
+    """제한 편집 거리(인접 글자 바꿈 포함) - limit을 넘으면 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def deletes(word, distance):
+    """word에서 글자를 최대 distance개 지운 문자열 집합 (자기 자신 포함)"""
+    result = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {item[:i] + item[i + 1:] for item in frontier if len(item) > 1 for i in range(len(item))}
+        result |= frontier
+    return result
+
+
+def decompose(text):
+    """한글 음절을 자모로 분해 (편집 거리를 자모 단위로 계산해 '있'→'잇' 같은 오타는 1로 봄)"""
+    return unicodedata.normalize('NFD', text)
+
+
+def allowed_distance(length, max_distance=NEAR_MISS_MAX_DISTANCE):
+    """공백을 뺀 오류 표현 글자 수별 허용 편집 거리 (자모 단위)"""
+    if length < NEAR_MISS_MIN_LENGTH:
+        return 0
+    if length < NEAR_MISS_DISTANCE2_LENGTH:
+        return min(1, max_distance)
+    return min(2, max_distance)
+
+
+class NearMissIndex:
+    """오류 표현의 삭제 이웃 색인 (SymSpell)
+
+    오류 표현(공백 제외, 자모 분해)의 앞 NEAR_MISS_PREFIX 글자에서 허용 거리만큼 글자를 지운 변형을 색인해 두고,
+    검사할 구간도 앞부분을 같은 방식으로 지운 변형을 조회해 후보를 찾은 뒤 전체 편집 거리로 확인한다.
+    (전체 편집 거리가 d 이하면 두 앞부분도 각각 d글자 이하를 지워 같아지므로 후보에서 빠지지 않는다.)
+    조회 한 번의 변형 수는 앞부분 길이로 제한되어 규칙 수나 구간 길이와 무관하다.
+    구간은 길이가 허용 거리 안에 드는 오류 표현이 있을 때만, 그 표현들의 허용 거리만큼만 지워 조회한다.
+    """
+
+    def __init__(self, max_distance=NEAR_MISS_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.deletes = {}
+        self.keys = {}
+        self.forms = set()
+        self.lengths = {}
+        self.query_distances = {}
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, rule_id):
+        """공백을 뺀 오류 표현 등록 (같은 표현은 먼저 등록한 규칙만)"""
+        form = decompose(key)
+        if form in self.forms:
+            return
+        self.forms.add(form)
+        limit = allowed_distance(len(key), self.max_distance)
+        self.keys[rule_id] = (form, limit)
+        for variant in deletes(form[:NEAR_MISS_PREFIX], limit):
+            self.deletes.setdefault(variant, []).append(rule_id)
+        if limit > self.lengths.get(len(form), -1):
+            self.lengths[len(form)] = limit
+            self.query_distances = {}
+
+    def query_distance(self, length):
+        """자모 길이가 length인 구간을 조회할 때 지울 글자 수 - 길이가 맞는 오류 표현이 없으면 None"""
+        distance = self.query_distances.get(length, False)
+        if distance is False:
+            distances = [limit for key_length, limit in self.lengths.items() if abs(length - key_length) <= limit]
+            distance = self.query_distances[length] = max(distances) if distances else None
+        return distance
+
+    def lookup(self, form):
+        """자모 분해한 구간(공백 제외)과 허용 거리 안에 있는 규칙 (규칙 번호, 거리) - 가장 가까운 것, 같으면 앞선 규칙"""
+        cached = self.cache.get(form, False)
+        if cached is not False:
+            return cached
+        distance = self.query_distance(len(form))
+        if distance is None:
+            return None
+
+        best = None
+        seen = set()
+        for variant in deletes(form[:NEAR_MISS_PREFIX], distance):
+            for rule_id in self.deletes.get(variant, ()):
+                if rule_id in seen:
+                    continue
+                seen.add(rule_id)
+                key, limit = self.keys[rule_id]
+                if abs(len(key) - len(form)) > limit:
+                    continue
+                distance = edit_distance(form, key, limit)
+                if distance <= limit and (best is None or (distance, rule_id) < (best[1], best[0])):
+                    best = (rule_id, distance)
+
+        if len(self.cache) >= NEAR_MISS_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[form] = best
+        return best
+
+
+class SpellEngine:
+    """규칙 집합을 한 번만 컴파일해 두는 맞춤법 검사기
+
+    텍스트 한 번 훑기로 적용될 수 있는 규칙만 골라낸 뒤(일반 문자열 규칙은 Aho-Corasick 오토마톤 - 규칙이 적으면 포함 검사,
+    정규식 규칙은 규칙별 전방 탐색 그룹을 이은 하나의 정규식), 골라낸 규칙만 원래 순서대로
+    기존과 같은 방식으로 적용한다. 결과(교정 순서, 중복 교정 제외, 길이순 정렬)는 규칙마다
+    모든 단어를 확인하던 방식과 같다. 그 다음 일반 문자열 규칙의 오타/띄어쓰기 변형을 NearMissIndex로 찾아
+    '유사 표현' 교정으로 덧붙인다 (NEAR_MISS_MAX_DISTANCE=0이면 사용하지 않음).
+    유사 표현 조회는 단어마다 최대 NEAR_MISS_WINDOW × (NEAR_MISS_SUFFIX + 1)번이고, 한 번의 변형 수는
+    NEAR_MISS_PREFIX로 제한되므로 단어당 비용은 규칙 수와 무관하다.
+    """
+
+    def __init__(self, rules, max_distance=NEAR_MISS_MAX_DISTANCE):
+        self.rules = []
+        self.literal_automaton = None
+        self.literal_rules = []
+        self.empty_rules = []
+        self.fallback_rules = []
+        self.separate_regex_rules = []
+        self.near_miss = NearMissIndex(max_distance)
+        combinable = []
+
+        for rule_id, (wrong, right) in enumerate(rules.items()):
+            pattern = None
+            if is_regex_rule(wrong):
+                try:
+                    pattern = re.compile(wrong)
+                except re.error:
+                    # 잘못된 정규식은 텍스트에 그대로 포함된 경우 일반 문자열로 교정
+                    self.fallback_rules.append(rule_id)
+                else:
+                    if pattern.groupindex or GROUP_REFERENCE.search(wrong):
+                        self.separate_regex_rules.append(rule_id)
+                    else:
+                        combinable.append(rule_id)
+            elif not wrong:
+                # 빈 문자열은 모든 단어에 포함됨
+                self.empty_rules.append(rule_id)
+            else:
+                if WORD_CHARS.fullmatch(wrong):
+                    # 단어 문자로만 된 규칙이 텍스트에 있으면 그 위치를 포함하는 단어가 반드시 있음
+                    self.literal_rules.append((wrong, rule_id))
+                # 단어 문자가 아닌 글자가 섞인 일반 규칙은 단어 안에 포함될 수 없어 정확히 일치하는 교정은 없음
+                # (공백만 섞인 규칙은 유사 표현 교정에서 띄어쓰기가 다른 표현으로 찾음)
+                key = ''.join(wrong.split())
+                if max_distance > 0 and WORD_CHARS.fullmatch(key):
+                    self.near_miss.add(key, rule_id)
+            self.rules.append((wrong, right, pattern))
+
+        if len(self.literal_rules) >= LITERAL_SCAN_LIMIT:
+            self.literal_automaton = AhoCorasick()
+            for wrong, rule_id in self.literal_rules:
+                self.literal_automaton.add(wrong, rule_id)
+            self.literal_automaton.build()
+            self.literal_rules = []
+
+        # 정규식 규칙마다 텍스트 어디에서든 일치하면 그룹이 잡히는 전방 탐색을 이어 붙여 한 번에 확인
+        self.combined_regex = None
+        self.combined_groups = {}
+        if combinable:
+            parts = [f"(?:(?=[\\s\\S]*?(?P<r{rule_id}>{self.rules[rule_id][0]}))|)" for rule_id in combinable]
+            try:
+                self.combined_regex = re.compile(''.join(parts))
+                self.combined_groups = {f"r{rule_id}": rule_id for rule_id in combinable}
+            except (re.error, RecursionError, OverflowError):
+                self.separate_regex_rules.extend(combinable)
+                self.separate_regex_rules.sort()
+
+    def triggered(self, text, words):
+        """교정이 일어날 수 있는 규칙 번호 (규칙 순서)"""
+        rule_ids = set()
+        if self.literal_automaton is not None:
+            for _, _, rule_id in self.literal_automaton.iter(text):
+                rule_ids.add(rule_id)
+        for wrong, rule_id in self.literal_rules:
+            if wrong in text:
+                rule_ids.add(rule_id)
+        if words:
+            rule_ids.update(self.empty_rules)
+        if self.combined_regex is not None:
+            match = self.combined_regex.match(text)
+            for name, value in match.groupdict().items():
+                if value is not None:
+                    rule_ids.add(self.combined_groups[name])
+        for rule_id in self.separate_regex_rules:
+            if self.rules[rule_id][2].search(text):
+                rule_ids.add(rule_id)
+        for rule_id in self.fallback_rules:
+            if self.rules[rule_id][0] in text:
+                rule_ids.add(rule_id)
+        return sorted(rule_ids)
+
+    def near_misses(self, text, skip):
+        """등록된 오류 표현과 편집 거리나 띄어쓰기만 다른 구간 [(원문 구간, 교정, 규칙 번호)]
+
+        이어진 단어 1~NEAR_MISS_WINDOW개(공백으로만 떨어진 경우)를 붙이고 마지막 단어 끝의 조사/어미
+        (NEAR_MISS_SUFFIX 글자까지)를 떼어 가며, 긴 구간부터 색인을 조회한다. 이미 교정된 단어(skip)와
+        이미 올바른 표현이거나 올바른 표현에 더 가까운 구간은 건너뛴다.
+        단어별 자모 분해(끝 글자를 뗀 형태 포함)는 텍스트마다 한 번만 하고 구간은 이를 이어 붙여 만든다.
+        """
+        matches = list(WORD_PATTERN.finditer(text))
+        # forms[i][cut]: i번째 단어에서 끝 글자 cut개를 뗀 자모 분해 형태
+        forms = []
+        for match in matches:
+            word = match.group(0)
+            forms.append([decompose(word[:len(word) - cut]) for cut in range(min(NEAR_MISS_SUFFIX, len(word) - 1) + 1)])
+        # 이미 교정된 단어 / 다음 단어와 공백으로만 떨어져 있는지 (구간마다 다시 확인하지 않도록 미리 계산)
+        skipped = [match.group(0) in skip for match in matches]
+        spaced = [text[a.end():b.start()].isspace() for a, b in zip(matches, matches[1:])]
+        found = []
+        i = 0
+        while i < len(matches):
+            hit = None
+            for size in range(min(NEAR_MISS_WINDOW, len(matches) - i), 0, -1):
+                if any(skipped[i:i + size]) or not all(spaced[i:i + size - 1]):
+                    continue
+                window = matches[i:i + size]
+                head = ''.join(forms[j][0] for j in range(i, i + size - 1))
+                for cut, form in enumerate(forms[i + size - 1]):
+                    if self.near_miss.query_distance(len(head) + len(form)) is None:
+                        continue
+                    result = self.near_miss.lookup(head + form)
+                    if result is None:
+                        continue
+                    rule_id, distance = result
+                    right = self.rules[rule_id][1]
+                    original = text[window[0].start():window[-1].end() - cut]
+                    if ' '.join(original.split()) == ' '.join(right.split()):
+                        continue
+                    if distance and edit_distance(head + form, decompose(''.join(right.split())), distance) < distance:
+                        continue
+                    hit = (original, right, rule_id)
+                    break
+                if hit is not None:
+                    break
+            if hit is None:
+                i += 1
+            else:
+                found.append(hit)
+                i += size
+        return found
+
+    def check(self, text):
+        """텍스트 맞춤법 검사"""
+        if not text or text.isspace():
+            return {
+                'original': text,
+                'corrected': text,
+                'corrections': [],
+                'error': None
+            }
+
+        try:
+            corrections = []
+            corrected_text = text
+
+            # 단어 단위로 분리
+            words = WORD_PATTERN.findall(text)
+            processed_corrections = set()  # 중복 교정 방지
+
+            for rule_id in self.triggered(text, words):
+                wrong, right, pattern = self.rules[rule_id]
+                try:
+                    # 정규식 패턴인지 확인 (잘못된 정규식은 컴파일 오류로 아래 일반 문자열 처리로 넘어감)
+                    if is_regex_rule(wrong):
+                        if pattern is None:
+                            pattern = re.compile(wrong)
+                        for match in pattern.finditer(text):
+                            matched_text = match.group(0)
+                            corrected_word = pattern.sub(right, matched_text)
+
+                            if matched_text != corrected_word:
+                                correction_key = (matched_text, corrected_word)
+                                if correction_key not in processed_corrections:
+                                    processed_corrections.add(correction_key)
+                                    corrected_text = corrected_text.replace(matched_text, corrected_word)
+                                    corrections.append({
+                                        'original': matched_text,
+                                        'corrected': corrected_word,
+                                        'type': '맞춤법/표현 오류 (정규식)',
+                                        'pattern': wrong,
+                                        'replacement': right
+                                    })
+                    else:
+                        # 일반 문자열 매칭
+                        for word in words:
+                            if wrong in word:
+                                corrected_word = word.replace(wrong, right)
+                                correction_key = (word, corrected_word)
+
+                                if word != corrected_word and correction_key not in processed_corrections:
+                                    processed_corrections.add(correction_key)
+                                    corrected_text = corrected_text.replace(word, corrected_word)
+                                    corrections.append({
+                                        'original': word,
+                                        'corrected': corrected_word,
+                                        'type': '맞춤법/표현 오류',
+                                        'pattern': wrong,
+                                        'replacement': right
+                                    })
+
+                except re.error:
+                    # 잘못된 정규식은 일반 문자열로 처리
+                    if wrong in text:
+                        correction_key = (wrong, right)
+                        if correction_key not in processed_corrections:
+                            processed_corrections.add(correction_key)
+                            corrected_text = corrected_text.replace(wrong, right)
+                            corrections.append({
+                                'original': wrong,
+                                'corrected': right,
+                                'type': '맞춤법/표현 오류',
+                                'pattern': wrong,
+                                'replacement': right
+                            })
+
+            # 등록된 오류 표현과 조금 다른 표현 (오타/띄어쓰기 변형)
+            if len(self.near_miss):
+                skip = {correction['original'] for correction in corrections}
+                for original, right, rule_id in self.near_misses(text, skip):
+                    correction_key = (original, right)
+                    if correction_key not in processed_corrections:
+                        processed_corrections.add(correction_key)
+                        corrected_text = corrected_text.replace(original, right)
+                        corrections.append({
+                            'original': original,
+                            'corrected': right,
+                            'type': '맞춤법/표현 오류 (유사 표현)',
+                            'pattern': self.rules[rule_id][0],
+                            'replacement': right
+                        })
+
+            # 교정 결과 정렬
+            corrections.sort(key=lambda x: len(x['original']), reverse=True)
+
+            return {
+                'original': text,
+                'corrected': corrected_text,
+                'corrections': corrections,
+                'error': None
+            }
+
+        except Exception as e:
+            return {
+                'original': text,
+                'corrected': text,
+                'corrections': [],
+                'error': str(e)
+            }
+
+
+_engine_lock = threading.Lock()
+_last_engine = (None, None)
+_engines = {}
+
+
+def get_spell_engine(rules):
+    """규칙 딕셔너리의 컴파일된 검사기 - 같은 딕셔너리 객체는 바로, 내용이 같은 딕셔너리는 버전으로 재사용"""
+    global _last_engine
+    last_rules, engine = _last_engine
+    if last_rules is rules:
+        return engine
+
+    version = rules_version(rules)
+    with _engine_lock:
+        engine = _engines.get(version)
+        if engine is None:
+            engine = SpellEngine(rules)
+            if len(_engines) >= ENGINE_CACHE_SIZE:
+                _engines.pop(next(iter(_engines)))
+            _engines[version] = engine
+        _last_engine = (rules, engine)
+    return engine
+
+
+def check_spelling(text, rules):
+    """규칙 딕셔너리로 텍스트 맞춤법 검사 (규칙 집합은 한 번만 컴파일)"""
+    return get_spell_engine(rules or {}).check(text)
+
+
+class RuleRefresher:
+    """맞춤법 규칙 스냅샷 보관과 백그라운드 갱신 (stale-while-revalidate)
+
+    - 검사는 항상 마지막으로 읽은 규칙 딕셔너리로 한다. 딕셔너리는 통째로 교체만 하고 수정하지 않는다.
+    - 갱신 주기가 지나면 다음 조회가 백그라운드 갱신을 하나만 시작하고 기존 규칙을 바로 반환한다.
+    - 처음에는 규칙이 없으므로 한 번 읽을 때까지 기다린다 (동시에 호출한 쪽도 같은 읽기를 기다림).
+    - 읽기에 실패하면 기존 규칙을 유지하고 다음 주기에 다시 시도한다.
+    """
+
+    def __init__(self, fetch, interval=RULES_REFRESH_INTERVAL):
+        self.fetch = fetch
+        self.interval = interval
+        self.rules = None
+        self.updated = None
+        self.last_error = None
+        self.thread = None
+        # 처음 읽기와 백그라운드 스레드 시작을 하나로 묶는 잠금 / 규칙 교체 잠금
+        self.lock = threading.Lock()
+        self.swap_lock = threading.Lock()
+        # 갱신 중에 등록된 규칙 {오류 표현: (올바른 표현, 등록 시각)}
+        self.added = {}
+
+    def get(self):
+        """현재 규칙 딕셔너리 (수정하지 말 것)"""
+        rules = self.rules
+        if rules is None:
+            with self.lock:
+                if self.rules is None:
+                    self.refresh()
+            return self.rules
+        if time.time() - self.updated >= self.interval:
+            self.refresh_in_background()
+        return rules
+
+    def refresh(self):
+        """규칙을 읽어 교체 - 성공하면 True"""
+        started = time.time()
+        try:
+            rules = dict(self.fetch())
+        except Exception as e:
+            with self.swap_lock:
+                self.last_error = str(e)
+                if self.rules is None:
+                    self.rules = {}
+                self.updated = started
+            return False
+
+        with self.swap_lock:
+            # 읽기를 시작한 뒤 등록된 규칙은 읽은 내용에 없을 수 있으므로 다시 반영
+            for wrong, (right, added_at) in list(self.added.items()):
+                if added_at >= started:
+                    rules[wrong] = right
+                else:
+                    del self.added[wrong]
+            self.rules = rules
+            self.updated = started
+            self.last_error = None
+        return True
+
+    def refresh_in_background(self):
+        """백그라운드 갱신 시작 (이미 진행 중이면 무시)"""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self.refresh, name='spell-rules-refresh', daemon=True)
+            self.thread.start()
+
+    def add(self, wrong, right):
+        """원본에 등록을 마친 규칙을 다시 읽지 않고 바로 반영"""
+        with self.swap_lock:
+            self.added[wrong] = (right, time.time())
+            if self.rules is not None:
+                rules = dict(self.rules)
+                rules[wrong] = right
+                self.rules = rules
+
+    def invalidate(self):
+        """다음 조회 때 백그라운드 갱신을 시작하도록 표시"""
+        with self.swap_lock:
+            if self.updated is not None:
+                self.updated = 0
@@ -0,0 +1,257 @@
+import io
+import os
+import time
+import socket
+import hashlib
+import ipaddress
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from PIL import Image
+from meam_cache import CACHE_PATH
+from meam_index import get_youtube_thumbnail
+
+
+# 썸네일 디스크 캐시 위치와 최대 크기 (초과 시 가장 오래 사용되지 않은 파일부터 삭제)
+THUMBNAIL_DIR = os.environ.get(
+    'MEAM_THUMBNAIL_DIR',
+    os.path.join(os.path.dirname(CACHE_PATH), 'thumbnails')
+)
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get('MEAM_THUMBNAIL_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+
+# 저장 크기(가로, 세로 최대)와 JPEG 품질
+THUMBNAIL_SIZE = (200, 200)
+THUMBNAIL_QUALITY = 80
+
+# 동시에 받는 수, 요청 제한 시간(연결, 읽기 - 초), 받는 최대 크기
+PREFETCH_WORKERS = 8
+FETCH_TIMEOUT = (3, 5)
+MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+
+# 이미지가 아니거나 받지 못한 URL을 다시 시도하기까지의 시간(초)
+FAILURE_RETRY_INTERVAL = 3600
+
+# 유튜브 외에 URL 자체를 이미지로 받아도 되는 호스트 (쉼표로 구분, 하위 도메인 포함)
+# 패턴 시트의 URL은 누구나 등록할 수 있으므로 기본값은 유튜브 썸네일만 받음
+THUMBNAIL_HOSTS = tuple(
+    host.strip().lower() for host in os.environ.get('MEAM_THUMBNAIL_HOSTS', '').split(',') if host.strip()
+)
+
+
+def host_allowed(host, hosts):
+    host = (host or '').lower()
+    return any(host == allowed or host.endswith('.' + allowed) for allowed in hosts)
+
+
+def thumbnail_source(url, hosts=THUMBNAIL_HOSTS):
+    """참고 자료 URL의 썸네일 이미지 주소 (유튜브는 썸네일 주소, hosts의 URL은 URL 자체, 그 외는 None)"""
+    if not url or not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+        return None
+    source = get_youtube_thumbnail(url)
+    if source is not None:
+        return source
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    return url if host_allowed(host, hosts) else None
+
+
+def host_addresses(host, port):
+    """호스트 이름이 가리키는 IP 주소 목록"""
+    return [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+
+
+def public_address(address):
+    """사설/루프백/링크 로컬 등 내부망 주소가 아니면 True"""
+    address = ipaddress.ip_address(address.split('%', 1)[0])
+    return address.is_global and not address.is_multicast
+
+
+def check_public_url(source):
+    """받기 전에 URL 호스트가 공인 주소로만 연결되는지 확인 (아니면 ValueError)"""
+    parts = urlsplit(source)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError(f"지원하지 않는 주소입니다: {source}")
+    addresses = host_addresses(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+    if not addresses or not all(public_address(address) for address in addresses):
+        raise ValueError(f"내부망 주소로는 썸네일을 받지 않습니다: {parts.hostname}")
+
+
+def fetch_thumbnail(source, session=None, timeout=FETCH_TIMEOUT):
+    """이미지를 받아 THUMBNAIL_SIZE 안으로 줄인 JPEG 바이트 (이미지가 아니면 None)
+
+    내부망 주소는 받지 않으며, 확인을 우회하지 않도록 리다이렉트도 따라가지 않는다.
+    """
+    check_public_url(source)
+    getter = session.get if session is not None else requests.get
+    with getter(source, timeout=timeout, stream=True, allow_redirects=False) as response:
+        response.raise_for_status()
+        if response.status_code != 200 or 'image/' not in response.headers.get('content-type', ''):
+            return None
+        data = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            data.extend(chunk)
+            if len(data) > MAX_DOWNLOAD_BYTES:
+                return None
+
+    image = Image.open(io.BytesIO(bytes(data)))
+    image.thumbnail(THUMBNAIL_SIZE)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=THUMBNAIL_QUALITY)
+    return output.getvalue()
+
+
+class ThumbnailCache:
+    """URL별 썸네일 JPEG 파일 캐시 (전체 크기 제한 + 수정 시각 기준 LRU 삭제)
+
+    디렉터리는 처음 한 번만 훑어 파일 크기를 사용 순서대로 기억하고, 이후에는 저장/삭제 때마다 합계를 갱신한다.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIR, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # 경로 -> 크기 (오래 사용하지 않은 것부터)
+        self.sizes = OrderedDict()
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.jpg'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self.sizes[path] = size
+        self.total = sum(self.sizes.values())
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.jpg')
+
+    def contains(self, url):
+        return os.path.exists(self.path(url))
+
+    def get(self, url):
+        """저장된 썸네일 바이트 (없으면 None) - 읽을 때 수정 시각을 갱신해 최근 사용으로 표시"""
+        path = self.path(url)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        with self.lock:
+            if path in self.sizes:
+                self.sizes.move_to_end(path)
+        return data
+
+    def put(self, url, data):
+        """썸네일 저장 (임시 파일에 쓴 뒤 교체) 후 최대 크기를 넘으면 오래된 파일부터 삭제"""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            path = self.path(url)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self.lock:
+            self.total += len(data) - self.sizes.pop(path, 0)
+            self.sizes[path] = len(data)
+            self.evict()
+
+    def evict(self):
+        """최대 크기를 넘는 동안 가장 오래 사용하지 않은 파일부터 삭제 (lock을 잡은 상태에서 호출)"""
+        while self.total > self.max_bytes and len(self.sizes) > 1:
+            path, size = self.sizes.popitem(last=False)
+            self.total -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ThumbnailPrefetcher:
+    """패턴 인덱스의 참고 자료 URL 썸네일을 백그라운드에서 받아 디스크 캐시에 저장
+
+    - 인덱스 버전이 바뀔 때만 URL을 모아, 캐시에 없고 진행 중이 아닌 URL만 스레드 풀로 받음
+    - 요청마다 제한 시간이 있고 실패/이미지가 아닌 URL은 FAILURE_RETRY_INTERVAL 동안 다시 받지 않음
+    - 화면 표시는 get()으로 디스크의 바이트만 읽음 (아직 없으면 None - 기다리지 않음)
+    """
+
+    def __init__(self, cache=None, workers=PREFETCH_WORKERS, timeout=FETCH_TIMEOUT):
+        self.cache = cache if cache is not None else ThumbnailCache()
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnail')
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.failed = {}
+        self.version = None
+        self.stats = {'fetched': 0, 'not_image': 0, 'errors': 0}
+
+    def prefetch_index(self, index):
+        """인덱스의 패턴 URL 썸네일 받기 예약 (같은 버전이면 무시)"""
+        if index.version == self.version:
+            return 0
+        self.version = index.version
+        return self.prefetch(pattern['url'] for pattern in index.patterns if pattern.get('url'))
+
+    def prefetch(self, urls):
+        """URL 목록의 썸네일 받기 예약 - 예약한 수 반환"""
+        now = time.time()
+        scheduled = 0
+        with self.lock:
+            for url in dict.fromkeys(urls):
+                source = thumbnail_source(url)
+                if source is None or url in self.pending:
+                    continue
+                failed_at = self.failed.get(url)
+                if failed_at is not None and now - failed_at < FAILURE_RETRY_INTERVAL:
+                    continue
+                if self.cache.contains(url):
+                    continue
+                self.pending.add(url)
+                self.executor.submit(self.fetch, url, source)
+                scheduled += 1
+        return scheduled
+
+    def fetch(self, url, source):
+        outcome = 'errors'
+        try:
+            data = fetch_thumbnail(source, self.session, self.timeout)
+            if data is None:
+                outcome = 'not_image'
+            else:
+                self.cache.put(url, data)
+                outcome = 'fetched'
+        except Exception:
+            pass
+        finally:
+            # 여러 받기 스레드가 함께 갱신하므로 통계/실패 기록은 lock 안에서
+            with self.lock:
+                self.stats[outcome] += 1
+                if outcome != 'fetched':
+                    self.failed[url] = time.time()
+                self.pending.discard(url)
+
+    def get(self, url):
+        """참고 자료 URL의 썸네일 JPEG 바이트 (아직 받지 않았으면 None)"""
+        if not url or not isinstance(url, str):
+            return None
+        return self.cache.get(url)
+
+    def wait(self, timeout=None):
+        """진행 중인 받기가 끝날 때까지 대기 (시험/벤치마크용) - 모두 끝났으면 True"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
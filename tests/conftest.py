@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 최상위의 meam_* 모듈을 가져올 수 있도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,64 @@
+import pytest
+
+import meam_batch
+from meam_batch import expand_matches, score_batch
+from meam_bench import generate_cells, generate_patterns, generate_rules
+from meam_index import SCORE_NORMALIZER, PatternIndex
+from meam_patterns import rows_to_records
+from meam_sheets import PATTERN_HEADER
+
+
+def normalize(result):
+    """비교용 결과 - 시각은 빼고 순서 없는 목록은 정렬, 점수는 반올림"""
+    result = dict(result)
+    result.pop('timestamp', None)
+    for key in ('matched_keywords', 'matching_words'):
+        if key in result:
+            result[key] = sorted(result[key])
+    result['match_score'] = round(result['match_score'], 9)
+    result['matching_details'] = {key: round(value, 9) if isinstance(value, float) else value
+                                  for key, value in result['matching_details'].items()}
+    return result
+
+
+@pytest.fixture(scope='module')
+def sample():
+    patterns = generate_patterns(300, 2)
+    index = PatternIndex(rows_to_records(PATTERN_HEADER, patterns))
+    texts = generate_cells(1500, patterns, generate_rules(50, 2), 2)
+    texts += [patterns[0][0], '  ' + patterns[1][0] + '  ', patterns[2][0].upper(), 'x']
+    return index, texts
+
+
+@pytest.mark.parametrize('threshold, fuzzy_threshold', [(0.5, None), (0.7, None), (0.5, 0.8)])
+def test_score_batch_matches_per_text(sample, threshold, fuzzy_threshold):
+    """배치 매칭 결과가 텍스트별 PatternIndex.match와 같음 (행별 결과와 순서)"""
+    index, texts = sample
+    batch = [[] for _ in texts]
+    matches = score_batch(texts, index, threshold, fuzzy_threshold)
+    for row, found_pattern in expand_matches(texts, index, matches):
+        batch[row].append(normalize(found_pattern))
+
+    matched = 0
+    for row, text in enumerate(texts):
+        expected = [normalize(result) for result in index.match(text, threshold, fuzzy_threshold=fuzzy_threshold)]
+        assert batch[row] == expected, text
+        matched += bool(expected)
+    assert matched > 50
+
+
+@pytest.mark.parametrize('threshold', [0.5 / SCORE_NORMALIZER, 0.3])
+def test_score_batch_chunks_candidates(sample, monkeypatch, threshold):
+    """후보 쌍을 작은 묶음으로 나눠 계산해도 결과가 같음 (전체 쌍이 후보인 낮은 임계값 포함)"""
+    index, texts = sample
+    texts = texts[:150] + texts[-4:]
+    expected = score_batch(texts, index, threshold)
+    monkeypatch.setattr(meam_batch, 'CANDIDATE_CHUNK_PAIRS', 1000)
+    stats = {}
+    assert score_batch(texts, index, threshold, stats=stats).tolist() == expected.tolist()
+
+    batch = [[] for _ in texts]
+    for row, found_pattern in expand_matches(texts, index, expected):
+        batch[row].append(normalize(found_pattern))
+    for row, text in enumerate(texts):
+        assert batch[row] == [normalize(result) for result in index.match(text, threshold)], text
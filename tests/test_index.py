@@ -0,0 +1,152 @@
+import difflib
+import re
+
+import pytest
+
+from meam_bench import generate_cells, generate_patterns, generate_rules
+from meam_index import SCORE_NORMALIZER, PatternIndex
+from meam_patterns import rows_to_records
+from meam_sheets import PATTERN_HEADER
+
+
+def reference_match(input_text, data, threshold=0.5):
+    """패턴을 하나씩 모두 확인하던 원래 find_matching_patterns (썸네일/오류 표시 제외)"""
+    if not data or not input_text:
+        return []
+    input_text = str(input_text).strip()
+    if not input_text or input_text.isspace():
+        return []
+
+    input_text_lower = str(input_text).lower()
+    input_text_cleaned = re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', input_text_lower)
+    input_words = set(w for w in input_text_cleaned.split() if w.strip())
+    input_bigrams = set()
+    input_trigrams = set()
+    words = input_text_cleaned.split()
+    for i in range(len(words)-1):
+        input_bigrams.add(' '.join(words[i:i+2]))
+        if i < len(words)-2:
+            input_trigrams.add(' '.join(words[i:i+3]))
+
+    found_patterns = []
+    for pattern in data:
+        pattern_text = str(pattern['text'])
+        pattern_text_lower = pattern_text.lower()
+        pattern_cleaned = re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', pattern_text_lower)
+        pattern_words = set(w for w in pattern_cleaned.split() if w.strip())
+        if not pattern_words:
+            continue
+
+        exact_match = pattern_text_lower in input_text_lower
+        partial_match = any(word in input_text_lower for word in pattern_words if len(word) > 1)
+        pattern_bigrams = set()
+        pattern_trigrams = set()
+        p_words = pattern_cleaned.split()
+        for i in range(len(p_words)-1):
+            pattern_bigrams.add(' '.join(p_words[i:i+2]))
+            if i < len(p_words)-2:
+                pattern_trigrams.add(' '.join(p_words[i:i+3]))
+        bigram_match = bool(input_bigrams & pattern_bigrams)
+        trigram_match = bool(input_trigrams & pattern_trigrams)
+        common_words = input_words & pattern_words
+        word_similarity = len(common_words) / len(pattern_words) if pattern_words else 0
+        text_similarity = difflib.SequenceMatcher(None, input_text_cleaned, pattern_cleaned).ratio()
+        continuous_match = False
+        if len(pattern_words) > 1:
+            pattern_seq = ' '.join(pattern_cleaned.split())
+            if pattern_seq in input_text_cleaned:
+                continuous_match = True
+
+        matching_points = sum([
+            exact_match * 1.0,
+            continuous_match * 0.9,
+            bigram_match * 0.8,
+            trigram_match * 0.7,
+            word_similarity * 0.6,
+            text_similarity * 0.5,
+            partial_match * 0.4
+        ])
+        final_score = matching_points / 4.9
+        if final_score >= threshold or exact_match or continuous_match or (bigram_match and word_similarity > 0.3):
+            found_patterns.append({
+                'pattern': pattern_text,
+                'danger_level': int(pattern.get('dangerlevel', 0)),
+                'match_score': final_score,
+                'matched_keywords': sorted(common_words),
+                'exact_match': exact_match,
+                'continuous_match': continuous_match,
+                'matching_details': {
+                    'exact_match': exact_match,
+                    'continuous_match': continuous_match,
+                    'bigram_match': bigram_match,
+                    'trigram_match': trigram_match,
+                    'word_similarity': word_similarity,
+                    'text_similarity': text_similarity,
+                    'partial_match': partial_match
+                }
+            })
+
+    found_patterns.sort(key=lambda x: (
+        x.get('exact_match', False),
+        x.get('continuous_match', False),
+        x['match_score'],
+        x['danger_level']
+    ), reverse=True)
+    return found_patterns
+
+
+def comparable(result):
+    """비교용 결과 - 원래 루프가 만들던 항목만 남김"""
+    return {
+        'pattern': result['pattern'],
+        'danger_level': result['danger_level'],
+        'match_score': result['match_score'],
+        'matched_keywords': sorted(result['matched_keywords']),
+        'exact_match': result['exact_match'],
+        'continuous_match': result['continuous_match'],
+        'matching_details': result['matching_details']
+    }
+
+
+@pytest.fixture(scope='module')
+def sample():
+    patterns = generate_patterns(80, 5)
+    records = rows_to_records(PATTERN_HEADER, patterns)
+    texts = generate_cells(100, patterns, generate_rules(30, 5), 5)
+    texts += [records[0]['text'], records[1]['text'].upper() + '!!', records[2]['text'][:-2],
+              ' '.join(str(records[3]['text']).split()[:2]), '가', 'a b', '   ']
+    return records, PatternIndex(records), texts
+
+
+def boundary_thresholds(records, texts):
+    """실제 점수와 정확히 같은 임계값 (가지치기 상한과 >= 비교 경계 확인용)"""
+    scores = sorted({result['match_score'] for text in texts[:40]
+                     for result in reference_match(text, records, 0.0)})
+    return [scores[len(scores) * step // 4] for step in range(1, 4)]
+
+
+def test_index_matches_per_pattern_loop(sample):
+    """인덱스 매칭이 원래 패턴별 루프와 결과/순서 모두 같음 (가지치기와 0.5/4.9 건너뛰기 경계 포함)"""
+    records, index, texts = sample
+    skip_bound = 0.5 / SCORE_NORMALIZER
+    thresholds = [skip_bound - 1e-9, skip_bound, skip_bound + 1e-9, 0.3, 0.5, 0.7]
+    thresholds += boundary_thresholds(records, texts)
+
+    matched = 0
+    for threshold in thresholds:
+        for text in texts:
+            expected = reference_match(text, records, threshold)
+            assert [comparable(result) for result in index.match(text, threshold)] == expected, (threshold, text)
+            matched += bool(expected)
+    assert matched > 100
+
+
+def test_pruning_skips_work_without_changing_results(sample):
+    """가지치기 통계가 실제로 쌓이는지 (위 동등성 검사가 가지치기 경로를 거침)"""
+    records, index, texts = sample
+    stats = {}
+    for text in texts:
+        index.match(text, 0.5, stats=stats)
+    assert stats.get('pruned_by_features', 0) + stats.get('pruned_by_real_quick_ratio', 0) + \
+        stats.get('pruned_by_quick_ratio', 0) > 0
+    assert stats.get('skipped_by_index', 0) > 0
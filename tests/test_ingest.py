@@ -0,0 +1,76 @@
+import io
+import zipfile
+
+from meam_ingest import CsvTextReader, iter_row_batches, sheet_digests
+
+
+def csv_rows(data, chunk_rows=1000):
+    errors = []
+    frames = [batch['frame'] for batch in iter_row_batches(io.BytesIO(data), 'test.csv', chunk_rows, errors.append)]
+    return [row for frame in frames for row in frame.values.tolist()], errors
+
+
+def test_csv_switches_to_cp949_after_first_block():
+    """앞부분이 ASCII이고 뒤쪽에 euc-kr 바이트가 있어도 끝까지 읽음"""
+    head = 'a,b\n' + ''.join(f'x{i},y\n' for i in range(20000))
+    rows, errors = csv_rows(head.encode('utf-8') + '한글,"쉼표, 포함"\n'.encode('euc-kr'))
+    assert not errors
+    assert len(rows) == 20001
+    assert rows[-1] == ['한글', '쉼표, 포함']
+
+
+def test_csv_decodes_split_multibyte_characters():
+    text = 'a\n' + '가나다' * 1000 + '\n'
+    assert CsvTextReader(io.BytesIO(text.encode('utf-8')), block_size=7).read() == text
+    rows, errors = csv_rows('a,b\n가,나\n'.encode('euc-kr'))
+    assert rows == [['가', '나']] and not errors
+
+
+def test_csv_errors_go_to_on_error():
+    rows, errors = csv_rows(b'a,b\n\xff\xff,x\n')
+    assert rows == [] and len(errors) == 1
+
+
+def workbook_bytes(sheets):
+    """Excel처럼 모든 문자열을 처음 나온 순서로 sharedStrings.xml에 모아 둔 최소 xlsx"""
+    namespace = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    relationship = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    strings = {}
+    sheet_xml = []
+    for rows in sheets.values():
+        cells = []
+        for row_number, row in enumerate(rows, 1):
+            values = ''.join(
+                f'<c r="{chr(65 + column)}{row_number}" t="s"><v>{strings.setdefault(value, len(strings))}</v></c>'
+                if isinstance(value, str) else f'<c r="{chr(65 + column)}{row_number}"><v>{value}</v></c>'
+                for column, value in enumerate(row))
+            cells.append(f'<row r="{row_number}">{values}</row>')
+        sheet_xml.append(f'<worksheet xmlns="{namespace}"><sheetData>{"".join(cells)}</sheetData></worksheet>')
+
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, 'w') as package:
+        package.writestr('xl/workbook.xml', f'<workbook xmlns="{namespace}" xmlns:r="{relationship}"><sheets>' + ''.join(
+            f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(sheets, 1)) + '</sheets></workbook>')
+        package.writestr('xl/_rels/workbook.xml.rels',
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' + ''.join(
+                             f'<Relationship Id="rId{i}" Type="{relationship}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                             for i in range(1, len(sheets) + 1))
+                         + f'<Relationship Id="rIdS" Type="{relationship}/sharedStrings" Target="sharedStrings.xml"/>'
+                         + '</Relationships>')
+        for i, xml in enumerate(sheet_xml, 1):
+            package.writestr(f'xl/worksheets/sheet{i}.xml', xml)
+        package.writestr('xl/sharedStrings.xml', f'<sst xmlns="{namespace}">' + ''.join(
+            f'<si><t>{value}</t></si>' for value in strings) + '</sst>')
+    stream.seek(0)
+    return stream
+
+
+def test_sheet_digests_change_only_for_edited_sheet():
+    """한 시트의 문자열을 고치면 공유 문자열 번호가 다시 매겨져도 그 시트의 해시만 바뀜"""
+    sheets = {name: [['text', 'n']] + [[f'{name} 문장 {i}', i] for i in range(50)] for name in ('A', 'B', 'C')}
+    before = sheet_digests(workbook_bytes(sheets))
+    sheets['A'][3][0] = '새로 고친 문장'
+    after = sheet_digests(workbook_bytes(sheets))
+    assert list(before) == ['A', 'B', 'C']
+    assert before['A'] != after['A']
+    assert before['B'] == after['B'] and before['C'] == after['C']
@@ -0,0 +1,109 @@
+import csv
+import time
+
+import pytest
+
+from meam_patterns import LocalPatternSource, PatternStore
+from meam_sheets import PATTERN_HEADER
+
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows([PATTERN_HEADER] + rows)
+
+
+def pattern_row(number):
+    return [f'패턴 {number}', f'분석 {number}', '', str(number % 5), '2024-01-01 00:00:00']
+
+
+@pytest.fixture
+def store(tmp_path):
+    """데이터 행 5개인 CSV 원본과 한 번 동기화한 저장소"""
+    source = LocalPatternSource(str(tmp_path / 'patterns.csv'))
+    write_rows(source.path, [pattern_row(number) for number in range(5)])
+    store = PatternStore(lambda: source, path=str(tmp_path / 'snapshot.json.gz'))
+    assert store.sync() == 'full'
+    # get_records가 백그라운드 동기화를 시작하지 않도록 방금 확인한 것으로 둠 (동기화는 테스트에서 직접 호출)
+    store.last_attempt = time.time()
+    return store, source
+
+
+def texts(store):
+    return [record['text'] for record in store.get_records()]
+
+
+def test_sync_unchanged(store):
+    store, source = store
+    records = store.get_records()
+    assert store.sync() == 'unchanged'
+    assert store.get_records() is records
+
+
+def test_sync_appended_keeps_existing_records(store):
+    store, source = store
+    records = store.get_records()
+    source.append_row(pattern_row(5))
+    assert store.sync() == 'appended'
+    assert texts(store) == [f'패턴 {number}' for number in range(6)]
+    assert all(new is old for new, old in zip(store.get_records(), records))
+
+
+def test_sync_full_when_middle_row_deleted(store):
+    store, source = store
+    write_rows(source.path, [pattern_row(number) for number in (0, 1, 3, 4, 5)])
+    assert store.sync() == 'full'
+    assert texts(store) == [f'패턴 {number}' for number in (0, 1, 3, 4, 5)]
+
+
+def test_periodic_full_sync_picks_up_middle_edit(store):
+    """마지막 행이 그대로인 중간 행 수정은 FULL_SYNC_INTERVAL마다의 전체 동기화에서 반영"""
+    store, source = store
+    rows = [pattern_row(number) for number in range(5)]
+    rows[2][0] = '수정된 패턴'
+    write_rows(source.path, rows)
+    assert store.sync() == 'appended'
+    assert texts(store)[2] == '패턴 2'
+
+    store.full_sync_interval = 0
+    assert store.sync() == 'full'
+    assert texts(store)[2] == '수정된 패턴'
+
+
+def test_unreachable_source_keeps_snapshot(store):
+    store, source = store
+
+    def unreachable():
+        raise OSError('연결 실패')
+
+    reopened = PatternStore(unreachable, path=store.path)
+    assert [record['text'] for record in reopened.get_records()] == texts(store)
+    reopened.sync_thread.join()
+    assert '연결 실패' in reopened.last_error
+
+
+def test_append_local_then_sync(store):
+    store, source = store
+    source.append_row(pattern_row(5))
+    store.append_local([pattern_row(5)])
+    assert len(texts(store)) == 6
+    assert store.sync() == 'appended'
+    assert len(texts(store)) == 6
+
+
+def test_append_local_after_background_sync_pulled_row(store):
+    """등록 직후 백그라운드 동기화가 새 행을 먼저 받아 갔어도 중복으로 붙이지 않음"""
+    store, source = store
+    source.append_row(pattern_row(5))
+    source.append_row(pattern_row(6))
+    assert store.sync() == 'appended'
+    store.append_local([pattern_row(5), pattern_row(6)])
+    assert texts(store) == [f'패턴 {number}' for number in range(7)]
+
+    # 일부만 받아 간 경우에는 나머지만 붙임
+    source.append_row(pattern_row(7))
+    store.sync()
+    source.append_row(pattern_row(8))
+    store.append_local([pattern_row(7), pattern_row(8)])
+    assert texts(store) == [f'패턴 {number}' for number in range(9)]
+    assert store.sync() == 'appended'
+    assert len(texts(store)) == 9
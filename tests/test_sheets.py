@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+import requests
+
+from meam_sheets import (BACKOFF_BASE, PATTERN_HEADER, MemorySheetsBackend, SheetsGateway,
+                         SQLiteSheetsBackend, TransientSheetError)
+
+
+class FlakyBackend:
+    """앞의 요청 몇 번을 실패시키는 백엔드 래퍼 - applied면 행을 반영한 뒤 실패 (응답만 잃은 경우)"""
+
+    def __init__(self, backend, failures):
+        self.backend = backend
+        self.failures = list(failures)
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        def call(*args):
+            self.calls.append(name)
+            if self.failures and self.failures[0][0] == name:
+                _, error, applied = self.failures.pop(0)
+                if applied:
+                    method(*args)
+                raise error
+            return method(*args)
+        return call
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        backend = MemorySheetsBackend()
+    else:
+        backend = SQLiteSheetsBackend(str(tmp_path / 'sheets.db'))
+    backend.ensure_worksheet(0, PATTERN_HEADER)
+    return backend
+
+
+def pattern_row(number):
+    return [f'패턴 {number}', '분석', '', '10', '2024-01-01 00:00:00']
+
+
+def test_append_row_batches_requests(backend):
+    gateway = SheetsGateway(backend, batch_size=100, flush_delay=0.3)
+    futures = [gateway.append_row(0, pattern_row(number), wait=False) for number in range(30)]
+    for future in futures:
+        future.result(5)
+    assert gateway.stats['append_requests'] == 1
+    assert gateway.stats['appended_rows'] == 30
+    assert backend.read_values(0)[1:] == [pattern_row(number) for number in range(30)]
+
+
+def test_append_row_splits_by_batch_size(backend):
+    gateway = SheetsGateway(backend, batch_size=10, flush_delay=5)
+    futures = [gateway.append_row(0, pattern_row(number), wait=False) for number in range(25)]
+    gateway.flush()
+    for future in futures:
+        future.result(5)
+    assert gateway.stats['append_requests'] == 3
+    assert len(backend.read_values(0)) == 26
+
+
+def test_append_row_from_many_threads(backend):
+    """여러 세션 스레드가 동시에 등록해도 통계와 행 수가 맞음"""
+    gateway = SheetsGateway(backend, batch_size=7, flush_delay=0.05)
+    threads = [threading.Thread(target=gateway.append_row, args=(0, pattern_row(number))) for number in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert gateway.stats['appended_rows'] == 40
+    assert sorted(row[0] for row in backend.read_values(0)[1:]) == sorted(f'패턴 {number}' for number in range(40))
+
+
+def test_retries_with_backoff(backend):
+    delays = []
+    flaky = FlakyBackend(backend, [('read_values', TransientSheetError('한도 초과'), False)] * 3)
+    gateway = SheetsGateway(flaky, sleep=delays.append)
+    assert gateway.read_values(0) == [PATTERN_HEADER]
+    assert gateway.stats['retries'] == 3 and gateway.stats['requests'] == 4
+    # 지수 백오프 상한 안의 무작위 대기 (full jitter)
+    assert all(0 <= delay <= BACKOFF_BASE * 2 ** attempt for attempt, delay in enumerate(delays))
+    assert len(delays) == 3
+
+
+def test_retry_after_is_honored(backend):
+    delays = []
+    flaky = FlakyBackend(backend, [('revision', TransientSheetError('한도 초과', retry_after=7), False)])
+    gateway = SheetsGateway(flaky, sleep=delays.append)
+    gateway.revision()
+    assert delays == [7.0]
+
+
+def test_gives_up_after_max_retries(backend):
+    flaky = FlakyBackend(backend, [('read_values', TransientSheetError('한도 초과'), False)] * 5)
+    gateway = SheetsGateway(flaky, max_retries=2, sleep=lambda delay: None)
+    with pytest.raises(TransientSheetError):
+        gateway.read_values(0)
+    assert gateway.stats['requests'] == 3
+
+
+def test_unsent_append_is_resent(backend):
+    flaky = FlakyBackend(backend, [('append_rows', TransientSheetError('한도 초과'), False)])
+    gateway = SheetsGateway(flaky, flush_delay=0, sleep=lambda delay: None)
+    gateway.append_row(0, pattern_row(1))
+    assert backend.read_values(0)[1:] == [pattern_row(1)]
+    assert flaky.calls.count('append_rows') == 2
+    assert gateway.stats['append_checks'] == 0
+
+
+def test_append_applied_before_error_is_not_duplicated(backend):
+    """응답을 받지 못했지만 이미 반영된 추가는 끝 행을 확인하고 다시 보내지 않음"""
+    flaky = FlakyBackend(backend, [('append_rows', requests.exceptions.ReadTimeout('응답 시간 초과'), True)])
+    gateway = SheetsGateway(flaky, flush_delay=0, sleep=lambda delay: None)
+    gateway.append_row(0, pattern_row(1))
+    assert backend.read_values(0)[1:] == [pattern_row(1)]
+    assert flaky.calls.count('append_rows') == 1
+    assert gateway.stats['append_checks'] == 1
+
+
+def test_append_lost_before_apply_is_resent_after_check(backend):
+    """이미 반영되었을 수 있는 오류라도 끝 행에 없으면 다시 보냄"""
+    flaky = FlakyBackend(backend, [('append_rows', requests.exceptions.ReadTimeout('응답 시간 초과'), False)])
+    gateway = SheetsGateway(flaky, flush_delay=0, sleep=lambda delay: None)
+    gateway.append_row(0, pattern_row(1))
+    assert backend.read_values(0)[1:] == [pattern_row(1)]
+    assert flaky.calls.count('append_rows') == 2
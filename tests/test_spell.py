@@ -0,0 +1,111 @@
+import re
+
+from meam_bench import generate_cells, generate_patterns, generate_rules
+from meam_spell import SpellEngine
+
+NEAR_MISS_TYPE = '맞춤법/표현 오류 (유사 표현)'
+
+
+WORD_RULES = {'할수있다': '할 수 있다', '어의없다': '어이없다', '몇일': '며칠', 'occured': 'occurred'}
+
+
+# 정규식 규칙(전체 일치)과 컴파일되지 않는 정규식 규칙(일반 문자열로 처리)
+REGEX_RULES = {'^되요$': '돼요', '^(\\w+)읍니다$': '\\1습니다', '^(안되$': '안 돼'}
+
+
+def reference_check(text, rules):
+    """규칙을 하나씩 모두 확인하던 원래 SheetBasedSpellChecker.check (유사 표현 없음)"""
+    if not text or text.isspace():
+        return {'original': text, 'corrected': text, 'corrections': [], 'error': None}
+    corrections = []
+    corrected_text = text
+    words = re.findall(r'\b\w+\b', text)
+    processed_corrections = set()
+    for wrong, right in rules.items():
+        try:
+            if wrong.startswith('^') and wrong.endswith('$'):
+                for match in re.compile(wrong).finditer(text):
+                    matched_text = match.group(0)
+                    corrected_word = re.sub(wrong, right, matched_text)
+                    if matched_text != corrected_word and (matched_text, corrected_word) not in processed_corrections:
+                        processed_corrections.add((matched_text, corrected_word))
+                        corrected_text = corrected_text.replace(matched_text, corrected_word)
+                        corrections.append({'original': matched_text, 'corrected': corrected_word,
+                                            'type': '맞춤법/표현 오류 (정규식)', 'pattern': wrong, 'replacement': right})
+            else:
+                for word in words:
+                    if wrong in word:
+                        corrected_word = word.replace(wrong, right)
+                        if word != corrected_word and (word, corrected_word) not in processed_corrections:
+                            processed_corrections.add((word, corrected_word))
+                            corrected_text = corrected_text.replace(word, corrected_word)
+                            corrections.append({'original': word, 'corrected': corrected_word,
+                                                'type': '맞춤법/표현 오류', 'pattern': wrong, 'replacement': right})
+        except re.error:
+            if wrong in text and (wrong, right) not in processed_corrections:
+                processed_corrections.add((wrong, right))
+                corrected_text = corrected_text.replace(wrong, right)
+                corrections.append({'original': wrong, 'corrected': right,
+                                    'type': '맞춤법/표현 오류', 'pattern': wrong, 'replacement': right})
+    corrections.sort(key=lambda x: len(x['original']), reverse=True)
+    return {'original': text, 'corrected': corrected_text, 'corrections': corrections, 'error': None}
+
+
+def sample_rules():
+    rules = generate_rules(300, 1)
+    rules.update(WORD_RULES)
+    return rules
+
+
+def test_engine_matches_per_rule_loop():
+    """유사 표현을 끈 SpellEngine.check가 규칙을 하나씩 확인하던 원래 방식과 같은 결과"""
+    rules = sample_rules()
+    rules.update(REGEX_RULES)
+    texts = generate_cells(3000, generate_patterns(100, 1), rules, 1)
+    texts += ['', '   ', '되요', '먹었읍니다', '^(안되$ 라고 적음', '할수있다고 몇일 뒤 occured', '몇일몇일 몇일']
+    engine = SpellEngine(rules, max_distance=0)
+    corrected = 0
+    for text in texts:
+        expected = reference_check(text, rules)
+        assert engine.check(text) == expected, text
+        corrected += bool(expected['corrections'])
+    assert corrected > 100
+
+
+def test_near_miss_keeps_exact_rule_output():
+    """유사 표현을 찾지 못한 텍스트는 유사 표현 교정을 켜도 결과가 같음"""
+    rules = sample_rules()
+    texts = generate_cells(2000, generate_patterns(100, 1), rules, 1) + ['할수있다고 했다', '몇일 뒤', 'it occured']
+    exact = SpellEngine(rules, max_distance=0)
+    near = SpellEngine(rules, max_distance=2)
+    compared = 0
+    for text in texts:
+        result = near.check(text)
+        if any(correction['type'] == NEAR_MISS_TYPE for correction in result['corrections']):
+            continue
+        assert result == exact.check(text), text
+        compared += 1
+    assert compared > len(texts) * 0.9
+
+
+def test_near_miss_finds_variants():
+    engine = SpellEngine(WORD_RULES, max_distance=2)
+    for text, original in [('할수잇다고 했다', '할수잇다'), ('정말 어의 없다', '어의 없다'), ('it ocured', 'ocured')]:
+        corrections = engine.check(text)['corrections']
+        assert [(c['original'], c['type']) for c in corrections] == [(original, NEAR_MISS_TYPE)], text
+
+
+def test_near_miss_on_by_default():
+    """등록된 오류 표현의 오타 변형은 따로 규칙을 등록하지 않아도 기본 설정에서 교정됨"""
+    result = SpellEngine(WORD_RULES).check('할수잇다고 했다')
+    assert result['corrected'] == '할 수 있다고 했다'
+    assert [c['type'] for c in result['corrections']] == [NEAR_MISS_TYPE]
+    assert SpellEngine(WORD_RULES, max_distance=0).check('할수잇다고 했다')['corrections'] == []
+
+
+def test_near_miss_typos_past_prefix():
+    """삭제 변형은 앞부분만 색인하지만 오타가 앞/뒤 어디에 있어도 찾음"""
+    engine = SpellEngine({'accomodation': 'accommodation', '어이가없다고말했다': '어이가 없다고 말했다'}, max_distance=2)
+    for text in ['acomodation', 'accomodatoin', 'acomodatoin', '어이가엾다고말했다', '어이거없다고말햇다']:
+        corrections = engine.check(text)['corrections']
+        assert [(c['original'], c['type']) for c in corrections] == [(text, NEAR_MISS_TYPE)], text
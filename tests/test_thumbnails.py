@@ -0,0 +1,134 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import meam_thumbnails
+from meam_thumbnails import ThumbnailCache, ThumbnailPrefetcher, fetch_thumbnail, thumbnail_source
+
+VIDEO_URL = 'https://www.youtube.com/watch?v=abcdefghijk'
+
+
+class FakeResponse:
+    def __init__(self, data, content_type='image/png', status_code=200):
+        self.data = data
+        self.status_code = status_code
+        self.headers = {'content-type': content_type}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        yield self.data
+
+
+class FakeSession:
+    """받은 주소를 기록하고 미리 정한 응답(또는 예외)을 돌려주는 세션"""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def png_bytes():
+    output = io.BytesIO()
+    Image.new('RGB', (400, 300), 'red').save(output, format='PNG')
+    return output.getvalue()
+
+
+@pytest.fixture
+def public_dns(monkeypatch):
+    """모든 호스트가 공인 주소로 해석되는 것으로 둠 (네트워크 없이 시험)"""
+    monkeypatch.setattr(meam_thumbnails, 'host_addresses', lambda host, port: ['142.250.0.1'])
+
+
+def test_thumbnail_source_only_youtube_or_allowed_hosts():
+    assert thumbnail_source(VIDEO_URL) == 'https://img.youtube.com/vi/abcdefghijk/hqdefault.jpg'
+    assert thumbnail_source('https://example.com/a.jpg') is None
+    assert thumbnail_source('http://127.0.0.1:8080/a.jpg') is None
+    assert thumbnail_source('file:///etc/passwd') is None
+    assert thumbnail_source('https://cdn.example.com/a.jpg', hosts=('example.com',)) == 'https://cdn.example.com/a.jpg'
+    assert thumbnail_source('https://example.com.evil.net/a.jpg', hosts=('example.com',)) is None
+
+
+@pytest.mark.parametrize('address', ['127.0.0.1', '10.0.0.5', '192.168.1.1', '169.254.169.254', '::1', '::ffff:127.0.0.1'])
+def test_fetch_rejects_internal_addresses(monkeypatch, address):
+    monkeypatch.setattr(meam_thumbnails, 'host_addresses', lambda host, port: [address])
+    session = FakeSession(FakeResponse(png_bytes()))
+    with pytest.raises(ValueError):
+        fetch_thumbnail('https://img.example.com/a.jpg', session)
+    assert session.requested == []
+
+
+def test_fetch_resizes_image(public_dns):
+    data = fetch_thumbnail('https://img.youtube.com/vi/abcdefghijk/hqdefault.jpg', FakeSession(FakeResponse(png_bytes())))
+    assert max(Image.open(io.BytesIO(data)).size) <= max(meam_thumbnails.THUMBNAIL_SIZE)
+
+
+def test_fetch_ignores_redirects_and_non_images(public_dns):
+    source = 'https://img.youtube.com/vi/abcdefghijk/hqdefault.jpg'
+    assert fetch_thumbnail(source, FakeSession(FakeResponse(b'', 'text/html', 302))) is None
+    assert fetch_thumbnail(source, FakeSession(FakeResponse(b'<html>', 'text/html'))) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=250)
+    for name in 'abc':
+        cache.put(name, b'x' * 100)
+    assert not cache.contains('a') and cache.contains('b') and cache.contains('c')
+    assert cache.total == 200
+
+    # 읽은 항목은 최근 사용으로 옮겨져 다음 삭제 대상에서 빠짐
+    assert cache.get('b') == b'x' * 100
+    cache.put('d', b'x' * 100)
+    assert cache.contains('b') and not cache.contains('c') and cache.contains('d')
+    assert cache.total == sum(os.path.getsize(path) for path in cache.sizes) == 200
+
+
+def test_cache_reopen_counts_existing_files(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=1000)
+    cache.put('a', b'x' * 100)
+    cache.put('b', b'x' * 50)
+    reopened = ThumbnailCache(str(tmp_path), max_bytes=1000)
+    assert reopened.total == 150 and len(reopened.sizes) == 2
+
+
+def test_prefetcher_backs_off_after_failure(tmp_path, public_dns):
+    prefetcher = ThumbnailPrefetcher(ThumbnailCache(str(tmp_path)), workers=1)
+    prefetcher.session = FakeSession(error=OSError('연결 실패'))
+    assert prefetcher.prefetch([VIDEO_URL]) == 1
+    assert prefetcher.wait(5)
+    assert prefetcher.stats['errors'] == 1
+
+    # 실패 후 FAILURE_RETRY_INTERVAL 동안은 다시 예약하지 않음
+    assert prefetcher.prefetch([VIDEO_URL]) == 0
+    assert len(prefetcher.session.requested) == 1
+
+    prefetcher.session = FakeSession(FakeResponse(png_bytes()))
+    prefetcher.failed[VIDEO_URL] -= meam_thumbnails.FAILURE_RETRY_INTERVAL
+    assert prefetcher.prefetch([VIDEO_URL]) == 1
+    assert prefetcher.wait(5)
+    assert prefetcher.stats['fetched'] == 1
+    assert prefetcher.get(VIDEO_URL) is not None
+    assert prefetcher.prefetch([VIDEO_URL]) == 0
+
+
+def test_prefetcher_skips_disallowed_urls(tmp_path):
+    prefetcher = ThumbnailPrefetcher(ThumbnailCache(str(tmp_path)), workers=1)
+    prefetcher.session = FakeSession(FakeResponse(png_bytes()))
+    assert prefetcher.prefetch(['http://127.0.0.1/a.jpg', 'https://example.com/a.jpg']) == 0
+    assert prefetcher.session.requested == []